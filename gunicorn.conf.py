@@ -0,0 +1,58 @@
+"""Настройки gunicorn.
+
+Приложение загружается в мастер-процессе (``preload_app``) и прогревается
+до fork: воркеры получают импортированный Django, скомпилированные
+шаблоны и URL-резолвер через copy-on-write.
+"""
+
+import os
+
+wsgi_app = "task_manager.wsgi:application"
+
+preload_app = True
+
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+
+
+def on_starting(server):
+    from django.conf import settings
+
+    from task_manager.metrics import store
+
+    # Кэш в памяти процесса у каждого воркера свой: сброс кэша участников
+    # или версии страниц в одном воркере не виден остальным
+    backend = settings.CACHES["default"]["BACKEND"]
+    if server.cfg.workers > 1 and backend.endswith("LocMemCache"):
+        raise RuntimeError(
+            "LocMemCache не подходит для нескольких воркеров: "
+            "задайте общий кэш (CACHE_BACKEND, REDIS_URL)"
+        )
+    # Метрики прошлого запуска сбрасываются, воркеры пишут заново
+    store.reset()
+
+
+def when_ready(server):
+    # Вызывается в мастере после загрузки приложения и до запуска воркеров
+    from task_manager.warmup import warm_up
+
+    stats = warm_up()
+    server.log.info(
+        "Прогрев: %(templates)d шаблонов, %(url_patterns)d маршрутов "
+        "за %(duration_ms).0f мс",
+        stats,
+    )
+
+
+def post_fork(server, worker):
+    # Соединения с БД, открытые в мастере, нельзя делить между процессами
+    from django.db import connections
+
+    connections.close_all()
+
+
+def child_exit(server, worker):
+    from task_manager.metrics import store
+
+    store.mark_process_dead(worker.pid)
@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from task_manager.attachments.models import Attachment
+
+
+@admin.register(Attachment)
+class AttachmentAdmin(admin.ModelAdmin):
+    list_display = ("name", "task_id", "size", "uploaded_by", "created_at")
+    raw_id_fields = ("blob",)
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+
+
+class Blob(models.Model):
+    # Содержимое хранится один раз на диске под своим SHA-256,
+    # одинаковые файлы разных вложений ссылаются на один Blob
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.sha256
+
+
+class Attachment(models.Model):
+    # Без ограничения на уровне БД: вложения остаются за задачей
+    # при переносе в архив, как история и комментарии
+    task = models.ForeignKey(
+        'tasks.Task',
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='attachments',
+    )
+    blob = models.ForeignKey(
+        Blob,
+        on_delete=models.PROTECT,
+        related_name='attachments',
+    )
+    name = models.CharField(max_length=255, verbose_name='Имя файла')
+    content_type = models.CharField(max_length=255)
+    # Копия размера Blob: счетчики и список вложений обходятся без JOIN
+    size = models.BigIntegerField()
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Загрузил',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class TaskStorage(models.Model):
+    # Суммарный размер вложений задачи; строка переживает архивацию
+    task_id = models.BigIntegerField(unique=True)
+    bytes = models.BigIntegerField(default=0)
+
+
+class UserStorage(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='storage',
+    )
+    bytes = models.BigIntegerField(default=0)
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from task_manager.attachments.models import Attachment
+from task_manager.attachments.storage import release_blob, usage_changed
+from task_manager.tasks.versions import bump_tasks
+
+
+@receiver(post_save, sender=Attachment)
+def attachment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        usage_changed(instance, 1)
+        # Список вложений выводится в карточке задачи
+        bump_tasks([instance.task_id])
+
+
+@receiver(post_delete, sender=Attachment)
+def attachment_deleted(sender, instance, **kwargs):
+    usage_changed(instance, -1)
+    release_blob(instance.blob_id)
+    bump_tasks([instance.task_id])
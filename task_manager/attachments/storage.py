@@ -0,0 +1,118 @@
+"""Хранилище вложений с дедупликацией по SHA-256.
+
+Файл лежит в ATTACHMENTS_ROOT/blobs/ab/cd/<sha256>. Загрузка с уже
+известным хешем не пишет на диск ничего нового: временный файл
+удаляется, а вложение ссылается на существующий Blob. Занятое место
+по задаче и по пользователю хранится в счетчиках TaskStorage и
+UserStorage и меняется сигналами вложений; квота проверяется под
+блокировкой строки UserStorage в той же транзакции, что и запись.
+"""
+
+import os
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef
+
+from task_manager.attachments.models import (
+    Attachment,
+    Blob,
+    TaskStorage,
+    UserStorage,
+)
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def blob_path(sha256):
+    return os.path.join(
+        settings.ATTACHMENTS_ROOT, "blobs", sha256[:2], sha256[2:4], sha256,
+    )
+
+
+def user_usage(user_id):
+    return UserStorage.objects.filter(user_id=user_id).values_list(
+        "bytes", flat=True,
+    ).first() or 0
+
+
+def task_usage(task_id):
+    return TaskStorage.objects.filter(task_id=task_id).values_list(
+        "bytes", flat=True,
+    ).first() or 0
+
+
+def bump(model, delta, **key):
+    if not delta or None in key.values():
+        return
+    updated = model.objects.filter(**key).update(bytes=F("bytes") + delta)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(bytes=delta, **key)
+    except IntegrityError:
+        # Строку успел создать параллельный запрос
+        model.objects.filter(**key).update(bytes=F("bytes") + delta)
+
+
+def usage_changed(attachment, sign):
+    bump(TaskStorage, sign * attachment.size, task_id=attachment.task_id)
+    bump(UserStorage, sign * attachment.size, user_id=attachment.uploaded_by_id)
+
+
+def attach(task_id, uploaded, user):
+    quota = settings.ATTACHMENTS_USER_QUOTA
+    moved = None
+    try:
+        with transaction.atomic():
+            if quota:
+                # Строка счетчика заблокирована до конца транзакции:
+                # параллельные загрузки пользователя проверяют квоту по
+                # очереди и видят уже учтенные размеры друг друга
+                UserStorage.objects.get_or_create(user_id=user.pk)
+                used = UserStorage.objects.select_for_update().values_list(
+                    "bytes", flat=True,
+                ).get(user_id=user.pk)
+                if used + uploaded.size > quota:
+                    raise QuotaExceeded
+            blob, created = Blob.objects.get_or_create(
+                sha256=uploaded.sha256,
+                defaults={"size": uploaded.size},
+            )
+            path = blob_path(blob.sha256)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Переименование в пределах файловой системы, без копирования
+                os.replace(uploaded.temporary_file_path(), path)
+                moved = path
+            return Attachment.objects.create(
+                task_id=task_id,
+                blob=blob,
+                name=os.path.basename(uploaded.name)[:255],
+                content_type=uploaded.content_type or "application/octet-stream",
+                size=blob.size,
+                uploaded_by=user,
+            )
+    except Exception:
+        # Транзакция откатилась вместе со строкой Blob: перенесенный файл
+        # ни на что не ссылается
+        if moved is not None:
+            _remove(moved)
+        raise
+
+
+def release_blob(sha256):
+    # Файл удаляется, когда на него не ссылается ни одно вложение
+    deleted, _ = Blob.objects.filter(pk=sha256).exclude(
+        Exists(Attachment.objects.filter(blob_id=OuterRef("pk"))),
+    ).delete()
+    if deleted:
+        transaction.on_commit(lambda: _remove(blob_path(sha256)))
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
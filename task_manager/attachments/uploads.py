@@ -0,0 +1,87 @@
+"""Прием загружаемых файлов.
+
+``HashingUploadHandler`` заменяет стандартные обработчики Django: части
+файла сразу пишутся во временный файл в каталоге вложений (на той же
+файловой системе, что и хранилище, чтобы потом его можно было просто
+переименовать) и по ходу считается SHA-256. Весь файл в памяти воркера
+не собирается ни при каком размере.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+
+def temp_dir():
+    path = os.path.join(settings.ATTACHMENTS_ROOT, "tmp")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class HashedUploadedFile(UploadedFile):
+    def __init__(self, file, name, content_type, size, charset, sha256):
+        super().__init__(file, name, content_type, size, charset)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        # Файл, не перенесенный в хранилище, удаляется
+        try:
+            return self.file.close()
+        finally:
+            if os.path.exists(self.file.name):
+                os.remove(self.file.name)
+
+
+class HashingUploadHandler(FileUploadHandler):
+    chunk_size = 256 * 2 ** 10
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.too_large = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = tempfile.NamedTemporaryFile(
+            dir=temp_dir(),
+            prefix="upload-",
+            delete=False,
+        )
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > settings.ATTACHMENTS_MAX_SIZE:
+            self.too_large = True
+            self._discard()
+            raise SkipFile
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.flush()
+        self.file.seek(0)
+        return HashedUploadedFile(
+            self.file,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=self.size,
+            charset=self.charset,
+            sha256=self.hasher.hexdigest(),
+        )
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self._discard()
+
+    def _discard(self):
+        self.file.close()
+        if os.path.exists(self.file.name):
+            os.remove(self.file.name)
@@ -0,0 +1,25 @@
+from django.urls import path
+
+from task_manager.attachments.views import (
+    AttachmentDeleteView,
+    AttachmentDownloadView,
+    AttachmentUploadView,
+)
+
+urlpatterns = [
+    path(
+        "upload/<int:task_id>/",
+        AttachmentUploadView.as_view(),
+        name="attachment_upload",
+    ),
+    path(
+        "<int:pk>/",
+        AttachmentDownloadView.as_view(),
+        name="attachment_download",
+    ),
+    path(
+        "<int:pk>/delete/",
+        AttachmentDeleteView.as_view(),
+        name="attachment_delete",
+    ),
+]
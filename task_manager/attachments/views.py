@@ -0,0 +1,94 @@
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.http import Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.generic import DeleteView
+
+from task_manager.attachments.models import Attachment
+from task_manager.attachments.serving import serve
+from task_manager.attachments.storage import QuotaExceeded, attach
+from task_manager.attachments.uploads import HashingUploadHandler
+from task_manager.projects.membership import visible_to
+from task_manager.tasks.models import ArchivedTask, Task
+
+
+def task_visible(user, task_id):
+    return any(
+        visible_to(model.objects, user).filter(pk=task_id).exists()
+        for model in (Task, ArchivedTask)
+    )
+
+
+# CSRF проверяется после замены обработчиков загрузки: middleware
+# иначе разобрало бы тело запроса стандартными обработчиками
+@method_decorator(csrf_exempt, name="dispatch")
+class AttachmentUploadView(LoginRequiredMixin, View):
+    http_method_names = ["post"]
+
+    def post(self, request, task_id):
+        handler = HashingUploadHandler(request)
+        request.upload_handlers = [handler]
+        return self.upload(request, task_id, handler)
+
+    @method_decorator(csrf_protect)
+    def upload(self, request, task_id, handler):
+        task = get_object_or_404(
+            visible_to(Task.objects.only("id", "project_id"), request.user),
+            pk=task_id,
+        )
+        uploaded = request.FILES.get("file")
+        if handler.too_large:
+            messages.error(request, "Файл слишком большой")
+        elif uploaded is None:
+            messages.error(request, "Файл не выбран")
+        else:
+            try:
+                attach(task.pk, uploaded, request.user)
+            except QuotaExceeded:
+                messages.error(request, "Превышен лимит места для вложений")
+            else:
+                messages.success(request, "Файл прикреплен")
+            finally:
+                uploaded.close()
+        return redirect("task_show", pk=task.pk)
+
+
+class AttachmentDownloadView(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        attachment = get_object_or_404(Attachment, pk=pk)
+        if not task_visible(request.user, attachment.task_id):
+            raise Http404
+        return serve(request, attachment)
+
+
+class AttachmentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+    model = Attachment
+    template_name = "attachments/delete.html"
+
+    def test_func(self):
+        attachment = self.get_object()
+        return attachment.uploaded_by_id == self.request.user.id
+
+    def handle_no_permission(self):
+        if not self.request.user.is_authenticated:
+            return super().handle_no_permission()
+        messages.error(
+            self.request, "Вложение может удалить только загрузивший его",
+        )
+        return redirect("tasks_list")
+
+    def get_queryset(self):
+        return Attachment.objects.filter(
+            task__in=visible_to(Task.objects, self.request.user),
+        )
+
+    def get_success_url(self):
+        return reverse("task_show", args=[self.object.task_id])
+
+    def form_valid(self, form):
+        messages.success(self.request, "Вложение удалено")
+        return super().form_valid(form)
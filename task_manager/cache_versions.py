@@ -0,0 +1,70 @@
+"""Версии пространств имен кэша.
+
+Ключи закэшированных значений включают версию своего пространства
+(страниц, автодополнения, задачи). Чтобы сбросить пространство, версия
+меняется, и старые ключи просто перестают запрашиваться, а затем
+вытесняются по тайм-ауту.
+
+Версия — время в наносекундах, а не счетчик с единицы: если ключ версии
+вытеснят из кэша, новая версия не совпадет ни с одной из прежних и не
+поднимет старые значения. Смена версии пишет новое значение без чтения
+старого, поэтому любое число пространств сбрасывается одним set_many.
+Внутри транзакции версия меняется дважды: сразу и после фиксации.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+BUMP_BATCH_SIZE = 1000
+
+
+def _key(namespace):
+    return f"version:{namespace}"
+
+
+def version(namespace):
+    return versions([namespace])[namespace]
+
+
+def versions(namespaces):
+    """Возвращает {пространство: версия} одним get_many."""
+    keys = {_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    result = {keys[key]: value for key, value in found.items()}
+    for key, namespace in keys.items():
+        if namespace not in result:
+            # add не затирает версию, которую успел записать другой процесс
+            cache.add(key, time.time_ns(), None)
+            result[namespace] = cache.get(key)
+    return result
+
+
+def bump(*namespaces):
+    bump_many(namespaces)
+
+
+def bump_many(namespaces):
+    # Версия меняется сразу (изменения видны в своей транзакции) и еще раз
+    # после фиксации: параллельный запрос, прочитавший до фиксации старые
+    # строки, сохранил бы их под новой версией, и устаревшее значение
+    # жило бы до тайм-аута
+    if not connection.in_atomic_block:
+        _set_versions(namespaces)
+        return
+    namespaces = list(namespaces)
+    _set_versions(namespaces)
+    transaction.on_commit(lambda: _set_versions(namespaces))
+
+
+def _set_versions(namespaces):
+    version = time.time_ns()
+    batch = {}
+    for namespace in namespaces:
+        batch[_key(namespace)] = version
+        if len(batch) >= BUMP_BATCH_SIZE:
+            cache.set_many(batch, None)
+            batch = {}
+    if batch:
+        cache.set_many(batch, None)
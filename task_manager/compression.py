@@ -0,0 +1,232 @@
+"""Сжатие ответов brotli или gzip.
+
+Кодировка выбирается по Accept-Encoding; brotli используется, только если
+установлен пакет ``brotli``, иначе ответ сжимается gzip. Маленькие, уже
+сжатые и несжимаемые ответы пропускаются, как и ответы с Accept-Ranges:
+диапазоны считаются по исходным байтам файла. Потоковые ответы сжимаются
+по частям, без буферизации.
+
+Против атак BREACH (подбор секрета, например CSRF-токена, по длине
+сжатого ответа) в заголовок gzip, как в GZipMiddleware, добавляется имя
+файла случайной длины до COMPRESSION_MAX_RANDOM_BYTES байт. У brotli
+такого места в заголовке нет, поэтому ответы, в которые мог попасть
+CSRF-токен (он запрашивался при обработке запроса), и потоковые ответы,
+которые выводятся уже после middleware, всегда сжимаются gzip.
+
+Бюджет процессорного времени (COMPRESSION_CPU_BUDGET_MS) ограничивает
+сжатие одного ответа: по измеренной стоимости байта предыдущих ответов
+оценивается время, и если настроенный уровень не укладывается в бюджет,
+берется самый быстрый, а если не укладывается и он, ответ уходит
+несжатым.
+"""
+
+import gzip
+import re
+import secrets
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+FASTEST_LEVEL = {"br": 0, "gzip": 1}
+
+# Стоимость сжатия одного байта, нс, для пар (кодировка, уровень)
+_costs = {}
+
+_SMOOTHING = 0.2
+
+_ENCODING_RE = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?")
+
+
+def accepted_encodings(header):
+    accepted = {}
+    for item in header.split(","):
+        match = _ENCODING_RE.match(item)
+        if not match:
+            continue
+        try:
+            quality = float(match[2]) if match[2] else 1.0
+        except ValueError:
+            continue
+        accepted[match[1].lower()] = quality
+    return accepted
+
+
+def negotiate(header, allow_brotli=True):
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0)
+    available = ["gzip"]
+    if brotli is not None and allow_brotli:
+        available.insert(0, "br")
+    best = None
+    for encoding in available:
+        quality = accepted.get(encoding, wildcard)
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+
+def configured_level(encoding):
+    if encoding == "br":
+        return settings.COMPRESSION_BROTLI_QUALITY
+    return settings.COMPRESSION_LEVEL
+
+
+def choose_level(encoding, size):
+    budget = settings.COMPRESSION_CPU_BUDGET_MS * 1_000_000
+    for level in (configured_level(encoding), FASTEST_LEVEL[encoding]):
+        cost = _costs.get((encoding, level))
+        if cost is None or cost * size <= budget:
+            return level
+    return None
+
+
+def _remember_cost(encoding, level, size, elapsed_ns):
+    if not size:
+        return
+    cost = elapsed_ns / size
+    previous = _costs.get((encoding, level))
+    _costs[(encoding, level)] = (
+        cost if previous is None
+        else previous + _SMOOTHING * (cost - previous)
+    )
+
+
+def _padded(data):
+    # Заголовок gzip — первые 10 байт; флаг FNAME объявляет за ним имя
+    # файла, оканчивающееся нулевым байтом
+    max_random_bytes = settings.COMPRESSION_MAX_RANDOM_BYTES
+    if not max_random_bytes:
+        return data
+    header = bytearray(data[:10])
+    header[3] |= gzip.FNAME
+    filename = b"a" * secrets.randbelow(max_random_bytes) + b"\x00"
+    return bytes(header) + filename + data[10:]
+
+
+def compress(content, encoding, level):
+    started = time.perf_counter_ns()
+    if encoding == "br":
+        result = brotli.compress(content, quality=level)
+    else:
+        result = _padded(
+            gzip.compress(content, compresslevel=level, mtime=0)
+        )
+    _remember_cost(encoding, level, len(content),
+                   time.perf_counter_ns() - started)
+    return result
+
+
+def _compressor(level):
+    # wbits=31: заголовок и контрольная сумма gzip. Заголовок целиком
+    # приходит в первом непустом блоке, туда и добавляется имя файла
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    started = False
+
+    def output(data):
+        nonlocal started
+        if data and not started:
+            started = True
+            return _padded(data)
+        return data
+
+    return (
+        lambda chunk: output(
+            compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        ),
+        lambda: output(compressor.flush()),
+    )
+
+
+def compress_stream(chunks, level):
+    # Каждая часть сбрасывается сразу, чтобы клиент получал данные
+    # по мере генерации, а память не росла с размером ответа
+    process, finish = _compressor(level)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def compress_stream_async(chunks, level):
+    process, finish = _compressor(level)
+    async for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding") or response.has_header(
+            "Accept-Ranges"
+        ):
+            return response
+        content_type = response.get("Content-Type", "").lower()
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        # brotli — только для готовых ответов без CSRF-токена
+        encoding = negotiate(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""),
+            allow_brotli=not response.streaming
+            and "CSRF_COOKIE_NEEDS_UPDATE" not in request.META,
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            level = settings.COMPRESSION_LEVEL
+            if response.is_async:
+                response.streaming_content = compress_stream_async(
+                    response.streaming_content, level,
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, level,
+                )
+            del response["Content-Length"]
+        else:
+            level = choose_level(encoding, len(response.content))
+            if level is None:
+                return response
+            compressed = compress(response.content, encoding, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # Сжатое представление отличается побайтно от исходного
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'task_manager.jobs'
+
+    def ready(self):
+        # Задачи очереди регистрируются в модулях jobs.py приложений
+        autodiscover_modules("jobs")
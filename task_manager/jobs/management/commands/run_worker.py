@@ -0,0 +1,95 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from task_manager.jobs import queue
+
+# Как часто обработчик проверяет расписание периодических задач, секунд
+SCHEDULE_INTERVAL = 60
+
+
+def _run(job):
+    try:
+        return queue.execute(job)
+    finally:
+        # У каждого потока свое соединение с БД
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Запускает обработчик фоновых задач"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Число потоков-исполнителей",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Пауза между опросами пустой очереди, секунд",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Завершиться, когда очередь опустеет",
+        )
+
+    def handle(self, *args, **options):
+        worker = queue.worker_name()
+        concurrency = options["concurrency"]
+        # {future: задача}
+        running = {}
+        scheduled_at = None
+        self.stdout.write(f"Обработчик {worker}, потоков: {concurrency}")
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                close_old_connections()
+                queue.requeue_stale()
+                now = time.monotonic()
+                if scheduled_at is None or (
+                    now - scheduled_at >= SCHEDULE_INTERVAL
+                ):
+                    queue.schedule_periodic()
+                    scheduled_at = now
+
+                free = concurrency - len(running)
+                jobs = queue.claim(worker, limit=free) if free else []
+                for job in jobs:
+                    running[pool.submit(_run, job)] = job
+
+                if running:
+                    done, _ = wait(
+                        running,
+                        timeout=options["poll_interval"],
+                        return_when=FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        job = running.pop(future)
+                        try:
+                            self._report(future.result())
+                        except Exception as error:
+                            # execute сам ловит ошибки задачи; сюда доходят
+                            # сбои записи результата (например, потеряно
+                            # соединение с БД). Задача остается
+                            # захваченной, и ее вернет requeue_stale
+                            self.stderr.write(
+                                f"{job.name} #{job.pk}: сбой обработчика: "
+                                f"{error!r}"
+                            )
+                elif options["burst"]:
+                    return
+                else:
+                    time.sleep(options["poll_interval"])
+
+    def _report(self, job):
+        self.stdout.write(
+            f"{job.name} #{job.pk}: {job.get_state_display()}, "
+            f"попытка {job.attempts}, {job.duration_ms} мс"
+        )
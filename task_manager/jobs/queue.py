@@ -0,0 +1,175 @@
+"""Очередь фоновых задач в основной базе проекта.
+
+Задачи регистрируются декоратором ``@job("имя")`` в модулях jobs.py
+приложений и ставятся в очередь через ``enqueue``. Выполняет их
+``manage.py run_worker``; он же ставит в очередь периодические задачи
+из JOBS_PERIODIC (``schedule_periodic``).
+"""
+
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from task_manager.jobs.models import Job
+
+registry = {}
+
+
+def job(name):
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=0, run_at=None, max_attempts=3):
+    if name not in registry:
+        raise KeyError(f"Неизвестная фоновая задача: {name}")
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _ready():
+    return Job.objects.filter(
+        state=Job.QUEUED,
+        run_at__lte=timezone.now(),
+    ).order_by("-priority", "run_at", "id")
+
+
+def claim(worker, limit=1):
+    now = timezone.now()
+    if connection.features.has_select_for_update_skip_locked:
+        # PostgreSQL: строки, захваченные другими воркерами, пропускаются
+        with transaction.atomic():
+            ids = list(
+                _ready().select_for_update(skip_locked=True)
+                .values_list("id", flat=True)[:limit]
+            )
+            Job.objects.filter(id__in=ids).update(
+                state=Job.RUNNING,
+                locked_by=worker,
+                locked_at=now,
+            )
+    else:
+        # SQLite: нет блокировок строк, но запись сериализуется, поэтому
+        # условный UPDATE по состоянию захватывает задачу ровно один раз
+        ids = []
+        for job_id in _ready().values_list("id", flat=True)[:limit]:
+            claimed = Job.objects.filter(id=job_id, state=Job.QUEUED).update(
+                state=Job.RUNNING,
+                locked_by=worker,
+                locked_at=now,
+            )
+            if claimed:
+                ids.append(job_id)
+    return list(Job.objects.filter(id__in=ids).order_by("-priority", "id"))
+
+
+def backoff(attempts):
+    return timedelta(seconds=settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def execute(job):
+    func = registry.get(job.name)
+    started = time.perf_counter()
+    job.started_at = timezone.now()
+    job.attempts += 1
+    try:
+        if func is None:
+            raise KeyError(f"Неизвестная фоновая задача: {job.name}")
+        func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.state = Job.QUEUED
+            job.run_at = timezone.now() + backoff(job.attempts)
+        else:
+            job.state = Job.FAILED
+    else:
+        job.state = Job.DONE
+        job.last_error = ""
+    job.finished_at = timezone.now()
+    job.duration_ms = int((time.perf_counter() - started) * 1000)
+    job.locked_by = ""
+    job.locked_at = None
+    job.save(update_fields=[
+        "state",
+        "attempts",
+        "run_at",
+        "last_error",
+        "started_at",
+        "finished_at",
+        "duration_ms",
+        "locked_by",
+        "locked_at",
+    ])
+    return job
+
+
+def requeue_stale(timeout=None):
+    if timeout is None:
+        timeout = settings.JOBS_LOCK_TIMEOUT
+    now = timezone.now()
+    stale = Job.objects.filter(
+        state=Job.RUNNING,
+        locked_at__lt=now - timedelta(seconds=timeout),
+    )
+    # Зависший запуск считается потраченной попыткой: задача, которая
+    # роняет воркер, не перезапускается бесконечно
+    lost = "Обработчик не завершил задачу за JOBS_LOCK_TIMEOUT"
+    failed = stale.filter(attempts__gte=F("max_attempts") - 1).update(
+        state=Job.FAILED,
+        attempts=F("attempts") + 1,
+        last_error=lost,
+        finished_at=now,
+        locked_by="",
+        locked_at=None,
+    )
+    requeued = stale.update(
+        state=Job.QUEUED,
+        attempts=F("attempts") + 1,
+        last_error=lost,
+        locked_by="",
+        locked_at=None,
+    )
+    return requeued + failed
+
+
+def schedule_periodic(periodic=None):
+    """Ставит в очередь периодические задачи без ожидающего запуска.
+
+    Следующий запуск назначается через интервал после окончания
+    предыдущего, поэтому долгая задача не накапливает очередь.
+    """
+    if periodic is None:
+        periodic = settings.JOBS_PERIODIC
+    now = timezone.now()
+    scheduled = []
+    for name, interval in periodic.items():
+        jobs = Job.objects.filter(name=name)
+        if jobs.filter(state__in=[Job.QUEUED, Job.RUNNING]).exists():
+            continue
+        last = jobs.exclude(finished_at=None).order_by(
+            "-finished_at",
+        ).values_list("finished_at", flat=True).first()
+        run_at = now
+        if last is not None:
+            run_at = max(now, last + timedelta(seconds=interval))
+        scheduled.append(enqueue(name, run_at=run_at))
+    return scheduled
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from task_manager.jobs.views import JobQueueView
+
+urlpatterns = [
+    path("", JobQueueView.as_view(), name="jobs_queue"),
+]
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.db.models import Avg, Count, Max
+from django.utils import timezone
+from django.views.generic import TemplateView
+
+from task_manager.jobs.models import Job
+
+
+class StaffRequiredMixin(UserPassesTestMixin):
+    def test_func(self):
+        return self.request.user.is_staff
+
+
+class JobQueueView(LoginRequiredMixin, StaffRequiredMixin, TemplateView):
+    template_name = "jobs/queue.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        depth = dict(
+            Job.objects.order_by()
+            .values_list("state")
+            .annotate(count=Count("id"))
+        )
+        since = timezone.now() - timedelta(days=1)
+
+        context.update({
+            "states": [
+                (label, depth.get(state, 0))
+                for state, label in Job.STATE_CHOICES
+            ],
+            "queued_by_priority": Job.objects.filter(state=Job.QUEUED)
+            .order_by("-priority")
+            .values("priority")
+            .annotate(count=Count("id")),
+            "timings": Job.objects.filter(
+                state=Job.DONE,
+                finished_at__gte=since,
+            ).order_by("name").values("name").annotate(
+                count=Count("id"),
+                avg_ms=Avg("duration_ms"),
+                max_ms=Max("duration_ms"),
+            ),
+            "failed": Job.objects.filter(state=Job.FAILED)
+            .order_by("-finished_at")[:10],
+        })
+        return context
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from task_manager.labels.models import Label
+from task_manager.views.autocomplete import invalidate
+
+
+@receiver([post_save, post_delete], sender=Label)
+def label_changed(sender, **kwargs):
+    invalidate("labels")
@@ -5,11 +5,17 @@ from task_manager.labels.views import (
     LabelDeleteView,
     LabelUpdateView,
     LabelsListView,
+    LabelAutocompleteView,
 )
 
 urlpatterns = [
     path("", LabelsListView.as_view(), name="labels_list"),
     path("create/", LabelCreateView.as_view(), name="label_create"),
+    path(
+        "autocomplete/",
+        LabelAutocompleteView.as_view(),
+        name="labels_autocomplete",
+    ),
     path(
         "<int:pk>/update/",
         LabelUpdateView.as_view(),
@@ -7,6 +7,7 @@ from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 
 from task_manager.tasks.models import Task
 from task_manager.labels.models import Label
+from task_manager.views.autocomplete import AutocompleteView
 
 
 class LabelForm(ModelForm):
@@ -21,6 +22,16 @@ class LabelsListView(LoginRequiredMixin, ListView):
     context_object_name = "labels"
 
 
+class LabelAutocompleteView(AutocompleteView):
+    namespace = "labels"
+
+    def get_results(self, query, limit):
+        labels = Label.objects.order_by("name")
+        if query:
+            labels = labels.filter(name__istartswith=query)
+        return list(labels.values_list("id", "name")[:limit])
+
+
 class LabelCreateView(LoginRequiredMixin, CreateView):
     model = Label
     form_class = LabelForm
@@ -51,7 +62,10 @@ class LabelDeleteView(LoginRequiredMixin, DeleteView):
     def post(self, request, *args, **kwargs):
         label = self.get_object()
 
-        if Task.objects.filter(labels=label).exists():
+        if (
+            Task.objects.filter(labels=label).exists()
+            or label.archived_tasks.exists()
+        ):
             messages.error(
                 self.request,
                 "Невозможно удалить метку, потому что она используется"
@@ -0,0 +1,163 @@
+"""Структурированный журнал запросов (JSON Lines).
+
+Запрос только кладет словарь в ограниченную очередь; сериализация,
+запись и ротация файла по размеру выполняются фоновым потоком, поэтому
+дисковый ввод-вывод не попадает во время ответа. Если писатель не
+успевает и очередь заполнена, запись отбрасывается, а счетчик
+``access_log_dropped_total`` увеличивается: запрос никогда не ждет
+журнал.
+
+Каждый процесс (воркер gunicorn) запускает своего писателя при первой
+записи и пишет в свой файл ``access_<pid>.log`` в ACCESS_LOG_DIR: у
+файла один писатель, поэтому ротация не мешает другим процессам.
+Успешные ответы попадают в журнал с вероятностью ACCESS_LOG_SAMPLE_RATE,
+ошибки и медленные запросы — всегда.
+"""
+
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+
+from django.conf import settings
+
+from task_manager.metrics import store
+
+_STOP = object()
+
+
+class AccessLogWriter:
+    def __init__(self, path, max_bytes, backup_count, queue_size):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue = queue.Queue(queue_size)
+        self._file = None
+        self.thread = threading.Thread(
+            target=self._run,
+            name="access-log",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def submit(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            store.inc("access_log_dropped_total")
+            return False
+        return True
+
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+
+    def _run(self):
+        while True:
+            # Все, что накопилось в очереди, пишется одной пачкой
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                records = [record for record in batch if record is not _STOP]
+                if records:
+                    self._write(records)
+            except OSError:
+                # Ошибка диска не должна останавливать писателя
+                store.inc("access_log_dropped_total", len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if _STOP in batch:
+                if self._file is not None:
+                    self._file.close()
+                return
+
+    def _write(self, records):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        for record in records:
+            self._file.write(
+                json.dumps(record, ensure_ascii=False, default=str) + "\n"
+            )
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+        self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        if self.backup_count:
+            for number in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{number}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{number + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+
+_local = {"pid": None, "writer": None}
+_local_lock = threading.Lock()
+
+
+def log_path(pid):
+    return os.path.join(settings.ACCESS_LOG_DIR, f"access_{pid}.log")
+
+
+def writer():
+    if not settings.ACCESS_LOG_DIR:
+        return None
+    pid = os.getpid()
+    # Поток писателя не переживает fork: у воркера свой писатель
+    if _local["pid"] != pid:
+        with _local_lock:
+            if _local["pid"] != pid:
+                _local["writer"] = AccessLogWriter(
+                    log_path(pid),
+                    settings.ACCESS_LOG_MAX_BYTES,
+                    settings.ACCESS_LOG_BACKUP_COUNT,
+                    settings.ACCESS_LOG_QUEUE_SIZE,
+                )
+                _local["pid"] = pid
+    return _local["writer"]
+
+
+def sample_rate(status, duration_ms):
+    # Доля записываемых запросов; 1 — записывается каждый
+    if status >= 400 or duration_ms >= settings.ACCESS_LOG_SLOW_MS:
+        return 1
+    if 200 <= status < 300:
+        return settings.ACCESS_LOG_SAMPLE_RATE
+    return 1
+
+
+def sampled(rate):
+    return rate >= 1 or random.random() < rate
+
+
+def log(record):
+    log_writer = writer()
+    if log_writer is not None:
+        log_writer.submit(record)
+
+
+def reset():
+    if _local["writer"] is not None and _local["pid"] == os.getpid():
+        _local["writer"].close()
+    _local["pid"] = _local["writer"] = None
+
+
+# Остаток очереди дописывается при штатной остановке воркера
+atexit.register(reset)
@@ -0,0 +1,83 @@
+import time
+
+from django.db import connection
+from django.utils import timezone
+
+from task_manager.metrics import access_log, store
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+
+
+def response_size(response):
+    if response is None:
+        return None
+    if response.streaming:
+        # Размер потокового ответа известен, только если задан заголовок
+        length = response.get("Content-Length")
+        return int(length) if length else None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        store.inc("http_requests_in_flight")
+        counter = QueryCounter()
+        started = time.perf_counter()
+        status = 500
+        response = None
+        try:
+            with connection.execute_wrapper(counter):
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            match = request.resolver_match
+            view = match.view_name if match else "<unresolved>"
+            store.inc("http_requests_in_flight", -1)
+            store.inc(
+                "http_requests_total",
+                view=view,
+                method=request.method,
+                status=str(status),
+            )
+            store.observe("http_request_duration_seconds", elapsed, view=view)
+            if counter.count:
+                store.inc("db_queries_total", counter.count, view=view)
+            rate = access_log.sample_rate(status, elapsed * 1000)
+            if access_log.sampled(rate):
+                access_log.log({
+                    "time": timezone.now().isoformat(),
+                    "method": request.method,
+                    "path": request.path,
+                    "view": view,
+                    "user": self.user_id(request),
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "db_ms": round(counter.duration * 1000, 2),
+                    "db_queries": counter.count,
+                    "size": response_size(response),
+                    "sample_rate": rate,
+                })
+
+    @staticmethod
+    def user_id(request):
+        # Пользователь не загружается ради журнала: берется, только если
+        # его уже получило представление (кэш AuthenticationMiddleware)
+        user = getattr(request, "_cached_user", None)
+        return user.pk if user is not None else None
@@ -0,0 +1,207 @@
+"""Хранилище метрик в файлах, отображенных в память.
+
+Каждый процесс (воркер gunicorn) пишет в собственный файл
+``metrics_<pid>.db`` в каталоге METRICS_DIR, поэтому запись обходится
+без межпроцессных блокировок. ``collect`` читает все файлы каталога и
+складывает значения.
+
+Формат файла: заголовок (магическая строка и число занятых байт), затем
+записи: длина ключа (uint32), ключ в UTF-8 с выравниванием до 8 байт
+и значение (double). Ключ — JSON ``[имя, {метки}]``.
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+MAGIC = b"TMM1"
+
+HEADER = struct.Struct("<4sI")
+
+INITIAL_SIZE = 64 * 1024
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# имя: (тип, описание)
+METRICS = {
+    "http_requests_total": (
+        "counter", "Число запросов по представлению, методу и статусу",
+    ),
+    "http_request_duration_seconds": (
+        "histogram", "Время обработки запроса по представлению",
+    ),
+    "db_queries_total": (
+        "counter", "Число SQL-запросов по представлению",
+    ),
+    "http_requests_in_flight": (
+        "gauge", "Запросы, обрабатываемые прямо сейчас",
+    ),
+    "access_log_dropped_total": (
+        "counter", "Записи журнала запросов, отброшенные при полной очереди",
+    ),
+}
+
+GAUGES = {name for name, (kind, _) in METRICS.items() if kind == "gauge"}
+
+
+def _padded(length):
+    return length + (-length) % 8
+
+
+class MmapedDict:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.positions = {}
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size < INITIAL_SIZE:
+            self._file.truncate(INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, used = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            used = HEADER.size
+            HEADER.pack_into(self._map, 0, MAGIC, used)
+        self.used = used
+        for key, _, offset in read_entries(self._map, used):
+            self.positions[key] = offset
+
+    def _init_key(self, key):
+        encoded = key.encode()
+        size = 4 + _padded(len(encoded)) + 8
+        while self.used + size > len(self._map):
+            new_size = len(self._map) * 2
+            self._map.close()
+            self._file.truncate(new_size)
+            self._map = mmap.mmap(self._file.fileno(), new_size)
+        struct.pack_into(
+            f"<I{_padded(len(encoded))}sd",
+            self._map, self.used, len(encoded), encoded, 0.0,
+        )
+        self.positions[key] = self.used + size - 8
+        self.used += size
+        # Заголовок обновляется последним: читатели видят только
+        # полностью записанные записи
+        HEADER.pack_into(self._map, 0, MAGIC, self.used)
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            if key not in self.positions:
+                self._init_key(key)
+            offset = self.positions[key]
+            value, = struct.unpack_from("<d", self._map, offset)
+            struct.pack_into("<d", self._map, offset, value + amount)
+
+    def set(self, key, value):
+        with self.lock:
+            if key not in self.positions:
+                self._init_key(key)
+            struct.pack_into("<d", self._map, self.positions[key], value)
+
+    def items(self):
+        for key, value, _ in read_entries(self._map, self.used):
+            yield key, value
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def read_entries(buffer, used):
+    offset = HEADER.size
+    while offset < used:
+        length, = struct.unpack_from("<I", buffer, offset)
+        offset += 4
+        key = bytes(buffer[offset:offset + length]).decode()
+        offset += _padded(length)
+        value, = struct.unpack_from("<d", buffer, offset)
+        yield key, value, offset
+        offset += 8
+
+
+def read_file(path):
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        return []
+    magic, used = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        return []
+    return [(key, value) for key, value, _ in read_entries(data, used)]
+
+
+_local = {"pid": None, "store": None}
+_local_lock = threading.Lock()
+
+
+def metrics_path(pid):
+    return os.path.join(settings.METRICS_DIR, f"metrics_{pid}.db")
+
+
+def _store():
+    pid = os.getpid()
+    # После fork файл родителя не наследуется: у воркера свой файл
+    if _local["pid"] != pid:
+        with _local_lock:
+            if _local["pid"] != pid:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                _local["store"] = MmapedDict(metrics_path(pid))
+                _local["pid"] = pid
+    return _local["store"]
+
+
+def key(name, **labels):
+    return json.dumps([name, labels], sort_keys=True, ensure_ascii=False)
+
+
+def inc(name, amount=1.0, **labels):
+    _store().inc(key(name, **labels), amount)
+
+
+def observe(name, value, **labels):
+    store = _store()
+    for bound in LATENCY_BUCKETS:
+        if value <= bound:
+            store.inc(key(f"{name}_bucket", le=str(bound), **labels))
+    store.inc(key(f"{name}_bucket", le="+Inf", **labels))
+    store.inc(key(f"{name}_sum", **labels), value)
+    store.inc(key(f"{name}_count", **labels))
+
+
+def mark_process_dead(pid):
+    # Счетчики завершенного воркера остаются в сумме,
+    # а его «текущие» значения обнуляются
+    path = metrics_path(pid)
+    if not os.path.exists(path):
+        return
+    store = MmapedDict(path)
+    try:
+        for item_key, _ in list(store.items()):
+            if json.loads(item_key)[0] in GAUGES:
+                store.set(item_key, 0.0)
+    finally:
+        store.close()
+
+
+def reset():
+    if _local["store"] is not None:
+        _local["store"].close()
+    _local["pid"] = _local["store"] = None
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, "metrics_*.db")):
+        os.remove(path)
+
+
+def collect():
+    totals = defaultdict(float)
+    pattern = os.path.join(settings.METRICS_DIR, "metrics_*.db")
+    for path in glob.glob(pattern):
+        for item_key, value in read_file(path):
+            totals[item_key] += value
+    return totals
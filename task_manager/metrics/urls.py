@@ -0,0 +1,7 @@
+from django.urls import path
+
+from task_manager.metrics.views import metrics
+
+urlpatterns = [
+    path("", metrics, name="metrics"),
+]
@@ -0,0 +1,71 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from task_manager.metrics import store
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in sorted(labels.items())
+    )
+    return "{" + pairs + "}"
+
+
+def _sort_key(item):
+    sample, labels, _ = item
+    # Корзины гистограммы идут по возрастанию границы
+    le = labels.get("le")
+    bound = float(le) if le is not None else 0.0
+    rest = sorted((k, v) for k, v in labels.items() if k != "le")
+    return sample, rest, bound
+
+
+def _number(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _family(sample):
+    for suffix in ("_bucket", "_sum", "_count"):
+        if sample.endswith(suffix) and sample[:-len(suffix)] in store.METRICS:
+            return sample[:-len(suffix)]
+    return sample
+
+
+def render(totals):
+    families = defaultdict(list)
+    for key, value in totals.items():
+        sample, labels = json.loads(key)
+        families[_family(sample)].append((sample, labels, value))
+
+    lines = []
+    for name in sorted(families):
+        kind, help_text = store.METRICS.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample, labels, value in sorted(families[name], key=_sort_key):
+            lines.append(f"{sample}{_labels(labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+@require_GET
+def metrics(request):
+    # Метрики отдаются только локально (сборщику на той же машине)
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(render(store.collect()), content_type=CONTENT_TYPE)
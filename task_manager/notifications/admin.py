@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from task_manager.notifications.models import OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        "kind",
+        "task_id",
+        "recipient",
+        "attempts",
+        "created_at",
+        "sent_at",
+    )
+    list_filter = ("kind",)
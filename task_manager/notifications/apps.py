@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class NotificationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'task_manager.notifications'
+
+    def ready(self):
+        from task_manager.notifications import signals  # noqa: F401
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from task_manager.notifications.outbox import OUTBOX_BATCH_SIZE, deliver
+
+
+class Command(BaseCommand):
+    help = "Отправляет уведомления из исходящей очереди"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Пауза между опросами пустой очереди, секунд",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Завершиться, когда очередь опустеет",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            try:
+                sent = deliver(batch_size=options["batch_size"])
+            except Exception as error:
+                # SMTP или база недоступны: сообщения остаются в очереди,
+                # доставщик пробует снова после паузы
+                self.stderr.write(f"Доставка не удалась: {error!r}")
+                sent = 0
+            if sent:
+                self.stdout.write(f"Отправлено писем: {sent}")
+            if options["burst"]:
+                return
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import models
+
+
+class OutboxMessage(models.Model):
+    ASSIGNED = "assigned"
+    KIND_CHOICES = [
+        (ASSIGNED, "Назначена задача"),
+    ]
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    # Без ограничения на уровне БД: задача может быть удалена или
+    # заархивирована раньше, чем уйдет письмо; нужное для письма лежит
+    # в payload
+    task = models.ForeignKey(
+        'tasks.Task',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Когда доставщик забрал сообщение в отправку
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Очередь на отправку: отправленные сообщения в индекс
+            # не попадают, и он остается маленьким
+            models.Index(
+                fields=["id"],
+                condition=models.Q(sent_at__isnull=True),
+                name="notifications_outbox_pending",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} #{self.task_id} → {self.recipient_id}"
@@ -0,0 +1,161 @@
+"""Исходящие уведомления (transactional outbox).
+
+Сообщение пишется в OutboxMessage в той же транзакции, что и изменение
+задачи: откат не оставит письма о несостоявшемся назначении, а запрос
+не ждет SMTP. ``deliver`` (``manage.py deliver_notifications``) разбирает
+очередь пачками: несколько сообщений об одной задаче для одного
+получателя сливаются в одно письмо, а все письма идут через одно
+открытое SMTP-соединение.
+
+Пачка сначала захватывается короткой транзакцией (``claimed_at``), а
+письма уходят уже вне ее: медленный SMTP не держит блокировки строк.
+Захват, не снятый за OUTBOX_CLAIM_TIMEOUT (доставщик упал), истекает.
+SMTP-соединение открывается, только если в очереди есть сообщения.
+
+Доставка «хотя бы один раз»: отметка об отправке ставится после
+успешной передачи письма серверу.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from task_manager.notifications.models import OutboxMessage
+
+OUTBOX_BATCH_SIZE = 200
+
+MAX_ATTEMPTS = 5
+
+
+def task_assigned(task):
+    return OutboxMessage.objects.create(
+        recipient_id=task.executor_id,
+        task_id=task.pk,
+        kind=OutboxMessage.ASSIGNED,
+        payload={"name": task.name},
+    )
+
+
+def pending():
+    expired = timezone.now() - timedelta(
+        seconds=settings.OUTBOX_CLAIM_TIMEOUT,
+    )
+    return OutboxMessage.objects.filter(
+        Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired),
+        sent_at__isnull=True,
+        attempts__lt=MAX_ATTEMPTS,
+    ).order_by("id")
+
+
+def claim(batch_size):
+    with transaction.atomic():
+        # Параллельный доставщик пропускает захваченные строки
+        # (на SQLite блокировок нет, запись и так последовательна)
+        rows = list(pending().select_for_update(skip_locked=True)[:batch_size])
+        if rows:
+            OutboxMessage.objects.filter(
+                id__in=[row.pk for row in rows],
+            ).update(claimed_at=timezone.now())
+    return rows
+
+
+def release(ids):
+    OutboxMessage.objects.filter(id__in=ids).update(claimed_at=None)
+
+
+def coalesce(rows):
+    # {(задача, получатель, вид): [сообщения по порядку]}
+    groups = {}
+    for row in rows:
+        key = (row.task_id, row.recipient_id, row.kind)
+        groups.setdefault(key, []).append(row)
+    return groups
+
+
+def build_message(group, email):
+    last = group[-1]
+    name = last.payload.get("name", "")
+    lines = [
+        f"Вы назначены исполнителем задачи «{name}».",
+        settings.SITE_URL + reverse("task_show", args=[last.task_id]),
+    ]
+    if len(group) > 1:
+        lines.append(f"Назначений с прошлого письма: {len(group)}")
+    return EmailMessage(
+        f"Вам назначена задача #{last.task_id}: {name}",
+        "\n".join(lines),
+        to=[email],
+    )
+
+
+def deliver(batch_size=OUTBOX_BATCH_SIZE, connection=None):
+    """Отправляет все накопившиеся сообщения, возвращает число писем."""
+    connection = connection or get_connection()
+    sent = 0
+    opened = False
+    try:
+        while True:
+            rows = claim(batch_size)
+            if not rows:
+                return sent
+            if not opened:
+                # Соединение открывается один раз на весь разбор очереди
+                try:
+                    connection.open()
+                except Exception:
+                    release([row.pk for row in rows])
+                    raise
+                opened = True
+            delivered, failed = _deliver_batch(rows, connection)
+            sent += delivered
+            if failed:
+                return sent
+    finally:
+        if opened:
+            connection.close()
+
+
+def _deliver_batch(rows, connection):
+    groups = coalesce(rows)
+    emails = dict(
+        get_user_model().objects.filter(
+            pk__in={row.recipient_id for row in rows},
+        ).exclude(email="").values_list("pk", "email")
+    )
+
+    done, delivered, failed = [], 0, None
+    for (_, recipient_id, _), group in groups.items():
+        ids = [row.pk for row in group]
+        if recipient_id not in emails:
+            # Писать некуда: сообщение снимается с очереди
+            done.extend(ids)
+            continue
+        message = build_message(group, emails[recipient_id])
+        try:
+            connection.send_messages([message])
+        except Exception as error:
+            failed = (ids, repr(error))
+            break
+        done.extend(ids)
+        delivered += 1
+
+    OutboxMessage.objects.filter(id__in=done).update(
+        sent_at=timezone.now(),
+    )
+    if failed is not None:
+        ids, error = failed
+        OutboxMessage.objects.filter(id__in=ids).update(
+            attempts=F("attempts") + 1,
+            last_error=error,
+            claimed_at=None,
+        )
+        # Остаток пачки уйдет при следующем разборе очереди
+        handled = {*done, *ids}
+        release([row.pk for row in rows if row.pk not in handled])
+    return delivered, failed is not None
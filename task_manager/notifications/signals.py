@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from task_manager.notifications import outbox
+from task_manager.tasks.models import Task
+
+
+@receiver(post_save, sender=Task)
+def task_assigned(sender, instance, created, raw=False, **kwargs):
+    if raw or instance.executor_id is None:
+        return
+    if created or "executor_id" in instance.tracked_changes():
+        outbox.task_assigned(instance)
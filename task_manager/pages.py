@@ -1,7 +1,10 @@
 from django.shortcuts import render
 from django.views.decorators.http import require_GET
 
+from task_manager.views.page_cache import anonymous_page_cache
+
 
 @require_GET
+@anonymous_page_cache("pages")
 def index(request):
     return render(request, "index.html")
\ No newline at end of file
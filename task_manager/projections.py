@@ -0,0 +1,36 @@
+"""Наборы колонок для списков: грузим только то, что выводят шаблоны.
+
+Описание задачи (неограниченный TextField) и служебные поля auth_user
+(хеш пароля, флаги и т.п.) в списках не нужны.
+"""
+
+TASK_LIST_FIELDS = (
+    "id",
+    "name",
+    "status_id",
+    "author_id",
+    "executor_id",
+    "due_date",
+    "comment_count",
+    "created_at",
+)
+
+STATUS_NAME_FIELDS = ("id", "name")
+
+# __str__ пользователя выводит только имя пользователя
+USER_NAME_FIELDS = ("id", "username")
+
+USER_LIST_FIELDS = ("id", "username", "first_name", "last_name")
+
+
+def related(prefix, fields):
+    return tuple(f"{prefix}__{field}" for field in fields)
+
+
+def task_list_queryset(model):
+    return model.objects.select_related("status", "author", "executor").only(
+        *TASK_LIST_FIELDS,
+        *related("status", STATUS_NAME_FIELDS),
+        *related("author", USER_NAME_FIELDS),
+        *related("executor", USER_NAME_FIELDS),
+    )
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from task_manager.projects.models import Project
+
+
+@admin.register(Project)
+class ProjectAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "created_at")
+    prepopulated_fields = {"slug": ("name",)}
+    filter_horizontal = ("members",)
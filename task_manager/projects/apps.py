@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ProjectsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'task_manager.projects'
+
+    def ready(self):
+        from task_manager.projects import signals  # noqa: F401
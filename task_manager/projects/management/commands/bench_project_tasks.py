@@ -0,0 +1,90 @@
+import secrets
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from task_manager.projections import task_list_queryset
+from task_manager.projects.models import Project
+from task_manager.statuses.models import Status
+from task_manager.tasks.filters import TaskFilter
+from task_manager.tasks.models import Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет время списка задач одного проекта по мере роста "
+        "других проектов. Данные создаются во временной транзакции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=200)
+        parser.add_argument(
+            "--others",
+            default="0,20000,100000",
+            help="Число задач в остальных проектах, через запятую",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["others"].split(",")]
+        self.stdout.write(f"{'других задач':>14}{'медиана, мс':>14}")
+        try:
+            with transaction.atomic():
+                # Уникальные имена: записи с такими же именами могут уже
+                # быть в базе
+                suffix = secrets.token_hex(4)
+                name = f"bench_project_tasks_{suffix}"
+                user = User.objects.create(username=name)
+                status = Status.objects.create(name=name)
+                target = Project.objects.create(
+                    name=f"bench {suffix}", slug=f"bench-{suffix}",
+                )
+                other = Project.objects.create(
+                    name=f"other {suffix}", slug=f"other-{suffix}",
+                )
+                self.populate(target, user, status, options["tasks"])
+
+                created = 0
+                for size in sizes:
+                    self.populate(other, user, status, size - created)
+                    created = size
+                    elapsed = self.measure(target, status, options["repeat"])
+                    self.stdout.write(f"{size:>14}{elapsed:>14.2f}")
+                raise Rollback
+        except Rollback:
+            pass
+
+    def populate(self, project, user, status, count):
+        Task.objects.bulk_create(
+            (
+                Task(
+                    name=f"Задача {i}",
+                    status=status,
+                    author=user,
+                    project=project,
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
+
+    def measure(self, project, status, repeat):
+        # Тот же запрос, что строит TaskListView с фильтром по статусу
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(TaskFilter(
+                {"status": status.pk},
+                queryset=task_list_queryset(Task)
+                .filter(project=project)
+                .order_by("id"),
+            ).qs)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,46 @@
+"""Проекты пользователя с кэшированием.
+
+Список проектов, в которых состоит пользователь, нужен почти каждому
+запросу к задачам, поэтому хранится в кэше и сбрасывается сигналами
+при изменении состава участников.
+"""
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from task_manager.projects.models import Project
+
+MEMBERSHIP_TIMEOUT = 60 * 60
+
+
+def _membership_key(user_id):
+    return f"projects:member:{user_id}"
+
+
+def member_project_ids(user):
+    if not user.is_authenticated:
+        return frozenset()
+    key = _membership_key(user.pk)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(
+            Project.members.through.objects.filter(user_id=user.pk)
+            .values_list("project_id", flat=True)
+        )
+        cache.set(key, ids, MEMBERSHIP_TIMEOUT)
+    return ids
+
+
+def forget_members(user_ids):
+    cache.delete_many([_membership_key(user_id) for user_id in user_ids])
+
+
+def is_member(user, project_id):
+    return project_id in member_project_ids(user)
+
+
+def visible_to(queryset, user):
+    # Задачи без проекта общие, остальные видны только участникам
+    return queryset.filter(
+        Q(project__isnull=True) | Q(project_id__in=member_project_ids(user))
+    )
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import models
+
+
+class Project(models.Model):
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Имя'
+    )
+    slug = models.SlugField(
+        max_length=64,
+        unique=True,
+        verbose_name='Код'
+    )
+    members = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        related_name='projects',
+        verbose_name='Участники',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+
+    def __str__(self) -> str:
+        return self.name
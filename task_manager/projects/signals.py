@@ -0,0 +1,27 @@
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
+
+from task_manager.projects.membership import forget_members
+from task_manager.projects.models import Project
+
+Membership = Project.members.through
+
+
+@receiver(m2m_changed, sender=Membership)
+def members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        forget_members([instance.pk])
+    elif action == "pre_clear":
+        forget_members(
+            Membership.objects.filter(project_id=instance.pk)
+            .values_list("user_id", flat=True)
+        )
+    else:
+        forget_members(pk_set or ())
+
+
+@receiver(pre_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    forget_members(instance.members.values_list("id", flat=True))
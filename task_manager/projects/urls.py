@@ -0,0 +1,40 @@
+from django.urls import path
+
+from task_manager.projects.views import ProjectListView
+from task_manager.tasks.views import (
+    SavedFilterCreateView,
+    TaskBoardColumnView,
+    TaskBoardView,
+    TaskCreateView,
+    TaskListView,
+)
+
+# Задачи проекта: те же представления, ограниченные проектом из URL
+urlpatterns = [
+    path("", ProjectListView.as_view(), name="projects_list"),
+    path(
+        "<slug:project>/tasks/",
+        TaskListView.as_view(),
+        name="project_tasks_list",
+    ),
+    path(
+        "<slug:project>/tasks/filters/",
+        SavedFilterCreateView.as_view(),
+        name="project_saved_filter_create",
+    ),
+    path(
+        "<slug:project>/tasks/board/",
+        TaskBoardView.as_view(),
+        name="project_tasks_board",
+    ),
+    path(
+        "<slug:project>/tasks/board/<int:status_id>/",
+        TaskBoardColumnView.as_view(),
+        name="project_tasks_board_column",
+    ),
+    path(
+        "<slug:project>/tasks/create/",
+        TaskCreateView.as_view(),
+        name="project_task_create",
+    ),
+]
@@ -0,0 +1,13 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Count
+from django.views.generic import ListView
+
+
+class ProjectListView(LoginRequiredMixin, ListView):
+    template_name = "projects/list.html"
+    context_object_name = "projects"
+
+    def get_queryset(self):
+        return self.request.user.projects.annotate(
+            task_count=Count("tasks"),
+        ).order_by("name")
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -58,14 +59,23 @@ INSTALLED_APPS = [
     'task_manager.labels',
     'task_manager.tasks',
     'task_manager.statuses',
+    'task_manager.stats',
+    'task_manager.jobs',
+    'task_manager.metrics',
+    'task_manager.projects',
+    'task_manager.notifications',
+    'task_manager.attachments',
 ]
 
 MIDDLEWARE = [
+    'task_manager.metrics.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'task_manager.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'task_manager.tasks.middleware.TaskHistoryMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -112,8 +122,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / "templates"],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Кэширующий загрузчик включен явно и одинаково при любом DEBUG,
+            # чтобы прогрев (task_manager.warmup) работал во всех окружениях
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -142,6 +159,75 @@ DATABASES = {
 
 AUTH_PASSWORD_VALIDATORS = []
 
+# Политика хеширования: первый хешер в списке используется для новых
+# паролей, остальные только проверяют старые хеши (с перехешированием
+# при входе)
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2").strip().lower()
+
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.getenv("PASSWORD_PBKDF2_ITERATIONS", "1000000")
+)
+
+_PASSWORD_HASHERS = {
+    "pbkdf2": "task_manager.users.hashers.PBKDF2PasswordHasher",
+    "scrypt": "task_manager.users.hashers.ScryptPasswordHasher",
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER
+] + [
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
+# Сколько хешей одновременно может считать один процесс и сколько секунд
+# ждать свободного слота
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "2"))
+
+PASSWORD_HASH_WAIT = float(os.getenv("PASSWORD_HASH_WAIT", "2"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Кэш должен быть общим для всех воркеров gunicorn: в нем версии кэшей
+# страниц, лимиты входа и участники проектов. С LocMemCache у каждого
+# воркера своя копия, и, например, исключенный из проекта пользователь
+# сохранит доступ через другой воркер, поэтому gunicorn.conf.py не
+# запускает несколько воркеров с ним. По умолчанию кэш файловый; с
+# REDIS_URL — Redis (нужен пакет redis), где счетчики атомарны
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+if REDIS_URL:
+    DEFAULT_CACHE_BACKEND = "django.core.cache.backends.redis.RedisCache"
+    DEFAULT_CACHE_LOCATION = REDIS_URL
+else:
+    DEFAULT_CACHE_BACKEND = (
+        "django.core.cache.backends.filebased.FileBasedCache"
+    )
+    DEFAULT_CACHE_LOCATION = os.path.join(
+        tempfile.gettempdir(), "task_manager_cache",
+    )
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", DEFAULT_CACHE_BACKEND),
+        "LOCATION": os.getenv("CACHE_LOCATION", DEFAULT_CACHE_LOCATION),
+    }
+}
+
+# Тесты работают со своим кэшем в памяти и своим каталогом метрик
+TEST_RUNNER = "task_manager.test_runner.TestRunner"
+
+# Лимиты попыток входа: (емкость, пополнение в минуту)
+LOGIN_THROTTLE_IP = (20, 20)
+
+LOGIN_THROTTLE_USERNAME = (5, 5)
+
+LOGIN_THROTTLE_TRUST_FORWARDED = os.getenv(
+    "LOGIN_THROTTLE_TRUST_FORWARDED", "False"
+).strip().lower() in ("1", "true", "yes", "y", "on")
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -166,6 +252,108 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+TASK_ARCHIVE_STATUSES = [
+    name.strip()
+    for name in os.getenv("TASK_ARCHIVE_STATUSES", "").split(",")
+    if name.strip()
+]
+
+TASK_ARCHIVE_AFTER_DAYS = int(os.getenv("TASK_ARCHIVE_AFTER_DAYS", "90"))
+
+TASK_REMINDER_LEAD_DAYS = int(os.getenv("TASK_REMINDER_LEAD_DAYS", "1"))
+
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND",
+    "django.core.mail.backends.smtp.EmailBackend",
+)
+
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", "25"))
+
+EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
+
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
+
+EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "False").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "y",
+    "on",
+)
+
+DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "webmaster@localhost")
+
+# Через сколько секунд захват сообщения упавшим доставщиком истекает
+OUTBOX_CLAIM_TIMEOUT = int(os.getenv("OUTBOX_CLAIM_TIMEOUT", "600"))
+
+# Адрес сайта для ссылок в письмах
+SITE_URL = os.getenv("SITE_URL", "http://localhost:8000").rstrip("/")
+
+JOBS_RETRY_BACKOFF = int(os.getenv("JOBS_RETRY_BACKOFF", "10"))
+
+JOBS_LOCK_TIMEOUT = int(os.getenv("JOBS_LOCK_TIMEOUT", "3600"))
+
+# Периодические задачи, которые ставит run_worker: {имя: интервал, секунд}
+JOBS_PERIODIC = {
+    "tasks.archive": int(os.getenv("TASK_ARCHIVE_INTERVAL", str(24 * 60 * 60))),
+}
+
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "600"))
+
+# Вложения задач (task_manager.attachments): каталог хранилища, предельный
+# размер файла и лимит на пользователя в байтах (0 — без лимита)
+ATTACHMENTS_ROOT = os.getenv("ATTACHMENTS_ROOT", str(BASE_DIR / "attachments"))
+
+ATTACHMENTS_MAX_SIZE = int(os.getenv("ATTACHMENTS_MAX_SIZE", str(100 * 2 ** 20)))
+
+ATTACHMENTS_USER_QUOTA = int(os.getenv("ATTACHMENTS_USER_QUOTA", "0"))
+
+# Сжатие ответов (task_manager.compression)
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Наибольшая длина случайного имени файла в заголовке gzip (защита от
+# BREACH); 0 — без него
+COMPRESSION_MAX_RANDOM_BYTES = int(
+    os.getenv("COMPRESSION_MAX_RANDOM_BYTES", "100")
+)
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+COMPRESSION_CPU_BUDGET_MS = float(os.getenv("COMPRESSION_CPU_BUDGET_MS", "20"))
+
+# Метрики воркеров (task_manager.metrics): общий каталог файлов и адреса,
+# с которых доступен /metrics
+METRICS_DIR = os.getenv(
+    "METRICS_DIR",
+    os.path.join(tempfile.gettempdir(), "task_manager_metrics"),
+)
+
+METRICS_ALLOWED_IPS = [
+    ip.strip()
+    for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",")
+    if ip.strip()
+]
+
+# Журнал запросов в JSON Lines (task_manager.metrics.access_log): каждый
+# процесс пишет в каталоге свой файл access_<pid>.log. По умолчанию
+# каталог не задан и журнал отключен. Успешные ответы пишутся с долей
+# SAMPLE_RATE, ошибки и запросы дольше SLOW_MS — всегда
+ACCESS_LOG_DIR = os.getenv("ACCESS_LOG_DIR", "")
+
+ACCESS_LOG_MAX_BYTES = int(os.getenv("ACCESS_LOG_MAX_BYTES", str(50 * 2 ** 20)))
+
+ACCESS_LOG_BACKUP_COUNT = int(os.getenv("ACCESS_LOG_BACKUP_COUNT", "5"))
+
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "0.1"))
+
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "500"))
+
 LOGIN_REDIRECT_URL = "/"
 LOGOUT_REDIRECT_URL = "/"
 LOGIN_URL = "/login/"
\ No newline at end of file
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class StatsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'task_manager.stats'
+
+    def ready(self):
+        from task_manager.stats import signals  # noqa: F401
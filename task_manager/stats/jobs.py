@@ -0,0 +1,7 @@
+from task_manager.jobs.queue import job
+from task_manager.stats import rollups
+
+
+@job("stats.rebuild")
+def rebuild_stats():
+    rollups.rebuild()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from task_manager.stats import rollups
+
+
+class Command(BaseCommand):
+    help = "Полностью пересчитывает таблицы статистики по задачам"
+
+    def handle(self, *args, **options):
+        rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS("Статистика пересчитана"))
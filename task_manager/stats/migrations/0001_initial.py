@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-19 08:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('labels', '0001_initial'),
+        ('statuses', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTaskCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExecutorTaskCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(db_index=True, default=0)),
+                ('executor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='task_count', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LabelTaskCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('label', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='task_count', to='labels.label')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatusTaskCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0)),
+                ('status', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='task_count', to='statuses.status')),
+            ],
+        ),
+    ]
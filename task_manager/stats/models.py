@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import models
+
+
+class StatusTaskCount(models.Model):
+    status = models.OneToOneField(
+        'statuses.Status',
+        on_delete=models.CASCADE,
+        related_name='task_count',
+    )
+    count = models.IntegerField(default=0)
+
+
+class ExecutorTaskCount(models.Model):
+    executor = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='task_count',
+    )
+    count = models.IntegerField(default=0, db_index=True)
+
+
+class LabelTaskCount(models.Model):
+    label = models.OneToOneField(
+        'labels.Label',
+        on_delete=models.CASCADE,
+        related_name='task_count',
+    )
+    count = models.IntegerField(default=0)
+
+
+class DailyTaskCount(models.Model):
+    date = models.DateField(unique=True)
+    count = models.IntegerField(default=0)
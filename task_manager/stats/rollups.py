@@ -0,0 +1,107 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from task_manager.stats.models import (
+    DailyTaskCount,
+    ExecutorTaskCount,
+    LabelTaskCount,
+    StatusTaskCount,
+)
+from task_manager.tasks.models import Task
+
+
+def bump(model, delta, **key):
+    if not delta or None in key.values():
+        return
+    updated = model.objects.filter(**key).update(count=F("count") + delta)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **key)
+    except IntegrityError:
+        # Строку успел создать параллельный запрос
+        model.objects.filter(**key).update(count=F("count") + delta)
+
+
+def task_added(task):
+    bump(StatusTaskCount, 1, status_id=task.status_id)
+    bump(ExecutorTaskCount, 1, executor_id=task.executor_id)
+    bump(DailyTaskCount, 1, date=timezone.localdate(task.created_at))
+
+
+def task_removed(task, label_ids=()):
+    bump(StatusTaskCount, -1, status_id=task.status_id)
+    bump(ExecutorTaskCount, -1, executor_id=task.executor_id)
+    bump(DailyTaskCount, -1, date=timezone.localdate(task.created_at))
+    for label_id in label_ids:
+        bump(LabelTaskCount, -1, label_id=label_id)
+
+
+def tasks_archived(rows, links):
+    by_status = Counter(row["status_id"] for row in rows)
+    by_executor = Counter(row["executor_id"] for row in rows)
+    by_day = Counter(timezone.localdate(row["created_at"]) for row in rows)
+    for status_id, count in by_status.items():
+        bump(StatusTaskCount, -count, status_id=status_id)
+    for executor_id, count in by_executor.items():
+        bump(ExecutorTaskCount, -count, executor_id=executor_id)
+    for date, count in by_day.items():
+        bump(DailyTaskCount, -count, date=date)
+    labels_changed(Counter(label_id for _, label_id in links), -1)
+
+
+def task_changed(changes):
+    if "status_id" in changes:
+        old, new = changes["status_id"]
+        bump(StatusTaskCount, -1, status_id=old)
+        bump(StatusTaskCount, 1, status_id=new)
+    if "executor_id" in changes:
+        old, new = changes["executor_id"]
+        bump(ExecutorTaskCount, -1, executor_id=old)
+        bump(ExecutorTaskCount, 1, executor_id=new)
+
+
+def labels_changed(label_counts, delta):
+    for label_id, count in label_counts.items():
+        bump(LabelTaskCount, delta * count, label_id=label_id)
+
+
+@transaction.atomic
+def rebuild():
+    for model in (
+        StatusTaskCount,
+        ExecutorTaskCount,
+        LabelTaskCount,
+        DailyTaskCount,
+    ):
+        model.objects.all().delete()
+
+    tasks = Task.objects.order_by()
+    StatusTaskCount.objects.bulk_create(
+        StatusTaskCount(status_id=status_id, count=count)
+        for status_id, count in tasks.values_list("status_id")
+        .annotate(count=Count("id"))
+    )
+    ExecutorTaskCount.objects.bulk_create(
+        ExecutorTaskCount(executor_id=executor_id, count=count)
+        for executor_id, count in tasks.filter(executor__isnull=False)
+        .values_list("executor_id")
+        .annotate(count=Count("id"))
+    )
+    LabelTaskCount.objects.bulk_create(
+        LabelTaskCount(label_id=label_id, count=count)
+        for label_id, count in Task.labels.through.objects.order_by()
+        .values_list("label_id")
+        .annotate(count=Count("id"))
+    )
+    DailyTaskCount.objects.bulk_create(
+        DailyTaskCount(date=date, count=count)
+        for date, count in tasks.annotate(date=TruncDate("created_at"))
+        .values_list("date")
+        .annotate(count=Count("id"))
+    )
@@ -0,0 +1,78 @@
+from collections import Counter
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from task_manager.stats import rollups
+from task_manager.tasks.models import Task
+from task_manager.tasks.signals import task_restored, tasks_archived
+
+TaskLabel = Task.labels.through
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        rollups.task_added(instance)
+    else:
+        rollups.task_changed(instance.tracked_changes())
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, **kwargs):
+    instance._stats_label_ids = list(
+        TaskLabel.objects.filter(task_id=instance.pk)
+        .values_list("label_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    rollups.task_removed(
+        instance,
+        getattr(instance, "_stats_label_ids", ()),
+    )
+
+
+@receiver(tasks_archived, sender=Task)
+def task_batch_archived(sender, rows, links, **kwargs):
+    rollups.tasks_archived(rows, links)
+
+
+@receiver(task_restored, sender=Task)
+def task_unarchived(sender, task, label_ids, **kwargs):
+    rollups.task_added(task)
+    rollups.labels_changed(dict.fromkeys(label_ids, 1), 1)
+
+
+def _linked_labels(instance, reverse, pk_set):
+    links = TaskLabel.objects.all()
+    if reverse:
+        links = links.filter(label_id=instance.pk)
+    else:
+        links = links.filter(task_id=instance.pk)
+    if pk_set is not None:
+        column = "task_id" if reverse else "label_id"
+        links = links.filter(**{f"{column}__in": pk_set})
+    return Counter(links.values_list("label_id", flat=True))
+
+
+@receiver(m2m_changed, sender=TaskLabel)
+def task_labels_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "post_add" and pk_set:
+        if reverse:
+            rollups.labels_changed({instance.pk: len(pk_set)}, 1)
+        else:
+            rollups.labels_changed(dict.fromkeys(pk_set, 1), 1)
+    elif action in ("pre_remove", "pre_clear"):
+        # Считаем только реально существующие связи
+        instance._stats_removed_labels = _linked_labels(
+            instance, reverse, pk_set
+        )
+    elif action in ("post_remove", "post_clear"):
+        removed = getattr(instance, "_stats_removed_labels", None)
+        if removed:
+            rollups.labels_changed(removed, -1)
+        instance._stats_removed_labels = None
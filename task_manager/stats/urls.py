@@ -0,0 +1,7 @@
+from django.urls import path
+
+from task_manager.stats.views import StatsDashboardView
+
+urlpatterns = [
+    path("", StatsDashboardView.as_view(), name="stats_dashboard"),
+]
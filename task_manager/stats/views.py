@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Sum
+from django.utils import timezone
+from django.views.generic import TemplateView
+
+from task_manager.stats.models import (
+    DailyTaskCount,
+    ExecutorTaskCount,
+    LabelTaskCount,
+    StatusTaskCount,
+)
+
+TOP_EXECUTORS = 20
+TREND_DAYS = 30
+
+
+class StatsDashboardView(LoginRequiredMixin, TemplateView):
+    template_name = "stats/dashboard.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        since = timezone.localdate() - timedelta(days=TREND_DAYS - 1)
+
+        by_status = list(
+            StatusTaskCount.objects.select_related("status")
+            .filter(count__gt=0)
+            .order_by("status_id")
+        )
+        total = sum(row.count for row in by_status)
+        assigned = (
+            ExecutorTaskCount.objects.aggregate(total=Sum("count"))["total"]
+            or 0
+        )
+
+        context.update({
+            "total": total,
+            "unassigned": total - assigned,
+            "by_status": by_status,
+            "by_executor": ExecutorTaskCount.objects.select_related(
+                "executor"
+            ).filter(count__gt=0).order_by("-count")[:TOP_EXECUTORS],
+            "by_label": LabelTaskCount.objects.select_related("label")
+            .filter(count__gt=0)
+            .order_by("label__name"),
+            "by_day": DailyTaskCount.objects.filter(date__gte=since)
+            .order_by("date"),
+        })
+        return context
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from task_manager.projects.models import Project
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import ArchivedTask, Task
+from task_manager.tasks.signals import task_restored, tasks_archived
+
+ARCHIVE_BATCH_SIZE = 500
+
+TaskLabel = Task.labels.through
+ArchivedTaskLabel = ArchivedTask.labels.through
+
+ARCHIVED_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "status_id",
+    "author_id",
+    "executor_id",
+    "project_id",
+    "parent_id",
+    "due_date",
+    "comment_count",
+    "created_at",
+)
+
+
+# Строки этих таблиц остаются привязанными к id задачи: после архивации
+# они относятся к архивной задаче с тем же id, после восстановления — снова
+# к задаче. Поэтому их внешние ключи объявлены без ограничения в БД
+KEPT_RELATIONS = {
+    "tasks.taskchange",
+    "tasks.taskcomment",
+    "attachments.attachment",
+}
+
+
+def check_relations():
+    # Новая таблица со ссылкой на задачу должна быть либо перенесена в
+    # архив, либо явно оставлена по id; иначе DELETE оставил бы сирот
+    for relation in Task._meta.related_objects:
+        if relation.field.name == "parent":
+            continue
+        label = relation.related_model._meta.label_lower
+        if label not in KEPT_RELATIONS or relation.field.db_constraint:
+            raise ImproperlyConfigured(
+                f"Архивация задач не обрабатывает ссылки из {label}"
+            )
+
+
+def final_status_ids(names=None):
+    if names is None:
+        names = settings.TASK_ARCHIVE_STATUSES
+    return list(
+        Status.objects.filter(name__in=names).values_list("id", flat=True)
+    )
+
+
+def archive_tasks(status_ids, days=None, batch_size=ARCHIVE_BATCH_SIZE):
+    if days is None:
+        days = settings.TASK_ARCHIVE_AFTER_DAYS
+    if not status_ids:
+        return 0
+    check_relations()
+
+    border = timezone.now() - timedelta(days=days)
+    total = 0
+    # Индекс (project, status, created_at) работает в пределах проекта,
+    # поэтому проекты (и общие задачи без проекта) обходятся по очереди
+    for project_id in [None, *Project.objects.values_list("id", flat=True)]:
+        # Сначала листья: родитель уходит в архив после своих подзадач
+        candidates = Task.objects.filter(
+            project_id=project_id,
+            status_id__in=status_ids,
+            created_at__lt=border,
+        ).exclude(
+            Exists(Task.objects.filter(parent_id=OuterRef("id")))
+        ).order_by("id")
+        total += _archive_batches(candidates, batch_size)
+    return total
+
+
+def _archive_batches(candidates, batch_size):
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                candidates.select_for_update()
+                .values(*ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return total
+            ids = [row["id"] for row in rows]
+            links = list(
+                TaskLabel.objects.filter(task_id__in=ids)
+                .values_list("task_id", "label_id")
+            )
+
+            ArchivedTask.objects.bulk_create(
+                ArchivedTask(**row) for row in rows
+            )
+            ArchivedTaskLabel.objects.bulk_create(
+                ArchivedTaskLabel(archivedtask_id=task_id, label_id=label_id)
+                for task_id, label_id in links
+            )
+            TaskLabel.objects.filter(task_id__in=ids).delete()
+            # Удаление одним DELETE без загрузки объектов и каскада:
+            # метки перенесены выше, подзадач у листьев нет, а строки
+            # KEPT_RELATIONS остаются за тем же id (см. check_relations)
+            Task.objects.filter(id__in=ids)._raw_delete(Task.objects.db)
+
+            tasks_archived.send(sender=Task, rows=rows, links=links)
+        total += len(rows)
+
+
+@transaction.atomic
+def restore_task(archived):
+    label_ids = list(archived.labels.values_list("id", flat=True))
+    task = Task(**{
+        field: getattr(archived, field) for field in ARCHIVED_FIELDS
+    })
+    if task.parent_id and not Task.objects.filter(pk=task.parent_id).exists():
+        # Родитель тоже в архиве: задача восстанавливается верхнего уровня
+        task.parent_id = None
+    Task.objects.bulk_create([task])
+    # auto_now_add перезаписывает дату создания при вставке
+    Task.objects.filter(pk=task.pk).update(created_at=archived.created_at)
+    task.created_at = archived.created_at
+
+    TaskLabel.objects.bulk_create(
+        TaskLabel(task_id=task.pk, label_id=label_id)
+        for label_id in label_ids
+    )
+    archived.delete()
+
+    task_restored.send(sender=Task, task=task, label_ids=label_ids)
+    return task
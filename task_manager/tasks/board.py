@@ -0,0 +1,87 @@
+from django.db.models import Count, F, Prefetch, Window
+from django.db.models.functions import RowNumber
+
+from task_manager.labels.models import Label
+from task_manager.projections import USER_NAME_FIELDS, related
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+
+BOARD_COLUMN_SIZE = 20
+
+
+def board_queryset():
+    return (
+        Task.objects.select_related("author", "executor")
+        .only(
+            "id",
+            "name",
+            "status_id",
+            "author_id",
+            "executor_id",
+            *related("author", USER_NAME_FIELDS),
+            *related("executor", USER_NAME_FIELDS),
+        )
+        .prefetch_related(
+            Prefetch("labels", queryset=Label.objects.only("id", "name")),
+        )
+    )
+
+
+def load_board(queryset, column_size=BOARD_COLUMN_SIZE):
+    # Все колонки грузятся фиксированным числом запросов:
+    # статусы, карточки (ROW_NUMBER() ограничивает размер колонки),
+    # метки карточек и счетчики по колонкам одним GROUP BY.
+    statuses = list(Status.objects.order_by("id"))
+
+    cards = queryset.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=F("status_id"),
+            order_by=F("id").asc(),
+        )
+    ).filter(position__lte=column_size).order_by("status_id", "id")
+
+    totals = dict(
+        queryset.order_by()
+        .values_list("status_id")
+        .annotate(total=Count("id", distinct=True))
+    )
+
+    columns = {
+        status.id: {"status": status, "tasks": [], "total": 0}
+        for status in statuses
+    }
+    for task in cards:
+        column = columns.get(task.status_id)
+        if column is not None:
+            column["tasks"].append(task)
+    for status_id, total in totals.items():
+        if status_id in columns:
+            columns[status_id]["total"] = total
+
+    for column in columns.values():
+        tasks = column["tasks"]
+        column["cursor"] = tasks[-1].id if tasks else None
+        column["has_more"] = column["total"] > len(tasks)
+
+    return list(columns.values())
+
+
+def load_column(queryset, status_id, after=None, column_size=BOARD_COLUMN_SIZE):
+    queryset = queryset.filter(status_id=status_id)
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    tasks = list(queryset.order_by("id")[:column_size + 1])
+    has_more = len(tasks) > column_size
+    tasks = tasks[:column_size]
+    return tasks, has_more
+
+
+def serialize_card(task):
+    return {
+        "id": task.id,
+        "name": task.name,
+        "author": str(task.author),
+        "executor": str(task.executor) if task.executor_id else None,
+        "labels": [label.name for label in task.labels.all()],
+    }
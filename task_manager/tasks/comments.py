@@ -0,0 +1,43 @@
+"""Комментарии к задачам.
+
+Страница комментариев читается по индексу (task, -id) с курсором по id:
+на странице задачи не бывает больше COMMENTS_PAGE_SIZE комментариев,
+сколько бы их ни было всего. Добавление комментария меняет в строке
+задачи только счетчик.
+"""
+
+from django.db import transaction
+from django.db.models import F
+
+from task_manager.projections import USER_NAME_FIELDS, related
+from task_manager.tasks.models import Task, TaskComment
+
+COMMENTS_PAGE_SIZE = 20
+
+
+@transaction.atomic
+def add_comment(task_id, author, text):
+    comment = TaskComment.objects.create(
+        task_id=task_id,
+        author=author,
+        text=text,
+    )
+    Task.objects.filter(pk=task_id).update(
+        comment_count=F("comment_count") + 1,
+    )
+    return comment
+
+
+def comments_page(task_id, before=None, page_size=COMMENTS_PAGE_SIZE):
+    comments = TaskComment.objects.filter(task_id=task_id).select_related(
+        "author",
+    ).only(
+        "id", "task_id", "text", "created_at", "author_id",
+        *related("author", USER_NAME_FIELDS),
+    ).order_by("-id")
+    if before is not None:
+        comments = comments.filter(id__lt=before)
+    comments = list(comments[:page_size + 1])
+    has_more = len(comments) > page_size
+    comments = comments[:page_size]
+    return comments, (comments[-1].id if has_more else None)
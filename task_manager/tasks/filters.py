@@ -1,10 +1,16 @@
+from datetime import timedelta
+
 import django_filters
 from django import forms
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.urls import reverse_lazy
+from django.utils import timezone
 
-from task_manager.tasks.models import Task
+from task_manager.tasks.models import ArchivedTask, Task
 from task_manager.statuses.models import Status
 from task_manager.labels.models import Label
+from task_manager.widgets import AutocompleteSelect
 
 
 class TaskFilter(django_filters.FilterSet):
@@ -14,22 +20,44 @@ class TaskFilter(django_filters.FilterSet):
     )
     executor = django_filters.ModelChoiceFilter(
         queryset=User.objects.all(),
+        widget=AutocompleteSelect(reverse_lazy("users_autocomplete")),
         label="Исполнитель",
     )
     label = django_filters.ModelChoiceFilter(
         queryset=Label.objects.all(),
+        widget=AutocompleteSelect(reverse_lazy("labels_autocomplete")),
         method="filter_label",
         label="Метка",
     )
+    due = django_filters.ChoiceFilter(
+        choices=[
+            ("overdue", "Просроченные"),
+            ("week", "Срок на этой неделе"),
+        ],
+        method="filter_due",
+        label="Срок",
+    )
     self_tasks = django_filters.BooleanFilter(
         method="filter_self_tasks",
         widget=forms.CheckboxInput(),
         label="Только свои задачи",
     )
+    include_archive = django_filters.BooleanFilter(
+        method="filter_include_archive",
+        widget=forms.CheckboxInput(),
+        label="Включая архив",
+    )
 
     class Meta:
         model = Task
-        fields = ["status", "executor", "label", "self_tasks"]
+        fields = [
+            "status",
+            "executor",
+            "label",
+            "due",
+            "self_tasks",
+            "include_archive",
+        ]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -40,14 +68,48 @@ class TaskFilter(django_filters.FilterSet):
             {"class": "form-select me-3 ms-2"})
         self.form.fields["label"].widget.attrs.update(
             {"class": "form-select me-3 ms-2"})
+        self.form.fields["due"].widget.attrs.update(
+            {"class": "form-select me-3 ms-2"})
         self.form.fields["self_tasks"].widget.attrs.update(
             {"class": "form-check-input me-3"})
+        self.form.fields["include_archive"].widget.attrs.update(
+            {"class": "form-check-input me-3"})
+
+    @property
+    def archive_requested(self):
+        return self.is_bound and self.form.is_valid() and bool(
+            self.form.cleaned_data.get("include_archive")
+        )
 
     def filter_label(self, queryset, name, value):
         if not value:
             return queryset
         return queryset.filter(labels=value).distinct()
 
+    def filter_due(self, queryset, name, value):
+        if not value:
+            return queryset
+        # Условие due_date IS NOT NULL совпадает с условием частичного
+        # индекса (project, due_date); завершенные задачи отсекаются
+        # подзапросом, а не индексом (см. Task.Meta)
+        today = timezone.localdate()
+        if value == "overdue":
+            queryset = queryset.filter(
+                due_date__isnull=False,
+                due_date__lt=today,
+            )
+        else:
+            queryset = queryset.filter(
+                due_date__isnull=False,
+                due_date__gte=today,
+                due_date__lte=today + timedelta(days=6 - today.weekday()),
+            )
+        return queryset.exclude(
+            status__in=Status.objects.filter(
+                name__in=settings.TASK_ARCHIVE_STATUSES,
+            ).values("id"),
+        )
+
     def filter_self_tasks(self, queryset, name, value):
         if not value:
             return queryset
@@ -56,4 +118,13 @@ class TaskFilter(django_filters.FilterSet):
         if not request or not request.user.is_authenticated:
             return queryset
 
-        return queryset.filter(author=self.request.user)
\ No newline at end of file
+        return queryset.filter(author=self.request.user)
+
+    def filter_include_archive(self, queryset, name, value):
+        # Архив хранится в отдельной таблице и подмешивается во view
+        return queryset
+
+
+class ArchivedTaskFilter(TaskFilter):
+    class Meta(TaskFilter.Meta):
+        model = ArchivedTask
@@ -0,0 +1,157 @@
+"""Буферизованная запись истории изменений задач.
+
+Изменения копятся в памяти и пишутся одним bulk_create в конце запроса
+(TaskHistoryMiddleware) либо сразу после коммита, если запись идет вне
+запроса (команды, shell).
+"""
+
+from contextlib import contextmanager
+from threading import local
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import TaskChange
+from task_manager.tasks.versions import bump_tasks
+
+HISTORY_PAGE_SIZE = 20
+
+_state = local()
+
+
+def _pending():
+    if not hasattr(_state, "pending"):
+        _state.pending = {}
+    return _state.pending
+
+
+@contextmanager
+def collect(request=None):
+    _state.request = request
+    _state.scoped = True
+    try:
+        yield
+    finally:
+        _state.scoped = False
+        _state.request = None
+        transaction.on_commit(flush)
+
+
+def _actor_id():
+    request = getattr(_state, "request", None)
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def _merge(entry, changes):
+    for key, value in changes.items():
+        if key == "l":
+            added, removed = entry.get("l", [[], []])
+            added = (set(added) | set(value[0])) - set(value[1])
+            removed = (set(removed) | set(value[1])) - set(value[0])
+            entry["l"] = [sorted(added), sorted(removed)]
+        elif key in entry:
+            entry[key] = [entry[key][0], value[1]]
+        else:
+            entry[key] = list(value)
+
+
+def record(task_id, changes):
+    if not changes:
+        return
+    actor_id = _actor_id()
+    scoped = getattr(_state, "scoped", False)
+
+    def add():
+        entry = _pending().setdefault((task_id, actor_id), {})
+        _merge(entry, changes)
+        if not scoped:
+            flush()
+
+    # Откат транзакции не должен оставлять записей в истории
+    transaction.on_commit(add)
+
+
+def flush():
+    pending = _pending()
+    if not pending:
+        return
+    entries = [
+        TaskChange(task_id=task_id, actor_id=actor_id, changes=changes)
+        for (task_id, actor_id), changes in pending.items()
+        if _is_meaningful(changes)
+    ]
+    pending.clear()
+    TaskChange.objects.bulk_create(entries)
+    # История выводится на закэшированной странице задачи
+    bump_tasks({entry.task_id for entry in entries})
+
+
+def _is_meaningful(changes):
+    label_diff = changes.get("l")
+    if label_diff is not None and not any(label_diff):
+        del changes["l"]
+    for key in ("s", "e"):
+        if key in changes and changes[key][0] == changes[key][1]:
+            del changes[key]
+    return bool(changes)
+
+
+def history_page(task, before=None, page_size=HISTORY_PAGE_SIZE):
+    entries = task.history.select_related("actor").order_by("-id")
+    if before is not None:
+        entries = entries.filter(id__lt=before)
+    entries = list(entries[:page_size + 1])
+    has_more = len(entries) > page_size
+    entries = entries[:page_size]
+    return entries, (entries[-1].id if has_more else None)
+
+
+def describe(entries):
+    status_ids, user_ids, label_ids = set(), set(), set()
+    for entry in entries:
+        status_ids.update(entry.changes.get("s", ()))
+        user_ids.update(entry.changes.get("e", ()))
+        for ids in entry.changes.get("l", ()):
+            label_ids.update(ids)
+    status_ids.discard(None)
+    user_ids.discard(None)
+
+    statuses = Status.objects.in_bulk(status_ids) if status_ids else {}
+    users = get_user_model().objects.in_bulk(user_ids) if user_ids else {}
+    labels = Label.objects.in_bulk(label_ids) if label_ids else {}
+
+    def name(objects, pk):
+        if pk is None:
+            return "—"
+        obj = objects.get(pk)
+        return str(obj) if obj is not None else f"#{pk}"
+
+    for entry in entries:
+        lines = []
+        if "s" in entry.changes:
+            old, new = entry.changes["s"]
+            lines.append(
+                f"Статус: {name(statuses, old)} → {name(statuses, new)}"
+            )
+        if "e" in entry.changes:
+            old, new = entry.changes["e"]
+            lines.append(
+                f"Исполнитель: {name(users, old)} → {name(users, new)}"
+            )
+        if "l" in entry.changes:
+            added, removed = entry.changes["l"]
+            if added:
+                lines.append("Добавлены метки: " + ", ".join(
+                    name(labels, pk) for pk in added
+                ))
+            if removed:
+                lines.append("Удалены метки: " + ", ".join(
+                    name(labels, pk) for pk in removed
+                ))
+        entry.lines = lines
+    return entries
@@ -0,0 +1,13 @@
+from task_manager.jobs.queue import job
+from task_manager.tasks.archive import archive_tasks, final_status_ids
+from task_manager.tasks.reminders import send_reminders
+
+
+@job("tasks.archive")
+def archive(statuses=None, days=None):
+    archive_tasks(final_status_ids(statuses), days=days)
+
+
+@job("tasks.reminders")
+def reminders(lead_days=None):
+    send_reminders(lead_days=lead_days)
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.tasks.archive import (
+    ARCHIVE_BATCH_SIZE,
+    archive_tasks,
+    final_status_ids,
+)
+
+
+class Command(BaseCommand):
+    help = "Переносит старые завершенные задачи в архив"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--status",
+            action="append",
+            dest="statuses",
+            help="Имя финального статуса (можно указать несколько раз)",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TASK_ARCHIVE_AFTER_DAYS,
+            help="Архивировать задачи старше указанного числа дней",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        status_ids = final_status_ids(options["statuses"])
+        if not status_ids:
+            raise CommandError("Не заданы финальные статусы для архивации")
+
+        total = archive_tasks(
+            status_ids,
+            days=options["days"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Перенесено в архив задач: {total}"
+        ))
@@ -0,0 +1,94 @@
+import secrets
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from task_manager.compression import brotli
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает размер и время ответа списка задач без сжатия, "
+        "с gzip и с brotli (если установлен пакет brotli). Данные "
+        "создаются во временной транзакции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        encodings = ["identity", "gzip"]
+        if brotli is not None:
+            encodings.append("br")
+        results = []
+        try:
+            with transaction.atomic():
+                client = Client(HTTP_HOST="localhost")
+                client.force_login(self.populate(options["tasks"]))
+                url = reverse("tasks_list")
+                for encoding in encodings:
+                    results.append(
+                        (encoding, *self.measure(
+                            client, url, encoding, options["repeat"]
+                        ))
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+
+        plain_size, plain_time = results[0][2], results[0][3]
+        # Страницы с CSRF-токеном получают gzip, даже если клиент
+        # предпочитает brotli: в колонке «ответ» — реальная кодировка
+        self.stdout.write(
+            f"{'кодировка':<10}{'ответ':>10}{'байт':>10}{'экономия':>10}"
+            f"{'медиана, мс':>14}{'добавка, мс':>14}"
+        )
+        for encoding, served, size, elapsed in results:
+            self.stdout.write(
+                f"{encoding:<10}{served:>10}{size:>10}"
+                f"{1 - size / plain_size:>10.0%}"
+                f"{elapsed:>14.1f}{elapsed - plain_time:>14.1f}"
+            )
+
+    def populate(self, count):
+        # Уникальные имена: в базе могут остаться записи прошлого запуска
+        name = f"bench_compression_{secrets.token_hex(4)}"
+        user = User.objects.create(username=name)
+        status = Status.objects.create(name=name)
+        Task.objects.bulk_create(
+            (
+                Task(
+                    name=f"Задача {i}",
+                    status=status,
+                    author=user,
+                    executor=user,
+                )
+                for i in range(count)
+            ),
+            batch_size=500,
+        )
+        return user
+
+    def measure(self, client, url, encoding, repeat):
+        timings = []
+        size = 0
+        served = "identity"
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+            timings.append((time.perf_counter() - started) * 1000)
+            size = len(response.content)
+            served = response.get("Content-Encoding", "identity")
+        return served, size, statistics.median(timings)
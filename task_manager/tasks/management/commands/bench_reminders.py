@@ -0,0 +1,94 @@
+import secrets
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+from task_manager.tasks.reminders import REMINDER_BATCH_SIZE, send_reminders
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет время и пиковую память одного запуска напоминаний. "
+        "Данные создаются во временной транзакции, письма не отправляются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=100_000)
+        parser.add_argument("--executors", type=int, default=1000)
+        parser.add_argument(
+            "--batch-size", type=int, default=REMINDER_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.populate(options["tasks"], options["executors"])
+                # Время и память — отдельными запусками: tracemalloc
+                # замедляет каждое выделение памяти и исказил бы время.
+                # Между запусками снимаются отметки первого, чтобы второй
+                # обработал те же задачи
+                stamped_after = timezone.now()
+                started = time.perf_counter()
+                tasks, messages = self.run(options["batch_size"])
+                elapsed = time.perf_counter() - started
+                Task.objects.filter(
+                    reminded_at__gte=stamped_after,
+                ).update(reminded_at=None)
+
+                tracemalloc.start()
+                self.run(options["batch_size"])
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(
+            f"задач: {tasks}, писем: {messages}, "
+            f"время: {elapsed:.1f} с, пик памяти: {peak / 2 ** 20:.1f} МБ"
+        )
+
+    def run(self, batch_size):
+        return send_reminders(
+            batch_size=batch_size,
+            connection=get_connection(
+                "django.core.mail.backends.dummy.EmailBackend",
+            ),
+        )
+
+    def populate(self, count, executors):
+        # Уникальные имена: в базе могут остаться записи прошлого запуска
+        name = f"bench_reminders_{secrets.token_hex(4)}"
+        users = User.objects.bulk_create(
+            User(
+                username=f"{name}_{i}",
+                email=f"{name}_{i}@example.com",
+            )
+            for i in range(executors)
+        )
+        status = Status.objects.create(name=name)
+        today = timezone.localdate()
+        Task.objects.bulk_create(
+            (
+                Task(
+                    name=f"Задача {i}",
+                    status=status,
+                    author=users[0],
+                    executor=users[i % executors],
+                    due_date=today,
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
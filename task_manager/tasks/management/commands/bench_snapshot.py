@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+from task_manager.tasks.snapshot import dump, restore, snapshot_models
+
+
+class Rollback(Exception):
+    pass
+
+
+DUMPDATA_LABELS = (
+    "auth.user",
+    "statuses.status",
+    "labels.label",
+    "projects.project",
+    "tasks.task",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает snapshot_dump/snapshot_restore с dumpdata/loaddata. "
+        "Данные создаются во временной транзакции. Запускается только на "
+        "пустой (рабочей копии) базе: замер очищает таблицы снимка."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=20_000)
+        parser.add_argument("--users", type=int, default=500)
+
+    def handle(self, *args, **options):
+        # Очистка между замерами откатывается, но до отката держит
+        # блокировки таблиц, а на чужих строках замер и вовсе неточен
+        not_empty = [
+            model._meta.label_lower for model in snapshot_models()
+            if model._base_manager.exists()
+        ]
+        if not_empty:
+            raise CommandError(
+                "Замер запускается только на пустой базе, есть строки в: "
+                + ", ".join(not_empty)
+            )
+
+        directory = tempfile.mkdtemp()
+        snapshot = os.path.join(directory, "snapshot.jsonl.gz")
+        fixture = os.path.join(directory, "fixture.json")
+        try:
+            with transaction.atomic():
+                self.populate(options["tasks"], options["users"])
+                rows = sum(
+                    model._base_manager.count() for model in snapshot_models()
+                )
+
+                dump_time = self.measure(lambda: dump(snapshot))
+                dumpdata_time = self.measure(lambda: call_command(
+                    "dumpdata", *DUMPDATA_LABELS, output=fixture, verbosity=0,
+                ))
+                self.clear()
+                restore_time = self.measure(lambda: restore(snapshot))
+                self.clear()
+                loaddata_time = self.measure(lambda: call_command(
+                    "loaddata", fixture, verbosity=0,
+                ))
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            sizes = {
+                path: os.path.getsize(path)
+                for path in (snapshot, fixture) if os.path.exists(path)
+            }
+            shutil.rmtree(directory, ignore_errors=True)
+
+        self.stdout.write(f"строк: {rows}")
+        self.stdout.write(f"{'':<22}{'выгрузка, с':>14}{'загрузка, с':>14}"
+                          f"{'строк/с':>12}{'файл, МБ':>10}")
+        for name, out, load, path in (
+            ("snapshot", dump_time, restore_time, snapshot),
+            ("dumpdata/loaddata", dumpdata_time, loaddata_time, fixture),
+        ):
+            self.stdout.write(
+                f"{name:<22}{out:>14.2f}{load:>14.2f}"
+                f"{rows / load:>12.0f}{sizes[path] / 2 ** 20:>10.1f}"
+            )
+
+    def measure(self, action):
+        started = time.perf_counter()
+        action()
+        return time.perf_counter() - started
+
+    def clear(self):
+        # Таблицы очищаются в обратном порядке зависимостей; остальные
+        # ссылки на них проверятся только при фиксации, а ее не будет
+        with connection.cursor() as cursor:
+            for model in reversed(snapshot_models()):
+                cursor.execute(
+                    "DELETE FROM " + connection.ops.quote_name(
+                        model._meta.db_table,
+                    )
+                )
+
+    def populate(self, count, user_count):
+        users = User.objects.bulk_create(
+            User(username=f"bench_snapshot_{i}", password="!")
+            for i in range(user_count)
+        )
+        statuses = Status.objects.bulk_create(
+            Status(name=f"bench_snapshot_{i}") for i in range(5)
+        )
+        labels = Label.objects.bulk_create(
+            Label(name=f"bench_snapshot_{i}") for i in range(20)
+        )
+        tasks = Task.objects.bulk_create(
+            (
+                Task(
+                    name=f"Задача {i}",
+                    description="Описание задачи " * 5,
+                    status=statuses[i % len(statuses)],
+                    author=users[i % user_count],
+                    executor=users[(i * 7) % user_count],
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
+        through = Task.labels.through
+        through.objects.bulk_create(
+            (
+                through(task_id=task.pk, label_id=labels[(task.pk + k) % 20].pk)
+                for task in tasks
+                for k in range(2)
+            ),
+            batch_size=1000,
+        )
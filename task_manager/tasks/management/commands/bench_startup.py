@@ -0,0 +1,83 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Выполняется в отдельном интерпретаторе, чтобы каждый запуск был холодным
+CHILD = """
+import json, os, sys, time
+
+started = time.perf_counter()
+from task_manager.wsgi import application
+loaded = time.perf_counter()
+if sys.argv[1] == "warm":
+    from task_manager.warmup import warm_up
+    warm_up()
+ready = time.perf_counter()
+
+from django.test import Client
+
+client = Client()
+latencies = []
+for path in sys.argv[2:]:
+    begin = time.perf_counter()
+    client.get(path, HTTP_HOST="localhost")
+    latencies.append((time.perf_counter() - begin) * 1000)
+
+print(json.dumps({
+    "load": (loaded - started) * 1000,
+    "warm_up": (ready - loaded) * 1000,
+    "first": latencies,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет время запуска приложения и задержку первых запросов "
+        "без прогрева и с прогревом шаблонов и URL-резолвера."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Запрашиваемые страницы (по умолчанию / и /login/)",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or ["/", "/login/"]
+        env = dict(os.environ, DEBUG="False")
+        self.stdout.write(
+            f"{'режим':<10}{'импорт, мс':>12}{'прогрев, мс':>14}"
+            f"{'1-й запрос, мс':>17}{'всего, мс':>12}"
+        )
+        for mode in ("cold", "warm"):
+            runs = [
+                self.run_child(mode, paths, env)
+                for _ in range(options["repeat"])
+            ]
+            load = statistics.median(run["load"] for run in runs)
+            warm_up = statistics.median(run["warm_up"] for run in runs)
+            first = statistics.median(sum(run["first"]) for run in runs)
+            self.stdout.write(
+                f"{mode:<10}{load:>12.1f}{warm_up:>14.1f}"
+                f"{first:>17.1f}{load + warm_up + first:>12.1f}"
+            )
+
+    def run_child(self, mode, paths, env):
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD, mode, *paths],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
@@ -0,0 +1,99 @@
+import secrets
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from task_manager.projections import task_list_queryset
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает память и скорость списка задач с полной выборкой "
+        "колонок и с проекцией. Данные создаются во временной транзакции."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=2000)
+        parser.add_argument(
+            "--description-size",
+            type=int,
+            default=20000,
+            help="Длина описания задачи, символов",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.populate(options)
+                full = self.measure(
+                    lambda: Task.objects.select_related(
+                        "status", "author", "executor"
+                    ).order_by("id"),
+                    options["repeat"],
+                )
+                projected = self.measure(
+                    lambda: task_list_queryset(Task).order_by("id"),
+                    options["repeat"],
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(
+            f"{'выборка':<12}{'строк/с':>12}{'пик памяти, МБ':>18}"
+        )
+        for name, (rate, peak) in (("полная", full), ("проекция", projected)):
+            self.stdout.write(f"{name:<12}{rate:>12.0f}{peak:>18.1f}")
+
+    def populate(self, options):
+        # Уникальные имена: в базе могут остаться записи прошлого запуска
+        name = f"bench_task_list_{secrets.token_hex(4)}"
+        user = User.objects.create(username=name)
+        status = Status.objects.create(name=name)
+        description = "x" * options["description_size"]
+        Task.objects.bulk_create(
+            (
+                Task(
+                    name=f"Задача {i}",
+                    description=description,
+                    status=status,
+                    author=user,
+                    executor=user,
+                )
+                for i in range(options["tasks"])
+            ),
+            batch_size=500,
+        )
+
+    def measure(self, make_queryset, repeat):
+        # Время и память — отдельными проходами: tracemalloc замедляет
+        # каждое выделение памяти и исказил бы скорость
+        rows = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            rows += self.render(make_queryset())
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        self.render(make_queryset())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return rows / elapsed, peak / 1024 / 1024
+
+    def render(self, queryset):
+        rows = 0
+        for task in queryset:
+            # То же, что выводит tasks/list.html
+            str(task.status), str(task.author), str(task.executor)
+            rows += 1
+        return rows
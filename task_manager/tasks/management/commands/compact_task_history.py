@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+
+from task_manager.tasks.models import TaskChange
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет устаревшие записи истории задач и ограничивает "
+        "число записей на одну задачу"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Сколько дней хранить историю",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=200,
+            help="Сколько последних записей хранить для каждой задачи",
+        )
+
+    def handle(self, *args, **options):
+        if options["keep"] < 1:
+            raise CommandError("--keep должен быть не меньше 1")
+        border = timezone.now() - timedelta(days=options["days"])
+        expired = _delete_in_batches(
+            TaskChange.objects.filter(created_at__lt=border)
+        )
+
+        trimmed = 0
+        crowded = (
+            TaskChange.objects.order_by()
+            .values_list("task_id", flat=True)
+            .annotate(total=Count("id"))
+            .filter(total__gt=options["keep"])
+        )
+        for task_id in crowded.iterator():
+            oldest_kept = (
+                TaskChange.objects.filter(task_id=task_id)
+                .order_by("-id")
+                .values_list("id", flat=True)[options["keep"] - 1]
+            )
+            trimmed += _delete_in_batches(
+                TaskChange.objects.filter(task_id=task_id, id__lt=oldest_kept)
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Удалено записей истории: {expired + trimmed}"
+        ))
+
+
+def _delete_in_batches(queryset):
+    total = 0
+    while True:
+        ids = list(queryset.values_list("id", flat=True)[:BATCH_SIZE])
+        if not ids:
+            return total
+        total += TaskChange.objects.filter(id__in=ids).delete()[0]
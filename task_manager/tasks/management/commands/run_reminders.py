@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from task_manager.tasks.reminders import REMINDER_BATCH_SIZE, send_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Рассылает исполнителям напоминания о задачах, срок которых "
+        "подошел или прошел. Запускается по расписанию (cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lead-days",
+            type=int,
+            default=settings.TASK_REMINDER_LEAD_DAYS,
+            help="За сколько дней до срока напоминать",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=REMINDER_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        tasks, messages = send_reminders(
+            lead_days=options["lead_days"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Напоминаний отправлено: {messages} (задач: {tasks})"
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from task_manager.tasks.snapshot import SNAPSHOT_BATCH_SIZE, dump
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает пользователей, статусы, метки, проекты и задачи "
+        "в сжатый снимок (JSON Lines + gzip)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл снимка, например snapshot.jsonl.gz")
+        parser.add_argument(
+            "--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE,
+        )
+        parser.add_argument(
+            "--compresslevel",
+            type=int,
+            default=6,
+            choices=range(1, 10),
+            metavar="1-9",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = dump(
+            options["path"],
+            batch_size=options["batch_size"],
+            compresslevel=options["compresslevel"],
+        )
+        elapsed = time.perf_counter() - started
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Выгружено строк: {total} за {elapsed:.1f} с "
+            f"({total / max(elapsed, 1e-9):.0f} строк/с)"
+        ))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.tasks.snapshot import (
+    SNAPSHOT_BATCH_SIZE,
+    SnapshotError,
+    restore,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает снимок snapshot_dump в пустую базу пачками INSERT "
+        "с проверкой внешних ключей в конце"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл снимка")
+        parser.add_argument(
+            "--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            counts = restore(options["path"], batch_size=options["batch_size"])
+        except SnapshotError as error:
+            raise CommandError(str(error))
+        elapsed = time.perf_counter() - started
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count}")
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено строк: {total} за {elapsed:.1f} с "
+            f"({total / max(elapsed, 1e-9):.0f} строк/с)"
+        ))
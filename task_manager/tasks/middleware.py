@@ -0,0 +1,10 @@
+from task_manager.tasks import history
+
+
+class TaskHistoryMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with history.collect(request):
+            return self.get_response(request)
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.9 on 2026-10-19 08:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0001_initial'),
+        ('statuses', '0001_initial'),
+        ('tasks', '0002_taskchange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255, verbose_name='Имя')),
+                ('description', models.TextField(blank=True, verbose_name='Описание')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='taskchange',
+            name='task',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='history', to='tasks.task'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'created_at'], name='tasks_task_status__5474f7_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_created_tasks', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='executor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_executed_tasks', to=settings.AUTH_USER_MODEL, verbose_name='Исполнитель'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='labels',
+            field=models.ManyToManyField(blank=True, related_name='archived_tasks', to='labels.label', verbose_name='Метки'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='status',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_tasks', to='statuses.status', verbose_name='Статус'),
+        ),
+    ]
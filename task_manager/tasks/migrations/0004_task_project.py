@@ -0,0 +1,50 @@
+# Generated by Django 5.2.9 on 2026-10-19 09:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0002_label_search_index'),
+        ('projects', '0001_initial'),
+        ('statuses', '0001_initial'),
+        ('tasks', '0003_archivedtask_alter_taskchange_task_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_status__5474f7_idx',
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='project',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_tasks', to='projects.project', verbose_name='Проект'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='project',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='tasks', to='projects.project', verbose_name='Проект'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='status',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='statuses.status', verbose_name='Статус'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'status', 'created_at'], name='tasks_task_project_b4f9d5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'id'], name='tasks_task_project_b216c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'executor'], name='tasks_task_project_186d60_idx'),
+        ),
+    ]
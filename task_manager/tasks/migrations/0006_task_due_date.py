@@ -0,0 +1,41 @@
+# Generated by Django 5.2.9 on 2026-10-19 09:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0002_label_search_index'),
+        ('projects', '0001_initial'),
+        ('statuses', '0001_initial'),
+        ('tasks', '0005_task_parent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtask',
+            name='due_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Срок'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='due_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Срок'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='reminded_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('due_date__isnull', False)), fields=['project', 'due_date'], name='tasks_task_due_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), ('reminded_at__isnull', True)), fields=['due_date', 'id'], name='tasks_task_reminder_idx'),
+        ),
+    ]
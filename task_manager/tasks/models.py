@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.signals import m2m_changed
 from django.conf import settings
 
 
@@ -15,6 +16,10 @@ class Task(models.Model):
     status = models.ForeignKey(
         'statuses.Status',
         on_delete=models.PROTECT,
+        # Статус ищется только в пределах проекта (см. индексы в Meta);
+        # без проекта задачи по статусу выбирает лишь проверка PROTECT
+        # при удалении статуса, и ради нее индекс не держится
+        db_index=False,
         verbose_name='Статус',
     )
 
@@ -40,10 +45,381 @@ class Task(models.Model):
         related_name='tasks',
         verbose_name='Метки')
 
+    # Задачи без проекта общие для всех пользователей
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.PROTECT,
+        related_name='tasks',
+        null=True,
+        blank=True,
+        # Отдельный индекс не нужен: его заменяют составные из Meta
+        db_index=False,
+        verbose_name='Проект',
+    )
+
+    # Подзадачи остаются в проекте родителя; удалить задачу
+    # с подзадачами нельзя
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        related_name='subtasks',
+        null=True,
+        blank=True,
+        verbose_name='Родительская задача',
+    )
+
+    due_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Срок',
+    )
+
+    # Когда ушло напоминание о сроке; сбрасывается при смене срока,
+    # исполнителя и при выходе из закрытого статуса
+    reminded_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    # Поддерживается инкрементом при добавлении комментария, чтобы
+    # список задач не считал COUNT по каждой строке
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Комментарии',
+    )
+
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата создания',
     )
 
+    class Meta:
+        # Проект — ключ секционирования: запросы к задачам идут в пределах
+        # проекта, поэтому составные индексы начинаются с project_id.
+        # Исключения — выборки поверх всех проектов, которым составные
+        # индексы не помогают, поэтому у них свои индексы:
+        # - author и executor: счетчики задач в списке пользователей и
+        #   проверка PROTECT при удалении пользователя;
+        # - parent: подзадачи ищутся по родителю, проект у них тот же;
+        # - tasks_task_reminder_idx: планировщик напоминаний.
+        indexes = [
+            models.Index(fields=["project", "status", "created_at"]),
+            models.Index(fields=["project", "id"]),
+            models.Index(fields=["project", "executor"]),
+            # Частичные индексы: срок есть у небольшой части задач,
+            # остальные в индексы не попадают. Фильтр «Срок» показывает
+            # только открытые задачи, но закрытые статусы задаются по
+            # именам в настройках (TASK_ARCHIVE_STATUSES) и в статическое
+            # условие индекса не годятся: индекс отсекает лишь задачи без
+            # срока, а статус проверяется подзапросом поверх него
+            models.Index(
+                fields=["project", "due_date"],
+                condition=models.Q(due_date__isnull=False),
+                name="tasks_task_due_date_idx",
+            ),
+            # Планировщик напоминаний идет по всем проектам сразу; задача
+            # выходит из индекса, как только напоминание отправлено
+            models.Index(
+                fields=["due_date", "id"],
+                condition=models.Q(
+                    due_date__isnull=False,
+                    reminded_at__isnull=True,
+                ),
+                name="tasks_task_reminder_idx",
+            ),
+        ]
+
+    # Поля, изменения которых отслеживаются относительно загруженных из БД
+    # значений (счетчики статистики, история и т.п.)
+    TRACKED_FIELDS = (
+        "name",
+        "description",
+        "status_id",
+        "executor_id",
+        "parent_id",
+        "due_date",
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_tracked()
+        return instance
+
+    def _remember_tracked(self):
+        self._loaded_values = {
+            name: self.__dict__[name]
+            for name in self.TRACKED_FIELDS
+            if name in self.__dict__
+        }
+        self._remember_managed()
+
+    def _remember_managed(self):
+        self._loaded_managed = {
+            name: self.__dict__[name]
+            for name in self.MANAGED_FIELDS
+            if name in self.__dict__
+        }
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_managed()
+
+    def tracked_changes(self):
+        loaded = getattr(self, "_loaded_values", {})
+        return {
+            name: (loaded[name], getattr(self, name))
+            for name in loaded
+            if loaded[name] != getattr(self, name)
+        }
+
+    # Поля, которые меняются только точечными UPDATE; обычное сохранение
+    # загруженной ранее задачи не должно затирать их старыми значениями.
+    # save() без update_fields их не пишет, а если такое поле изменено
+    # у экземпляра, падает с ValueError, чтобы изменение не пропало молча:
+    # записать его можно, только явно указав в update_fields
+    MANAGED_FIELDS = ("reminded_at", "comment_count")
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            dirty = [
+                name
+                for name, value in getattr(self, "_loaded_managed", {}).items()
+                if getattr(self, name) != value
+            ]
+            if dirty:
+                raise ValueError(
+                    f"Поля {', '.join(dirty)} сохраняются только через "
+                    "update_fields"
+                )
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.MANAGED_FIELDS
+            ]
+        if self._rearms_reminder(self.tracked_changes()):
+            self.reminded_at = None
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "reminded_at"}
+        super().save(*args, **kwargs)
+        self._remember_tracked()
+
+    def _rearms_reminder(self, changes):
+        # Напоминание относится к прежнему сроку и прежнему исполнителю.
+        # Задачи без исполнителя и закрытые планировщик отмечает без
+        # письма, поэтому переоткрытая задача тоже ждет напоминания
+        if "due_date" in changes or "executor_id" in changes:
+            return True
+        if "status_id" not in changes or self.reminded_at is None:
+            return False
+        old_status_id, _ = changes["status_id"]
+        statuses = self._meta.get_field("status").related_model.objects
+        return statuses.filter(
+            pk=old_status_id,
+            name__in=settings.TASK_ARCHIVE_STATUSES,
+        ).exists()
+
+    def save_changes(self):
+        # Пишет только изменившиеся поля и пропускает UPDATE, если менять
+        # нечего. Без полного снимка загруженных значений — обычный save()
+        loaded = getattr(self, "_loaded_values", {})
+        if self._state.adding or set(loaded) != set(self.TRACKED_FIELDS):
+            self.save()
+            return True
+        changed = self.tracked_changes()
+        if changed:
+            self.save(update_fields=list(changed))
+        return bool(changed)
+
+    def apply_labels(self, label_ids, current_ids=None):
+        # В отличие от labels.set(): один DELETE и один INSERT только для
+        # реально изменившихся связей, и сигналы только по ним
+        through = Task.labels.through
+        if current_ids is None:
+            current_ids = through.objects.filter(
+                task_id=self.pk,
+            ).values_list("label_id", flat=True)
+        current_ids, label_ids = set(current_ids), set(label_ids)
+        removed = current_ids - label_ids
+        added = label_ids - current_ids
+
+        if removed:
+            self._labels_changed("pre_remove", removed)
+            through.objects.filter(
+                task_id=self.pk,
+                label_id__in=removed,
+            ).delete()
+            self._labels_changed("post_remove", removed)
+        if added:
+            self._labels_changed("pre_add", added)
+            through.objects.bulk_create(
+                [through(task_id=self.pk, label_id=pk) for pk in added],
+                ignore_conflicts=True,
+            )
+            self._labels_changed("post_add", added)
+        return added, removed
+
+    def _labels_changed(self, action, pk_set):
+        m2m_changed.send(
+            sender=Task.labels.through,
+            instance=self,
+            action=action,
+            reverse=False,
+            model=self._meta.get_field("labels").related_model,
+            pk_set=set(pk_set),
+            using=self._state.db,
+        )
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class TaskChange(models.Model):
+    # Компактный дифф: {"s": [было, стало], "e": [было, стало],
+    # "l": [[добавленные], [удаленные]]} — только идентификаторы
+    # Без ограничения на уровне БД: при архивации задача физически
+    # удаляется из tasks_task, а история должна пережить перенос
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='history',
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    changes = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["task", "-id"])]
+
+
+class TaskComment(models.Model):
+    # Без ограничения на уровне БД, как и история: комментарии остаются
+    # за задачей при переносе в архив
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    text = models.TextField(verbose_name='Комментарий')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["task", "-id"])]
+
+    def __str__(self) -> str:
+        return f"#{self.task_id}: {self.text[:50]}"
+
+
+class SavedFilter(models.Model):
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='saved_filters',
+    )
+    # Фильтр сохраняется для списка, где его создали: общего или проекта
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        db_index=False,
+    )
+    name = models.CharField(max_length=100, verbose_name='Название')
+    # Параметры TaskFilter в виде строки запроса
+    query = models.CharField(max_length=1000, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["owner", "project"])]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class ArchivedTask(models.Model):
+    # Идентификатор сохраняется, чтобы задачу можно было восстановить
+    # под тем же номером вместе с историей
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(
+        max_length=255,
+        verbose_name='Имя'
+    )
+    description = models.TextField(
+        blank=True,
+        verbose_name='Описание'
+    )
+    status = models.ForeignKey(
+        'statuses.Status',
+        on_delete=models.PROTECT,
+        related_name='archived_tasks',
+        verbose_name='Статус',
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='archived_created_tasks',
+        verbose_name='Автор',
+    )
+    executor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='archived_executed_tasks',
+        null=True,
+        blank=True,
+        verbose_name='Исполнитель',
+    )
+    labels = models.ManyToManyField(
+        'labels.Label',
+        blank=True,
+        related_name='archived_tasks',
+        verbose_name='Метки')
+    project = models.ForeignKey(
+        'projects.Project',
+        on_delete=models.PROTECT,
+        related_name='archived_tasks',
+        null=True,
+        blank=True,
+        verbose_name='Проект',
+    )
+    # Без внешнего ключа: родитель может быть заархивирован позже
+    parent_id = models.BigIntegerField(null=True, blank=True)
+    due_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Срок',
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментарии',
+    )
+    created_at = models.DateTimeField(verbose_name='Дата создания')
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата архивации',
+    )
+
     def __str__(self) -> str:
         return self.name
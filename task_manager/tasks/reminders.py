@@ -0,0 +1,161 @@
+"""Напоминания о сроках задач.
+
+``send_reminders`` обходит задачи, у которых подошел срок, пачками по
+частичному индексу ожидающих напоминания (сами задачи из него уходят
+после отметки), поэтому память не зависит от числа задач за запуск.
+Пачка забирает и все остальные подошедшие задачи своих исполнителей:
+каждый исполнитель получает за запуск одно письмо.
+
+Задачи сначала помечаются ``reminded_at`` условным UPDATE, и письма
+уходят только по задачам, отмеченным этим запуском: параллельные или
+повторные запуски одну задачу дважды не обработают. Отметка фиксируется
+до отправки, а письма уходят вне транзакции, так что медленный SMTP не
+держит блокировки строк задач.
+
+Задачи без исполнителя и в закрытых статусах отмечаются без письма,
+чтобы не попадать в каждую следующую пачку; отметка с них снимается,
+когда у задачи появляется исполнитель или она переоткрывается (см.
+Task.save). В письмо попадают первые ``TASKS_PER_MESSAGE`` задач
+исполнителя, об остальных сказано их числом: группа исполнителя читается
+потоком и в памяти не копится.
+
+Если отправка порции писем упала, отметка снимается с задач
+исполнителей, которым письмо еще не ушло, и запуск прерывается: эти
+задачи подхватит следующий запуск. Письма из упавшей порции, которые
+сервер все же принял, при этом могут уйти повторно — доставка «хотя бы
+один раз».
+"""
+
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+
+REMINDER_BATCH_SIZE = 1000
+
+MESSAGES_PER_SEND = 100
+
+TASKS_PER_MESSAGE = 100
+
+SUBJECT = "Напоминание о сроках задач"
+
+
+def due_border(today=None, lead_days=None):
+    if today is None:
+        today = timezone.localdate()
+    if lead_days is None:
+        lead_days = settings.TASK_REMINDER_LEAD_DAYS
+    return today + timedelta(days=lead_days)
+
+
+def pending(border):
+    return Task.objects.filter(
+        due_date__isnull=False,
+        due_date__lte=border,
+        reminded_at__isnull=True,
+    ).order_by("due_date", "id")
+
+
+def send_reminders(
+    today=None,
+    lead_days=None,
+    batch_size=REMINDER_BATCH_SIZE,
+    connection=None,
+):
+    if today is None:
+        today = timezone.localdate()
+    border = due_border(today, lead_days)
+    closed = Status.objects.filter(
+        name__in=settings.TASK_ARCHIVE_STATUSES,
+    ).values("id")
+    connection = connection or get_connection()
+    tasks = messages = 0
+    while True:
+        head = list(
+            pending(border).values_list("id", "executor_id")[:batch_size]
+        )
+        if not head:
+            return tasks, messages
+        claimed = Q(id__in=[task_id for task_id, _ in head])
+        executor_ids = {pk for _, pk in head if pk is not None}
+        if executor_ids:
+            claimed |= Q(executor_id__in=executor_ids)
+        # Отметка одним UPDATE в автокоммите, до отправки писем
+        stamp = timezone.now()
+        pending(border).filter(claimed).update(reminded_at=stamp)
+        if not executor_ids:
+            continue
+        rows = (
+            Task.objects.filter(claimed, reminded_at=stamp)
+            .exclude(executor__isnull=True)
+            .exclude(status__in=closed)
+            .order_by("executor_id", "due_date", "id")
+            .values_list("executor_id", "id", "name", "due_date")
+            .iterator(chunk_size=batch_size)
+        )
+        emails = executor_emails(executor_ids)
+        handled = set()
+        try:
+            # Строки читаются потоком, письма уходят порциями
+            outgoing = []
+            for executor_id, group in groupby(rows, key=itemgetter(0)):
+                listed, total = [], 0
+                for row in group:
+                    total += 1
+                    if len(listed) < TASKS_PER_MESSAGE:
+                        listed.append(row[1:])
+                tasks += total
+                if executor_id not in emails:
+                    handled.add(executor_id)
+                    continue
+                outgoing.append((executor_id, EmailMessage(
+                    SUBJECT,
+                    reminder_body(listed, today, total - len(listed)),
+                    to=[emails[executor_id]],
+                )))
+                if len(outgoing) >= MESSAGES_PER_SEND:
+                    messages += send_portion(connection, outgoing, handled)
+                    outgoing = []
+            if outgoing:
+                messages += send_portion(connection, outgoing, handled)
+        except Exception:
+            Task.objects.filter(
+                claimed,
+                reminded_at=stamp,
+                executor_id__in=executor_ids - handled,
+            ).update(reminded_at=None)
+            raise
+
+
+def send_portion(connection, outgoing, handled):
+    count = connection.send_messages(
+        [message for _, message in outgoing]
+    ) or 0
+    handled.update(executor_id for executor_id, _ in outgoing)
+    return count
+
+
+def executor_emails(executor_ids):
+    return dict(
+        get_user_model().objects.filter(pk__in=executor_ids)
+        .exclude(email="")
+        .values_list("pk", "email")
+    )
+
+
+def reminder_body(tasks, today, hidden=0):
+    lines = ["Подходит срок задач, где вы исполнитель:", ""]
+    for task_id, name, due_date in tasks:
+        note = " (просрочена)" if due_date < today else ""
+        lines.append(f"#{task_id} {name} — до {due_date:%d.%m.%Y}{note}")
+    if hidden:
+        lines.append(f"…и еще задач: {hidden}")
+    return "\n".join(lines)
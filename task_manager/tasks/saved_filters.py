@@ -0,0 +1,84 @@
+"""Сохраненные фильтры списка задач и их счетчики.
+
+Число задач по фильтру кэшируется под общей версией списка задач
+(``list_version``), которая меняется вместе с версией любой задачи.
+Вкладки списка читают все счетчики одним get_many; COUNT выполняется
+только для фильтров, чьих счетчиков нет в кэше, то есть после первого
+изменения задач и только при следующем показе списка.
+
+Кроме версии ключ включает дату (фильтр по сроку зависит от «сегодня»)
+и область видимости: проект или набор проектов пользователя.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.http import QueryDict
+from django.utils import timezone
+
+from task_manager.projects.membership import member_project_ids, visible_to
+from task_manager.tasks.filters import TaskFilter
+from task_manager.tasks.models import SavedFilter, Task
+from task_manager.tasks.versions import list_version
+
+SAVED_FILTER_COUNT_TIMEOUT = 24 * 60 * 60
+
+
+def clean_query(params):
+    # Сохраняются только параметры фильтра, пустые отбрасываются
+    query = QueryDict(mutable=True)
+    for name in TaskFilter.base_filters:
+        values = [value for value in params.getlist(name) if value]
+        if values:
+            query.setlist(name, values)
+    return query.urlencode()
+
+
+def saved_filters(user, project=None):
+    return SavedFilter.objects.filter(
+        owner=user,
+        project=project,
+    ).only("id", "name", "query").order_by("id")
+
+
+def scope_fingerprint(user, project=None):
+    if project is not None:
+        return f"p{project.pk}"
+    ids = ",".join(str(pk) for pk in sorted(member_project_ids(user)))
+    return hashlib.md5(ids.encode()).hexdigest()
+
+
+def count_key(saved, version, scope, today):
+    return f"tasks:saved_filter:{saved.pk}:{version}:{scope}:{today}"
+
+
+def filter_counts(filters, request, project=None, today=None):
+    """Возвращает {id фильтра: число задач}, считая только промахи кэша."""
+    if not filters:
+        return {}
+    if today is None:
+        today = timezone.localdate()
+    version = list_version()
+    scope = scope_fingerprint(request.user, project)
+    keys = {count_key(saved, version, scope, today): saved for saved in filters}
+    cached = cache.get_many(list(keys))
+
+    counts, missing = {}, {}
+    for key, saved in keys.items():
+        if key in cached:
+            counts[saved.pk] = cached[key]
+            continue
+        tasks = Task.objects.all()
+        if project is not None:
+            tasks = tasks.filter(project=project)
+        else:
+            tasks = visible_to(tasks, request.user)
+        count = TaskFilter(
+            QueryDict(saved.query),
+            queryset=tasks,
+            request=request,
+        ).qs.count()
+        counts[saved.pk] = missing[key] = count
+    if missing:
+        cache.set_many(missing, SAVED_FILTER_COUNT_TIMEOUT)
+    return counts
@@ -0,0 +1,144 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from task_manager.labels.models import Label
+from task_manager.statuses.models import Status
+from task_manager.tasks import history
+from task_manager.tasks.models import Task, TaskComment
+from task_manager.tasks.tree import ancestor_ids, lineage_ids
+from task_manager.tasks.versions import bump_comments, bump_names, bump_tasks
+
+TaskLabel = Task.labels.through
+
+HISTORY_KEYS = {"status_id": "s", "executor_id": "e"}
+
+# Архивация переносит задачи в обход ORM-сигналов удаления и создания,
+# поэтому подписчики (например, статистика) узнают о ней отсюда
+tasks_archived = Signal()  # rows, links
+task_restored = Signal()  # task, label_ids
+
+
+@receiver(post_save, sender=Task)
+def record_task_changes(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    history.record(instance.pk, {
+        HISTORY_KEYS[name]: list(values)
+        for name, values in instance.tracked_changes().items()
+        if name in HISTORY_KEYS
+    })
+
+
+@receiver(m2m_changed, sender=TaskLabel)
+def record_label_changes(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        if reverse:
+            pk_set = set(
+                TaskLabel.objects.filter(label_id=instance.pk)
+                .values_list("task_id", flat=True)
+            )
+        else:
+            pk_set = set(
+                TaskLabel.objects.filter(task_id=instance.pk)
+                .values_list("label_id", flat=True)
+            )
+        action = "post_remove"
+    if action not in ("post_add", "post_remove") or not pk_set:
+        return
+
+    added = action == "post_add"
+    if reverse:
+        diff = [[instance.pk], []] if added else [[], [instance.pk]]
+        for task_id in pk_set:
+            history.record(task_id, {"l": diff})
+    else:
+        ids = sorted(pk_set)
+        history.record(instance.pk, {"l": [ids, []] if added else [[], ids]})
+
+
+# Карточка задачи показывает путь к корню и поддерево, поэтому изменение
+# имени, статуса или родителя задевает карточки предков и потомков
+TREE_FIELDS = {"name", "status_id", "parent_id"}
+
+
+@receiver(post_save, sender=Task)
+def bump_task_version(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    changes = instance.tracked_changes()
+    if created:
+        task_ids = ancestor_ids(instance.pk) if instance.parent_id else {
+            instance.pk
+        }
+    elif TREE_FIELDS & set(changes):
+        task_ids = lineage_ids([instance.pk])
+        old_parent_id = changes.get("parent_id", (None,))[0]
+        if old_parent_id:
+            task_ids |= ancestor_ids(old_parent_id)
+    else:
+        task_ids = {instance.pk}
+    bump_tasks(task_ids)
+
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+def bump_commented_task(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_comments(instance.task_id)
+
+
+@receiver(post_delete, sender=Task)
+def bump_deleted_task(sender, instance, **kwargs):
+    task_ids = {instance.pk}
+    if instance.parent_id:
+        task_ids |= ancestor_ids(instance.parent_id)
+    bump_tasks(task_ids)
+
+
+@receiver(m2m_changed, sender=TaskLabel)
+def bump_labeled_tasks(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            bump_tasks([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        bump_tasks(pk_set or ())
+    elif action == "pre_clear":
+        bump_tasks(
+            TaskLabel.objects.filter(label_id=instance.pk)
+            .values_list("task_id", flat=True)
+        )
+
+
+@receiver(post_save, sender=Status)
+def bump_status_names(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        bump_names("statuses")
+
+
+@receiver(post_save, sender=Label)
+def bump_label_names(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        bump_names("labels")
+
+
+@receiver(post_save, sender=get_user_model())
+def bump_user_names(sender, instance, created, update_fields=None,
+                    raw=False, **kwargs):
+    if created or raw:
+        return
+    if update_fields and set(update_fields) <= {"last_login", "password"}:
+        return
+    bump_names("users")
+
+
+@receiver(tasks_archived, sender=Task)
+def bump_archived_tasks(sender, rows, **kwargs):
+    bump_tasks(row["id"] for row in rows)
+    parent_ids = {row["parent_id"] for row in rows if row["parent_id"]}
+    bump_tasks(lineage_ids(parent_ids))
+
+
+@receiver(task_restored, sender=Task)
+def bump_restored_task(sender, task, **kwargs):
+    bump_tasks(lineage_ids([task.pk]))
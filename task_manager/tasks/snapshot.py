@@ -0,0 +1,215 @@
+"""Снимок базы задач: потоковая выгрузка и загрузка.
+
+Формат — JSON Lines, сжатый gzip. Первая строка — заголовок формата,
+дальше по каждой таблице строка-объект ``{"model": ..., "fields": [...]}``
+и строки-массивы значений в порядке полей. В отличие от
+dumpdata/loaddata объекты не собираются в памяти целиком: выгрузка
+читает таблицы итератором, загрузка вставляет строки пачками одним
+INSERT на пачку.
+
+Таблицы идут в порядке зависимостей, а внешние ключи при загрузке
+проверяются один раз в конце (как в loaddata), поэтому ссылки задачи на
+родителя и порядок строк внутри таблицы значения не имеют. Загрузка
+выполняется только в пустые таблицы и одной транзакцией.
+
+Счетчик комментариев в снимок не входит (комментариев в нем нет), а
+производные данные — статистика, версии задач в кэше, кэш участников
+проектов — пересчитываются после загрузки.
+"""
+
+import datetime
+import decimal
+import gzip
+import json
+import uuid
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from task_manager.projects.membership import forget_members
+from task_manager.stats import rollups
+from task_manager.tasks.versions import bump_tasks
+
+FORMAT = "task_manager.snapshot"
+
+VERSION = 1
+
+SNAPSHOT_BATCH_SIZE = 2000
+
+# Порядок зависимостей: таблица ссылается только на таблицы выше
+MODELS = (
+    "auth.user",
+    "statuses.status",
+    "labels.label",
+    "projects.project",
+    "projects.project_members",
+    "tasks.task",
+    "tasks.task_labels",
+)
+
+EXCLUDED_FIELDS = {
+    "tasks.task": {"comment_count"},
+}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_models():
+    return [_model(label) for label in MODELS]
+
+
+def _model(label):
+    # Промежуточные таблицы M2M не зарегистрированы в apps по имени
+    app_label, name = label.split(".")
+    for model in apps.get_app_config(app_label).get_models(
+        include_auto_created=True,
+    ):
+        if model._meta.model_name == name:
+            return model
+    raise LookupError(label)
+
+
+def _fields(model):
+    excluded = EXCLUDED_FIELDS.get(model._meta.label_lower, set())
+    return [
+        field for field in model._meta.concrete_fields
+        if field.name not in excluded
+    ]
+
+
+def _encode(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} не сериализуется")
+
+
+def dump(path, batch_size=SNAPSHOT_BATCH_SIZE, compresslevel=6):
+    """Пишет снимок в файл, возвращает {модель: число строк}."""
+    counts = {}
+    encoder = json.JSONEncoder(
+        default=_encode,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    with gzip.open(
+        path, "wt", encoding="utf-8", compresslevel=compresslevel,
+    ) as out:
+        out.write(encoder.encode({"format": FORMAT, "version": VERSION}))
+        out.write("\n")
+        outer = connection.in_atomic_block
+        # Все таблицы читаются в одной транзакции. В PostgreSQL по
+        # умолчанию READ COMMITTED, и каждый запрос видел бы свой снимок
+        # базы: задача могла бы сослаться на пользователя, созданного уже
+        # после выгрузки таблицы пользователей
+        with transaction.atomic():
+            if connection.vendor == "postgresql" and not outer:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ "
+                        "READ ONLY"
+                    )
+            for model in snapshot_models():
+                label = model._meta.label_lower
+                attnames = [field.attname for field in _fields(model)]
+                out.write(encoder.encode(
+                    {"model": label, "fields": attnames}
+                ) + "\n")
+                rows = model._base_manager.order_by("pk").values_list(
+                    *attnames,
+                ).iterator(chunk_size=batch_size)
+                count = 0
+                for row in rows:
+                    out.write(encoder.encode(row) + "\n")
+                    count += 1
+                counts[label] = count
+    return counts
+
+
+def restore(path, batch_size=SNAPSHOT_BATCH_SIZE):
+    """Загружает снимок в пустые таблицы, возвращает {модель: число строк}."""
+    models = {model._meta.label_lower: model for model in snapshot_models()}
+    not_empty = [
+        label for label, model in models.items()
+        if model._base_manager.exists()
+    ]
+    if not_empty:
+        raise SnapshotError(
+            "Таблицы должны быть пустыми: " + ", ".join(not_empty)
+        )
+
+    counts = {}
+    with gzip.open(path, "rt", encoding="utf-8") as source:
+        header = json.loads(source.readline() or "null")
+        if header != {"format": FORMAT, "version": VERSION}:
+            raise SnapshotError("Файл не является снимком базы задач")
+        with transaction.atomic():
+            with connection.constraint_checks_disabled():
+                model = fields = None
+                batch = []
+                for line in source:
+                    item = json.loads(line)
+                    if isinstance(item, list):
+                        if model is None:
+                            raise SnapshotError(
+                                "Строка данных до заголовка таблицы"
+                            )
+                        batch.append(model(**dict(zip(fields, item))))
+                        if len(batch) >= batch_size:
+                            _insert(model, batch)
+                            counts[model._meta.label_lower] += len(batch)
+                            batch = []
+                        continue
+                    if batch:
+                        _insert(model, batch)
+                        counts[model._meta.label_lower] += len(batch)
+                        batch = []
+                    if not isinstance(item, dict) or (
+                        item.get("model") not in models
+                    ):
+                        raise SnapshotError(f"Неизвестная таблица {item!r}")
+                    model = models[item["model"]]
+                    fields = item["fields"]
+                    counts[item["model"]] = 0
+                if batch:
+                    _insert(model, batch)
+                    counts[model._meta.label_lower] += len(batch)
+            # Внешние ключи проверяются один раз после всех вставок
+            connection.check_constraints(
+                table_names=[model._meta.db_table for model in models.values()],
+            )
+            _reset_sequences(models.values())
+    _refresh_derived(models)
+    return counts
+
+
+def _insert(model, objs):
+    # raw=True: значения пишутся как есть, без auto_now_add и прочих
+    # pre_save — как при loaddata; сигналы не отправляются. Поля, которых
+    # нет в снимке, получают значения по умолчанию модели
+    fields = model._meta.concrete_fields
+    queryset = model._base_manager.using(connection.alias)
+    size = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+    for start in range(0, len(objs), size):
+        queryset._insert(objs[start:start + size], fields=fields, raw=True)
+
+
+def _reset_sequences(models):
+    statements = connection.ops.sequence_reset_sql(no_style(), list(models))
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def _refresh_derived(models):
+    rollups.rebuild()
+    task = models["tasks.task"]
+    bump_tasks(task._base_manager.values_list("id", flat=True).iterator())
+    forget_members(
+        models["auth.user"]._base_manager.values_list("id", flat=True)
+    )
@@ -0,0 +1,177 @@
+"""Дерево подзадач.
+
+Поддерево задачи и путь к корню загружаются одним рекурсивным CTE,
+счетчики подзадач по статусам считаются по тем же строкам. Глубина
+обхода ограничена, поэтому испорченные данные с циклом не зациклят
+запрос. Сам цикл не дает записать форма задачи: родитель принимается,
+только если путь от него до корня пройден целиком (``ancestor_path``),
+то есть цепочка не глубже MAX_TREE_DEPTH.
+"""
+
+from collections import Counter
+
+from django.db import connection
+
+from task_manager.statuses.models import Status
+from task_manager.tasks.models import Task
+
+MAX_TREE_DEPTH = 50
+
+LINEAGE_BATCH_SIZE = 400
+
+_TREE_SQL = """
+WITH RECURSIVE
+    subtree(id, depth) AS (
+        SELECT id, 0 FROM {task} WHERE id = %(root)s
+        UNION ALL
+        SELECT t.id, s.depth + 1
+        FROM {task} t JOIN subtree s ON t.parent_id = s.id
+        WHERE s.depth < %(limit)s
+    ),
+    ancestors(id, parent_id, depth) AS (
+        SELECT id, parent_id, 0 FROM {task} WHERE id = %(root)s
+        UNION ALL
+        SELECT t.id, t.parent_id, a.depth - 1
+        FROM {task} t JOIN ancestors a ON t.id = a.parent_id
+        WHERE a.depth > -%(limit)s
+    ),
+    nodes(id, depth) AS (
+        SELECT id, depth FROM subtree
+        UNION
+        SELECT id, depth FROM ancestors WHERE depth < 0
+    )
+SELECT t.id, t.name, t.parent_id, t.status_id, st.name, n.depth
+FROM nodes n
+JOIN {task} t ON t.id = n.id
+JOIN {status} st ON st.id = t.status_id
+ORDER BY n.depth, t.id
+"""
+
+_LINEAGE_SQL = """
+WITH RECURSIVE
+    down(id, depth) AS (
+        SELECT id, 0 FROM {task} WHERE id IN ({seeds})
+        UNION ALL
+        SELECT t.id, d.depth + 1
+        FROM {task} t JOIN down d ON t.parent_id = d.id
+        WHERE d.depth < %s
+    ),
+    up(id, parent_id, depth) AS (
+        SELECT id, parent_id, 0 FROM {task} WHERE id IN ({seeds})
+        UNION ALL
+        SELECT t.id, t.parent_id, u.depth + 1
+        FROM {task} t JOIN up u ON t.id = u.parent_id
+        WHERE u.depth < %s
+    )
+SELECT id FROM down UNION SELECT id FROM up
+"""
+
+_ANCESTORS_SQL = """
+WITH RECURSIVE up(id, parent_id, depth) AS (
+    SELECT id, parent_id, 0 FROM {task} WHERE id = %s
+    UNION ALL
+    SELECT t.id, t.parent_id, u.depth + 1
+    FROM {task} t JOIN up u ON t.id = u.parent_id
+    WHERE u.depth < %s
+)
+SELECT id, parent_id FROM up
+"""
+
+
+def _tables():
+    quote = connection.ops.quote_name
+    return {
+        "task": quote(Task._meta.db_table),
+        "status": quote(Status._meta.db_table),
+    }
+
+
+class TreeNode:
+    def __init__(self, id, name, parent_id, status_id, status_name, depth):
+        self.id = id
+        self.name = name
+        self.parent_id = parent_id
+        self.status_id = status_id
+        self.status_name = status_name
+        self.depth = depth
+        self.children = []
+        # Все потомки узла по имени статуса
+        self.rollup = Counter()
+
+    @property
+    def rollup_items(self):
+        return sorted(self.rollup.items())
+
+
+def load_tree(task_id, limit=MAX_TREE_DEPTH):
+    """Возвращает (путь от корня без самой задачи, узлы поддерева в
+    порядке обхода, корень поддерева)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _TREE_SQL.format(**_tables()),
+            {"root": task_id, "limit": limit},
+        )
+        rows = cursor.fetchall()
+
+    nodes = {}
+    ancestors = []
+    for row in rows:
+        node = TreeNode(*row)
+        if node.depth < 0:
+            ancestors.append(node)
+        else:
+            nodes[node.id] = node
+    ancestors.sort(key=lambda node: node.depth)
+
+    root = nodes.get(task_id)
+    if root is None:
+        return ancestors, [], None
+    for node in nodes.values():
+        parent = nodes.get(node.parent_id)
+        if parent is not None and node is not root:
+            parent.children.append(node)
+
+    ordered = []
+
+    def walk(node):
+        ordered.append(node)
+        for child in sorted(node.children, key=lambda child: child.id):
+            walk(child)
+            node.rollup[child.status_name] += 1
+            node.rollup.update(child.rollup)
+
+    walk(root)
+    return ancestors, ordered[1:], root
+
+
+def lineage_ids(task_ids, limit=MAX_TREE_DEPTH):
+    # Задачи вместе со всеми предками и потомками
+    task_ids = list(task_ids)
+    found = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(task_ids), LINEAGE_BATCH_SIZE):
+            batch = task_ids[start:start + LINEAGE_BATCH_SIZE]
+            seeds = ", ".join(["%s"] * len(batch))
+            cursor.execute(
+                _LINEAGE_SQL.format(seeds=seeds, **_tables()),
+                [*batch, limit, *batch, limit],
+            )
+            found.update(row[0] for row in cursor.fetchall())
+    return found
+
+
+def ancestor_path(task_id, limit=MAX_TREE_DEPTH):
+    """Возвращает (задача и ее предки, дошел ли обход до корня)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _ANCESTORS_SQL.format(**_tables()),
+            [task_id, limit],
+        )
+        rows = cursor.fetchall()
+    return {row[0] for row in rows}, any(row[1] is None for row in rows)
+
+
+def ancestor_ids(task_id, limit=MAX_TREE_DEPTH):
+    # Сама задача и ее предки
+    return ancestor_path(task_id, limit)[0]
+
@@ -2,16 +2,44 @@ from django.urls import path
 
 from task_manager.tasks.views import (
     TaskListView,
+    TaskBoardView,
+    TaskBoardColumnView,
     TaskCreateView,
     TaskUpdateView,
     TaskDeleteView,
     TaskDetailView,
+    TaskCommentCreateView,
+    SavedFilterCreateView,
+    SavedFilterDeleteView,
+    ArchivedTaskDetailView,
+    ArchivedTaskRestoreView,
 )
 
 urlpatterns = [
     path("", TaskListView.as_view(), name="tasks_list"),
+    path("board/", TaskBoardView.as_view(), name="tasks_board"),
+    path(
+        "board/<int:status_id>/",
+        TaskBoardColumnView.as_view(),
+        name="tasks_board_column",
+    ),
     path("create/", TaskCreateView.as_view(), name="task_create"),
+    path(
+        "filters/",
+        SavedFilterCreateView.as_view(),
+        name="saved_filter_create",
+    ),
+    path(
+        "filters/<int:pk>/delete/",
+        SavedFilterDeleteView.as_view(),
+        name="saved_filter_delete",
+    ),
     path("<int:pk>/", TaskDetailView.as_view(), name="task_show"),
+    path(
+        "<int:pk>/comments/",
+        TaskCommentCreateView.as_view(),
+        name="task_comment_create",
+    ),
     path(
         "<int:pk>/update/",
         TaskUpdateView.as_view(),
@@ -22,4 +50,14 @@ urlpatterns = [
         TaskDeleteView.as_view(),
         name="task_delete",
     ),
+    path(
+        "archive/<int:pk>/",
+        ArchivedTaskDetailView.as_view(),
+        name="archived_task_show",
+    ),
+    path(
+        "archive/<int:pk>/restore/",
+        ArchivedTaskRestoreView.as_view(),
+        name="archived_task_restore",
+    ),
 ]
\ No newline at end of file
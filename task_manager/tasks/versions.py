@@ -0,0 +1,78 @@
+"""Версии задач для кэша страницы задачи.
+
+Версия хранится в кэше и меняется при любом изменении задачи и ее
+меток. Ключ кэша страницы включает версию, поэтому старые страницы
+просто перестают запрашиваться. У ленты комментариев своя версия.
+
+Имена статусов, меток и пользователей видны на карточках многих задач.
+Вместо того чтобы при переименовании менять версию каждой такой задачи,
+ключ карточки включает еще и общую версию справочника: переименование
+стоит одной записи в кэш, а карточки всех задач пересобираются при
+следующем показе.
+
+Вместе с версиями задач меняется общая версия списка задач: от нее
+зависят закэшированные результаты запросов по многим задачам
+(счетчики сохраненных фильтров).
+"""
+
+from task_manager.cache_versions import bump, bump_many, version, versions
+
+TASK_PAGE_TIMEOUT = 24 * 60 * 60
+
+LIST_NAMESPACE = "tasks:list"
+
+# Справочники, имена из которых показывает карточка задачи
+NAMES = ("statuses", "labels", "users")
+
+
+def _namespace(task_id):
+    return f"task:{task_id}"
+
+
+def task_version(task_id):
+    return version(_namespace(task_id))
+
+
+def list_version():
+    return version(LIST_NAMESPACE)
+
+
+def _bumped(task_ids):
+    changed = False
+    for task_id in task_ids:
+        changed = True
+        yield _namespace(task_id)
+    if changed:
+        yield LIST_NAMESPACE
+
+
+def bump_tasks(task_ids):
+    # Одна операция set_many на пачку задач
+    bump_many(_bumped(task_ids))
+
+
+def bump_names(directory):
+    bump(f"tasks:names:{directory}")
+
+
+def _key_version(namespaces):
+    found = versions(namespaces)
+    return ".".join(str(found[namespace]) for namespace in namespaces)
+
+
+def page_key(task_id, history_before=None):
+    version = _key_version([_namespace(task_id)] + [
+        f"tasks:names:{directory}" for directory in NAMES
+    ])
+    return f"task:{task_id}:card:{version}:{history_before or ''}"
+
+
+def bump_comments(task_id):
+    bump(f"task:{task_id}:comments")
+
+
+def comments_key(task_id, before=None):
+    # У комментариев своя версия: новый комментарий не сбрасывает
+    # карточку задачи и счетчики списка
+    version = _key_version([f"task:{task_id}:comments", "tasks:names:users"])
+    return f"task:{task_id}:comments:{version}:{before or ''}"
@@ -1,51 +1,331 @@
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.forms import ModelForm
-from django.shortcuts import redirect
-from django.urls import reverse_lazy
-from django.views.generic import CreateView, DeleteView, DetailView, UpdateView
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Prefetch
+from django.forms import (
+    DateInput,
+    ModelForm,
+    NumberInput,
+    Textarea,
+    TextInput,
+)
+from django.http import Http404, JsonResponse, QueryDict
+from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
+from django.views import View
+from django.views.generic import (
+    CreateView,
+    DeleteView,
+    DetailView,
+    TemplateView,
+    UpdateView,
+)
 from django_filters.views import FilterView
 
-from task_manager.tasks.filters import TaskFilter
-from task_manager.tasks.models import Task
+from task_manager.attachments.models import Attachment
+from task_manager.attachments.storage import task_usage
+from task_manager.labels.models import Label
+from task_manager.projections import task_list_queryset
+from task_manager.projects.membership import is_member, visible_to
+from task_manager.projects.models import Project
+from task_manager.tasks.archive import restore_task
+from task_manager.tasks.board import (
+    board_queryset,
+    load_board,
+    load_column,
+    serialize_card,
+)
+from task_manager.tasks.comments import add_comment, comments_page
+from task_manager.tasks.filters import ArchivedTaskFilter, TaskFilter
+from task_manager.tasks.history import describe, history_page
+from task_manager.tasks.models import (
+    ArchivedTask,
+    SavedFilter,
+    Task,
+    TaskComment,
+)
+from task_manager.tasks.saved_filters import (
+    clean_query,
+    filter_counts,
+    saved_filters,
+)
+from task_manager.tasks.tree import MAX_TREE_DEPTH, ancestor_path, load_tree
+from task_manager.tasks.versions import (
+    TASK_PAGE_TIMEOUT,
+    comments_key,
+    page_key,
+)
+from task_manager.users.views import user_label
 from task_manager.views.mixins import SafeDeleteWithProtectedErrorMixin
+from task_manager.widgets import AutocompleteSelect, AutocompleteSelectMultiple
 
 
 class TaskForm(ModelForm):
     class Meta:
         model = Task
-        fields = ["name", "description", "status", "executor", "labels"]
+        fields = [
+            "name",
+            "description",
+            "status",
+            "executor",
+            "labels",
+            "due_date",
+            "parent",
+        ]
+        widgets = {
+            "due_date": DateInput(
+                format="%Y-%m-%d",
+                attrs={"class": "form-control", "type": "date"},
+            ),
+            # Номер задачи вместо списка всех задач
+            "parent": NumberInput(attrs={"class": "form-control", "min": 1}),
+            "executor": AutocompleteSelect(
+                reverse_lazy("users_autocomplete"),
+                attrs={"class": "form-select"},
+            ),
+            "labels": AutocompleteSelectMultiple(
+                reverse_lazy("labels_autocomplete"),
+                attrs={"class": "form-select"},
+            ),
+        }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         user_model = get_user_model()
         self.fields["executor"].queryset = user_model.objects.all()
+        self.fields["executor"].label_from_instance = user_label
+        self.fields["parent"].queryset = Task.objects.only("id", "project_id")
+
+    def clean_parent(self):
+        parent = self.cleaned_data.get("parent")
+        if parent is None:
+            return parent
+        task = self.instance
+        if parent.project_id != task.project_id:
+            raise ValidationError(
+                "Родительская задача должна быть в том же проекте"
+            )
+        # Цикл возникает, только если задача — предок нового родителя:
+        # один рекурсивный запрос по цепочке его предков. Обход ограничен
+        # глубиной, и непройденная до корня цепочка могла бы скрыть цикл
+        ancestors, complete = ancestor_path(parent.pk)
+        if not complete:
+            raise ValidationError(
+                f"Вложенность подзадач не может быть больше {MAX_TREE_DEPTH}"
+            )
+        if task.pk and task.pk in ancestors:
+            raise ValidationError(
+                "Задача не может быть подзадачей самой себя или своих подзадач"
+            )
+        return parent
+
+    def save(self, commit=True):
+        if not commit or self.errors:
+            return super().save(commit=commit)
+
+        task = self.instance
+        adding = task._state.adding
+        with transaction.atomic():
+            task.save_changes()
+            # Текущие метки уже загружены формой в initial
+            current = () if adding else [
+                label.pk for label in self.initial.get("labels", [])
+            ]
+            task.apply_labels(
+                [label.pk for label in self.cleaned_data["labels"]],
+                current_ids=current,
+            )
+        return task
+
+
+class CommentForm(ModelForm):
+    class Meta:
+        model = TaskComment
+        fields = ["text"]
+        widgets = {
+            "text": Textarea(attrs={"class": "form-control", "rows": 3}),
+        }
+
+
+class SavedFilterForm(ModelForm):
+    class Meta:
+        model = SavedFilter
+        fields = ["name"]
+        widgets = {
+            "name": TextInput(attrs={
+                "class": "form-control",
+                "placeholder": "Название фильтра",
+            }),
+        }
+
+
+def cursor_param(request, name):
+    value = request.GET.get(name)
+    return int(value) if value and value.isdigit() else None
+
+
+class ProjectScopeMixin:
+    # Проект берется из URL (projects/<slug>/tasks/...); без него видны
+    # общие задачи и задачи проектов, где пользователь участник
+    project = None
 
-        def _label(user):
-            full_name = f"{user.first_name} {user.last_name}".strip()
-            return full_name or user.get_username()
+    def dispatch(self, request, *args, **kwargs):
+        slug = kwargs.pop("project", None)
+        if slug is not None:
+            self.project = get_object_or_404(Project, slug=slug)
+            if not is_member(request.user, self.project.pk):
+                raise Http404
+        return super().dispatch(request, *args, **kwargs)
 
-        self.fields["executor"].label_from_instance = _label
+    def scope(self, queryset):
+        if self.project is not None:
+            return queryset.filter(project=self.project)
+        return visible_to(queryset, self.request.user)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["project"] = self.project
+        return context
 
-class TaskListView(LoginRequiredMixin, FilterView):
+
+class TaskListView(LoginRequiredMixin, ProjectScopeMixin, FilterView):
     model = Task
     template_name = "tasks/list.html"
     context_object_name = "tasks"
     filterset_class = TaskFilter
-    queryset = (
-        Task.objects.select_related("status", "author", "executor")
-        .prefetch_related("labels")
-        .order_by("id")
-    )
+
+    def get_queryset(self):
+        return self.scope(task_list_queryset(Task)).order_by("id")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Счетчики вкладок берутся из кэша, COUNT только для промахов
+        tabs = list(saved_filters(self.request.user, self.project))
+        counts = filter_counts(tabs, self.request, self.project)
+        query = clean_query(self.request.GET)
+        for saved in tabs:
+            saved.count = counts[saved.pk]
+            saved.active = saved.query == query
+        context["saved_filters"] = tabs
+        context["filter_query"] = query
+        context["saved_filter_form"] = SavedFilterForm()
+        if self.filterset.archive_requested:
+            context["archived_tasks"] = ArchivedTaskFilter(
+                self.request.GET,
+                queryset=self.scope(
+                    task_list_queryset(ArchivedTask)
+                ).order_by("id"),
+                request=self.request,
+            ).qs
+        return context
+
+
+def tasks_list_url(project, query=""):
+    if project is not None:
+        url = reverse("project_tasks_list", args=[project.slug])
+    else:
+        url = reverse("tasks_list")
+    return f"{url}?{query}" if query else url
+
+
+class SavedFilterCreateView(LoginRequiredMixin, ProjectScopeMixin, View):
+    http_method_names = ["post"]
+
+    def post(self, request):
+        form = SavedFilterForm(request.POST)
+        query = clean_query(QueryDict(request.POST.get("query", "")))
+        if form.is_valid():
+            form.instance.owner = request.user
+            form.instance.project = self.project
+            form.instance.query = query
+            form.save()
+            messages.success(request, "Фильтр сохранен")
+        else:
+            messages.error(request, "Укажите название фильтра")
+        return redirect(tasks_list_url(self.project, query))
+
+
+class SavedFilterDeleteView(LoginRequiredMixin, View):
+    http_method_names = ["post"]
+
+    def post(self, request, pk):
+        saved = get_object_or_404(
+            SavedFilter.objects.select_related("project"),
+            pk=pk,
+            owner=request.user,
+        )
+        saved.delete()
+        messages.success(request, "Фильтр удален")
+        return redirect(tasks_list_url(saved.project))
+
+
+class TaskBoardMixin(ProjectScopeMixin):
+    def get_filterset(self):
+        return TaskFilter(
+            self.request.GET or None,
+            queryset=self.scope(board_queryset()),
+            request=self.request,
+        )
 
 
-class TaskCreateView(LoginRequiredMixin, CreateView):
+class TaskBoardView(LoginRequiredMixin, TaskBoardMixin, TemplateView):
+    template_name = "tasks/board.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        filterset = self.get_filterset()
+        context["filter"] = filterset
+        context["columns"] = load_board(filterset.qs)
+        context["query"] = self.request.GET.urlencode()
+        return context
+
+
+class TaskBoardColumnView(LoginRequiredMixin, TaskBoardMixin, View):
+    def get(self, request, status_id):
+        after = request.GET.get("after")
+        if after is not None:
+            try:
+                after = int(after)
+            except ValueError:
+                raise Http404
+        tasks, has_more = load_column(
+            self.get_filterset().qs,
+            status_id,
+            after=after,
+        )
+        return JsonResponse({
+            "cards": [serialize_card(task) for task in tasks],
+            "cursor": tasks[-1].id if tasks else None,
+            "has_more": has_more,
+        })
+
+
+class TaskCreateView(LoginRequiredMixin, ProjectScopeMixin, CreateView):
     model = Task
     form_class = TaskForm
     template_name = "tasks/form.html"
-    success_url = reverse_lazy("tasks_list")
+
+    def get_initial(self):
+        initial = super().get_initial()
+        parent = self.request.GET.get("parent", "")
+        if parent.isdigit():
+            initial["parent"] = int(parent)
+        return initial
+
+    def get_form(self, form_class=None):
+        # Проект нужен форме до сохранения: родитель проверяется по нему
+        form = super().get_form(form_class)
+        form.instance.project = self.project
+        return form
+
+    def get_success_url(self):
+        if self.project is not None:
+            return reverse("project_tasks_list", args=[self.project.slug])
+        return reverse("tasks_list")
 
     def form_valid(self, form):
         form.instance.author = self.request.user
@@ -57,6 +337,90 @@ class TaskDetailView(LoginRequiredMixin, DetailView):
     model = Task
     template_name = "tasks/show.html"
     context_object_name = "task"
+    # Задача со статусом и пользователями одним JOIN, метки вторым запросом
+    queryset = Task.objects.select_related(
+        "status", "author", "executor", "project"
+    ).prefetch_related(
+        Prefetch("labels", queryset=Label.objects.only("id", "name")),
+    )
+
+    def get(self, request, *args, **kwargs):
+        before = cursor_param(request, "history_before")
+        # Карточка задачи не зависит от пользователя, поэтому кэшируется
+        # целиком под версией задачи; макет страницы рендерится как обычно
+        key = page_key(kwargs["pk"], before)
+        cached = cache.get(key)
+        if cached is None:
+            try:
+                self.object = self.get_object()
+            except Http404:
+                archived = visible_to(ArchivedTask.objects, request.user)
+                if archived.filter(pk=kwargs["pk"]).exists():
+                    return redirect("archived_task_show", pk=kwargs["pk"])
+                raise
+            cached = (self.object.project_id, self.render_card(before))
+            cache.set(key, cached, TASK_PAGE_TIMEOUT)
+        project_id, card = cached
+        # Доступ проверяется и для страницы из кэша
+        if project_id is not None and not is_member(request.user, project_id):
+            raise Http404
+
+        # Комментарии кэшируются отдельно: у них свой курсор
+        comments_before = cursor_param(request, "comments_before")
+        key = comments_key(kwargs["pk"], comments_before)
+        comments = cache.get(key)
+        if comments is None:
+            comments = self.render_comments(kwargs["pk"], comments_before)
+            cache.set(key, comments, TASK_PAGE_TIMEOUT)
+        return self.render_to_response({
+            "task_id": kwargs["pk"],
+            "card": card,
+            "comments": comments,
+            "comment_form": CommentForm(),
+        })
+
+    def get_queryset(self):
+        return visible_to(super().get_queryset(), self.request.user)
+
+    def render_card(self, before):
+        entries, cursor = history_page(self.object, before=before)
+        ancestors, subtasks, root = load_tree(self.object.pk)
+        return render_to_string("tasks/card.html", {
+            "task": self.object,
+            "ancestors": ancestors,
+            "subtasks": subtasks,
+            "rollup": root.rollup_items if root else [],
+            "history": describe(entries),
+            "history_cursor": cursor,
+            "attachments": Attachment.objects.filter(
+                task_id=self.object.pk,
+            ).only("id", "task_id", "name", "size").order_by("id"),
+            "attachments_size": task_usage(self.object.pk),
+        })
+
+    def render_comments(self, task_id, before):
+        comments, cursor = comments_page(task_id, before=before)
+        return render_to_string("tasks/comments.html", {
+            "comments": comments,
+            "comments_cursor": cursor,
+        })
+
+
+class TaskCommentCreateView(LoginRequiredMixin, View):
+    http_method_names = ["post"]
+
+    def post(self, request, pk):
+        task = get_object_or_404(
+            visible_to(Task.objects.only("id", "project_id"), request.user),
+            pk=pk,
+        )
+        form = CommentForm(request.POST)
+        if form.is_valid():
+            add_comment(task.pk, request.user, form.cleaned_data["text"])
+            messages.success(request, "Комментарий добавлен")
+        else:
+            messages.error(request, "Комментарий не может быть пустым")
+        return redirect("task_show", pk=task.pk)
 
 
 class TaskUpdateView(LoginRequiredMixin, UpdateView):
@@ -65,11 +429,37 @@ class TaskUpdateView(LoginRequiredMixin, UpdateView):
     template_name = "tasks/form.html"
     success_url = reverse_lazy("tasks_list")
 
+    def get_queryset(self):
+        return visible_to(super().get_queryset(), self.request.user)
+
     def form_valid(self, form):
         messages.success(self.request, "Задача успешно изменена")
         return super().form_valid(form)
 
 
+class ArchivedTaskDetailView(LoginRequiredMixin, DetailView):
+    model = ArchivedTask
+    template_name = "tasks/archived_show.html"
+    context_object_name = "task"
+    queryset = ArchivedTask.objects.select_related(
+        "status", "author", "executor"
+    ).prefetch_related("labels")
+
+    def get_queryset(self):
+        return visible_to(super().get_queryset(), self.request.user)
+
+
+class ArchivedTaskRestoreView(LoginRequiredMixin, View):
+    http_method_names = ["post"]
+
+    def post(self, request, pk):
+        task = restore_task(get_object_or_404(
+            visible_to(ArchivedTask.objects, request.user), pk=pk,
+        ))
+        messages.success(request, "Задача восстановлена из архива")
+        return redirect("task_show", pk=task.pk)
+
+
 class OnlyAuthorMixin(UserPassesTestMixin):
     def test_func(self):
         obj = self.get_object()
@@ -94,4 +484,7 @@ class TaskDeleteView(
     protected_error_message = (
         "Невозможно удалить задачу, потому что она используется"
     )
-    success_message = "Задача успешно удалена"
\ No newline at end of file
+    success_message = "Задача успешно удалена"
+
+    def get_queryset(self):
+        return visible_to(super().get_queryset(), self.request.user)
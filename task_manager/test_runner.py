@@ -0,0 +1,44 @@
+"""Запуск тестов.
+
+По умолчанию кэш файловый и общий для всех процессов на машине (см.
+CACHES в настройках), а тесты чистят его через cache.clear(). Чтобы
+тесты не сбрасывали кэш запущенного рядом сервера и не читали его
+значения, на время прогона кэш заменяется кэшем в памяти процесса.
+
+По той же причине метрики пишутся не в общий METRICS_DIR, а во
+временный каталог прогона, который удаляется после тестов.
+"""
+
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from task_manager.metrics import store
+
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "task_manager_tests",
+    }
+}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._metrics_dir = tempfile.mkdtemp(prefix="task_manager_metrics_")
+        self._test_settings = override_settings(
+            CACHES=TEST_CACHES,
+            METRICS_DIR=self._metrics_dir,
+        )
+        self._test_settings.enable()
+        # Файл метрик, открытый до подмены каталога, больше не пишется
+        store.reset()
+
+    def teardown_test_environment(self, **kwargs):
+        store.reset()
+        self._test_settings.disable()
+        shutil.rmtree(self._metrics_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
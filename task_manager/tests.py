@@ -1,10 +1,102 @@
-from django.test import TestCase
+import email
+import gzip
+import hashlib
+import json
+import os
+import runpy
+import shutil
+import socketserver
+import tempfile
+import threading
+import zlib
+from email import policy
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
 from django.urls import reverse
 from django.contrib.auth.models import User
 from django.conf import settings
-from task_manager.tasks.models import Task
+from django.core.exceptions import ImproperlyConfigured
+from django.db import (
+    IntegrityError,
+    OperationalError,
+    connection,
+    transaction,
+)
+from django.test.utils import CaptureQueriesContext
+from django.template import engines
+from django.utils import timezone
+from task_manager import compression
+from task_manager.attachments.models import (
+    Attachment,
+    Blob,
+    TaskStorage,
+    UserStorage,
+)
+from task_manager.attachments.storage import blob_path
+from task_manager.compression import CompressionMiddleware
+from task_manager.tasks.history import HISTORY_PAGE_SIZE
+from task_manager.tasks.models import (
+    ArchivedTask,
+    SavedFilter,
+    Task,
+    TaskChange,
+    TaskComment,
+)
 from task_manager.statuses.models import Status
+from task_manager.projects.membership import member_project_ids
+from task_manager.projects.models import Project
 from task_manager.labels.models import Label
+from task_manager.jobs import queue
+from task_manager.jobs.models import Job
+from task_manager.metrics import access_log
+from task_manager.metrics import store as metrics_store
+from task_manager.jobs.queue import (
+    claim,
+    enqueue,
+    execute,
+    job,
+    requeue_stale,
+    schedule_periodic,
+)
+from task_manager.notifications.models import OutboxMessage
+from task_manager.notifications.outbox import MAX_ATTEMPTS, deliver
+from task_manager.tasks import archive
+from task_manager.tasks.archive import archive_tasks, restore_task
+from task_manager.tasks.board import BOARD_COLUMN_SIZE
+from task_manager.tasks.comments import COMMENTS_PAGE_SIZE, add_comment
+from task_manager.tasks import reminders
+from task_manager.tasks.reminders import send_reminders
+from task_manager.tasks.saved_filters import filter_counts
+from task_manager.tasks.snapshot import snapshot_models
+from task_manager.tasks.tree import MAX_TREE_DEPTH, load_tree
+from task_manager.tasks.versions import comments_key, page_key
+from task_manager.users.hashers import PBKDF2PasswordHasher, hash_slots
+from task_manager.users.importing import ImportResult, _insert
+from task_manager.users.throttling import RateLimit
+from task_manager.users.views import USERS_PAGE_SIZE
+from task_manager.warmup import warm_up
+from task_manager.stats.models import (
+    DailyTaskCount,
+    ExecutorTaskCount,
+    LabelTaskCount,
+    StatusTaskCount,
+)
 
 
 class UsersCrudTests(TestCase):
@@ -402,4 +494,2538 @@ class TasksFilterTests(TestCase):
         self.client.login(username="author_f", password="StrongPass123")
         response = self.client.get("/tasks/", {"self_tasks": "on"})
         self.assertContains(response, "T1_f")
-        self.assertNotContains(response, "T2_f")
\ No newline at end of file
+        self.assertNotContains(response, "T2_f")
+
+
+class TaskBoardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="board",
+            password="StrongPass123",
+        )
+        self.new = Status.objects.create(name="Новый_b")
+        self.done = Status.objects.create(name="Готово_b")
+        self.label = Label.objects.create(name="L_b")
+        self.client.login(username="board", password="StrongPass123")
+
+    def _create_tasks(self, status, count, **kwargs):
+        return [
+            Task.objects.create(
+                name=f"{status.name}-{i}",
+                status=status,
+                author=self.user,
+                **kwargs,
+            )
+            for i in range(count)
+        ]
+
+    def _board_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("tasks_board"))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_board_query_count_does_not_depend_on_tasks(self):
+        self._create_tasks(self.new, 2)
+        small = self._board_queries()
+
+        for task in self._create_tasks(self.done, BOARD_COLUMN_SIZE + 5):
+            task.labels.add(self.label)
+        self._create_tasks(self.new, 10)
+
+        self.assertEqual(self._board_queries(), small)
+
+    def test_board_caps_columns_and_counts_all_tasks(self):
+        self._create_tasks(self.done, BOARD_COLUMN_SIZE + 3)
+
+        response = self.client.get(reverse("tasks_board"))
+        columns = {c["status"].id: c for c in response.context["columns"]}
+
+        self.assertEqual(
+            len(columns[self.done.id]["tasks"]),
+            BOARD_COLUMN_SIZE,
+        )
+        self.assertEqual(columns[self.done.id]["total"], BOARD_COLUMN_SIZE + 3)
+        self.assertTrue(columns[self.done.id]["has_more"])
+        self.assertEqual(columns[self.new.id]["tasks"], [])
+        self.assertContains(
+            response,
+            f'data-task-url="{reverse("task_show", args=[0])}"',
+        )
+
+    def test_board_column_cursor(self):
+        tasks = self._create_tasks(self.done, BOARD_COLUMN_SIZE + 3)
+        cursor = tasks[BOARD_COLUMN_SIZE - 1].id
+
+        response = self.client.get(
+            reverse("tasks_board_column", args=[self.done.id]),
+            {"after": cursor},
+        )
+        data = response.json()
+
+        self.assertEqual(
+            [card["id"] for card in data["cards"]],
+            [task.id for task in tasks[BOARD_COLUMN_SIZE:]],
+        )
+        self.assertFalse(data["has_more"])
+
+    def test_board_respects_filter(self):
+        labeled = self._create_tasks(self.new, 1)[0]
+        labeled.labels.add(self.label)
+        self._create_tasks(self.new, 2)
+
+        response = self.client.get(
+            reverse("tasks_board"),
+            {"label": self.label.id},
+        )
+        columns = {c["status"].id: c for c in response.context["columns"]}
+
+        self.assertEqual(columns[self.new.id]["tasks"], [labeled])
+        self.assertEqual(columns[self.new.id]["total"], 1)
+
+
+class StatsRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="stats",
+            password="StrongPass123",
+        )
+        self.other = User.objects.create_user(username="stats_other")
+        self.new = Status.objects.create(name="Новый_s")
+        self.done = Status.objects.create(name="Готово_s")
+        self.label_1 = Label.objects.create(name="L1_s")
+        self.label_2 = Label.objects.create(name="L2_s")
+
+    def _snapshot(self):
+        return {
+            "status": set(
+                StatusTaskCount.objects.filter(count__gt=0)
+                .values_list("status_id", "count")
+            ),
+            "executor": set(
+                ExecutorTaskCount.objects.filter(count__gt=0)
+                .values_list("executor_id", "count")
+            ),
+            "label": set(
+                LabelTaskCount.objects.filter(count__gt=0)
+                .values_list("label_id", "count")
+            ),
+            "day": set(
+                DailyTaskCount.objects.filter(count__gt=0)
+                .values_list("date", "count")
+            ),
+        }
+
+    def test_incremental_rollups_match_rebuild(self):
+        t1 = Task.objects.create(
+            name="T1", status=self.new, author=self.user, executor=self.user,
+        )
+        t2 = Task.objects.create(name="T2", status=self.new, author=self.user)
+        t3 = Task.objects.create(
+            name="T3", status=self.done, author=self.user, executor=self.other,
+        )
+        t1.labels.add(self.label_1, self.label_2)
+        t2.labels.add(self.label_1)
+        self.label_2.tasks.add(t3)
+
+        t1 = Task.objects.get(pk=t1.pk)
+        t1.status = self.done
+        t1.executor = self.other
+        t1.save()
+        t1.labels.set([self.label_2])
+        t2.labels.clear()
+        t3.delete()
+
+        incremental = self._snapshot()
+        self.assertEqual(
+            incremental["status"],
+            {(self.new.id, 1), (self.done.id, 1)},
+        )
+        self.assertEqual(incremental["executor"], {(self.other.id, 1)})
+        self.assertEqual(incremental["label"], {(self.label_2.id, 1)})
+
+        call_command("rebuild_stats", stdout=StringIO())
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_dashboard_query_count_does_not_depend_on_tasks(self):
+        self.client.login(username="stats", password="StrongPass123")
+
+        def dashboard_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse("stats_dashboard"))
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        Task.objects.create(name="T", status=self.new, author=self.user)
+        small = dashboard_queries()
+        for i in range(20):
+            task = Task.objects.create(
+                name=f"T{i}",
+                status=self.done,
+                author=self.user,
+                executor=self.other,
+            )
+            task.labels.add(self.label_1)
+
+        self.assertEqual(dashboard_queries(), small)
+        response = self.client.get(reverse("stats_dashboard"))
+        self.assertEqual(response.context["total"], 21)
+        self.assertEqual(response.context["unassigned"], 1)
+
+
+class TaskHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="hist",
+            password="StrongPass123",
+        )
+        self.new = Status.objects.create(name="Новый_h")
+        self.done = Status.objects.create(name="Готово_h")
+        self.label_1 = Label.objects.create(name="L1_h")
+        self.label_2 = Label.objects.create(name="L2_h")
+        self.task = Task.objects.create(
+            name="T_h",
+            status=self.new,
+            author=self.user,
+        )
+        self.task.labels.add(self.label_1)
+        self.client.login(username="hist", password="StrongPass123")
+
+    def test_update_writes_one_compact_diff(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("task_update", args=[self.task.id]),
+                {
+                    "name": "T_h",
+                    "status": self.done.id,
+                    "executor": self.user.id,
+                    "labels": [self.label_2.id],
+                },
+            )
+
+        change = TaskChange.objects.get(task=self.task)
+        self.assertEqual(change.actor, self.user)
+        self.assertEqual(change.changes, {
+            "s": [self.new.id, self.done.id],
+            "e": [None, self.user.id],
+            "l": [[self.label_2.id], [self.label_1.id]],
+        })
+
+    def test_unchanged_update_writes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("task_update", args=[self.task.id]),
+                {
+                    "name": "Другое имя",
+                    "status": self.new.id,
+                    "labels": [self.label_1.id],
+                },
+            )
+
+        self.assertFalse(TaskChange.objects.exists())
+
+    def test_history_cursor_pagination(self):
+        TaskChange.objects.bulk_create(
+            TaskChange(task=self.task, changes={"s": [self.new.id, i]})
+            for i in range(HISTORY_PAGE_SIZE + 5)
+        )
+
+        response = self.client.get(reverse("task_show", args=[self.task.id]))
+        first_page = response.context["history"]
+        cursor = response.context["history_cursor"]
+        self.assertEqual(len(first_page), HISTORY_PAGE_SIZE)
+
+        response = self.client.get(
+            reverse("task_show", args=[self.task.id]),
+            {"history_before": cursor},
+        )
+        self.assertEqual(len(response.context["history"]), 5)
+        self.assertIsNone(response.context["history_cursor"])
+
+    def test_compact_keeps_latest_entries_per_task(self):
+        TaskChange.objects.bulk_create(
+            TaskChange(task=self.task, changes={"s": [self.new.id, i]})
+            for i in range(10)
+        )
+        newest = list(
+            TaskChange.objects.order_by("-id").values_list("id", flat=True)[:3]
+        )
+
+        call_command("compact_task_history", keep=3, stdout=StringIO())
+
+        self.assertEqual(
+            sorted(TaskChange.objects.values_list("id", flat=True)),
+            sorted(newest),
+        )
+
+    def test_compact_rejects_keep_below_one(self):
+        with self.assertRaises(CommandError):
+            call_command("compact_task_history", keep=0, stdout=StringIO())
+
+
+class TaskArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="arch",
+            password="StrongPass123",
+        )
+        self.open = Status.objects.create(name="В работе_a")
+        self.closed = Status.objects.create(name="Завершен_a")
+        self.label = Label.objects.create(name="L_a")
+
+        self.old_closed = Task.objects.create(
+            name="Old closed",
+            status=self.closed,
+            author=self.user,
+        )
+        self.old_closed.labels.add(self.label)
+        self.old_open = Task.objects.create(
+            name="Old open",
+            status=self.open,
+            author=self.user,
+        )
+        self.fresh_closed = Task.objects.create(
+            name="Fresh closed",
+            status=self.closed,
+            author=self.user,
+        )
+        Task.objects.filter(
+            pk__in=[self.old_closed.pk, self.old_open.pk],
+        ).update(created_at=timezone.now() - timedelta(days=100))
+
+        self.client.login(username="arch", password="StrongPass123")
+
+    def _archive(self):
+        call_command(
+            "archive_tasks",
+            status=[self.closed.name],
+            days=30,
+            batch_size=1,
+            stdout=StringIO(),
+        )
+
+    def test_archive_moves_old_final_tasks_with_labels(self):
+        self._archive()
+
+        self.assertEqual(
+            set(Task.objects.values_list("name", flat=True)),
+            {"Old open", "Fresh closed"},
+        )
+        archived = ArchivedTask.objects.get(pk=self.old_closed.pk)
+        self.assertEqual(list(archived.labels.all()), [self.label])
+        self.assertEqual(
+            LabelTaskCount.objects.get(label=self.label).count,
+            0,
+        )
+        self.assertEqual(
+            StatusTaskCount.objects.get(status=self.closed).count,
+            1,
+        )
+
+    def test_list_excludes_archive_unless_requested(self):
+        self._archive()
+
+        response = self.client.get(reverse("tasks_list"))
+        self.assertNotContains(response, "Old closed")
+
+        response = self.client.get(
+            reverse("tasks_list"),
+            {"include_archive": "on"},
+        )
+        self.assertContains(response, "Old closed")
+        self.assertContains(response, "Fresh closed")
+
+    def test_restore_from_detail_page(self):
+        self._archive()
+
+        response = self.client.get(
+            reverse("task_show", args=[self.old_closed.pk]),
+        )
+        self.assertRedirects(
+            response,
+            reverse("archived_task_show", args=[self.old_closed.pk]),
+        )
+
+        response = self.client.post(
+            reverse("archived_task_restore", args=[self.old_closed.pk]),
+        )
+        self.assertRedirects(
+            response,
+            reverse("task_show", args=[self.old_closed.pk]),
+        )
+        restored = Task.objects.get(pk=self.old_closed.pk)
+        self.assertEqual(list(restored.labels.all()), [self.label])
+        self.assertLess(
+            restored.created_at,
+            timezone.now() - timedelta(days=99),
+        )
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertEqual(
+            LabelTaskCount.objects.get(label=self.label).count,
+            1,
+        )
+
+    def test_dependent_rows_follow_task_through_archive(self):
+        task_id = self.old_closed.pk
+        add_comment(task_id, self.user, "Комментарий")
+        TaskChange.objects.create(task_id=task_id, changes={"name": ["a", "b"]})
+        blob = Blob.objects.create(sha256="a" * 64, size=1)
+        Attachment.objects.create(
+            task_id=task_id, blob=blob, name="a.txt", size=1,
+            uploaded_by=self.user,
+        )
+        dependents = {
+            relation.related_model: relation.field.attname
+            for relation in Task._meta.related_objects
+            if relation.field.name != "parent"
+        }
+        self.assertEqual(
+            {model._meta.label_lower for model in dependents},
+            archive.KEPT_RELATIONS,
+        )
+
+        def counts():
+            return {
+                model: model.objects.filter(**{column: task_id}).count()
+                for model, column in dependents.items()
+            }
+
+        before = counts()
+        self.assertTrue(all(before.values()))
+        self._archive()
+        self.assertEqual(counts(), before)
+        restore_task(ArchivedTask.objects.get(pk=task_id))
+        self.assertEqual(counts(), before)
+
+    def test_archive_refuses_unknown_relations(self):
+        with patch.object(archive, "KEPT_RELATIONS", set()):
+            with self.assertRaises(ImproperlyConfigured):
+                self._archive()
+        self.assertTrue(Task.objects.filter(pk=self.old_closed.pk).exists())
+
+
+calls = []
+
+
+@job("tests.record")
+def record_call(value):
+    calls.append(value)
+
+
+@job("tests.fail")
+def always_fail():
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_orders_by_priority_and_skips_claimed(self):
+        low = enqueue("tests.record", {"value": "low"})
+        high = enqueue("tests.record", {"value": "high"}, priority=10)
+        enqueue(
+            "tests.record",
+            {"value": "later"},
+            run_at=timezone.now() + timedelta(hours=1),
+        )
+
+        self.assertEqual(claim("w1", limit=1), [high])
+        self.assertEqual(claim("w2", limit=5), [low])
+        self.assertEqual(claim("w3", limit=5), [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        failing = enqueue("tests.fail", max_attempts=2)
+
+        job_run = execute(claim("w", limit=1)[0])
+        self.assertEqual(job_run.state, Job.QUEUED)
+        self.assertGreater(job_run.run_at, timezone.now())
+        self.assertIn("boom", job_run.last_error)
+
+        Job.objects.filter(pk=failing.pk).update(run_at=timezone.now())
+        job_run = execute(claim("w", limit=1)[0])
+        self.assertEqual(job_run.state, Job.FAILED)
+        self.assertEqual(job_run.attempts, 2)
+
+    def test_queue_page_is_for_staff_only(self):
+        User.objects.create_user(username="plain", password="StrongPass123")
+        User.objects.create_user(
+            username="staff",
+            password="StrongPass123",
+            is_staff=True,
+        )
+        enqueue("tests.record", {"value": 1})
+
+        self.client.login(username="plain", password="StrongPass123")
+        self.assertEqual(self.client.get(reverse("jobs_queue")).status_code, 403)
+
+        self.client.login(username="staff", password="StrongPass123")
+        response = self.client.get(reverse("jobs_queue"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(("В очереди", 1), response.context["states"])
+
+    def test_stale_job_spends_attempt_and_finally_fails(self):
+        stuck = enqueue("tests.record", {"value": 1}, max_attempts=2)
+        hour_ago = timezone.now() - timedelta(hours=1)
+
+        for state in (Job.QUEUED, Job.FAILED):
+            claim("w", limit=1)
+            Job.objects.filter(pk=stuck.pk).update(locked_at=hour_ago)
+            self.assertEqual(requeue_stale(timeout=60), 1)
+            stuck.refresh_from_db()
+            self.assertEqual(stuck.state, state)
+        self.assertEqual(stuck.attempts, 2)
+        self.assertEqual(claim("w", limit=1), [])
+
+    def test_periodic_job_is_scheduled_after_last_run(self):
+        periodic = {"tests.record": 3600}
+        first, = schedule_periodic(periodic)
+        self.assertEqual(schedule_periodic(periodic), [])
+
+        Job.objects.filter(pk=first.pk).update(
+            state=Job.DONE, finished_at=timezone.now(),
+        )
+        second, = schedule_periodic(periodic)
+        self.assertGreater(
+            second.run_at, timezone.now() + timedelta(minutes=59),
+        )
+
+
+class JobWorkerTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    @override_settings(JOBS_PERIODIC={})
+    def test_worker_runs_queue_in_burst_mode(self):
+        enqueue("tests.record", {"value": 1})
+        enqueue("tests.record", {"value": 2}, priority=5)
+
+        call_command(
+            "run_worker",
+            burst=True,
+            concurrency=1,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(calls, [2, 1])
+        done = Job.objects.filter(state=Job.DONE)
+        self.assertEqual(done.count(), 2)
+        self.assertFalse(done.filter(duration_ms__isnull=True).exists())
+
+    @override_settings(JOBS_PERIODIC={})
+    def test_worker_survives_failure_outside_the_job(self):
+        broken = enqueue("tests.record", {"value": 1}, priority=5)
+        enqueue("tests.record", {"value": 2})
+        execute_job = execute
+
+        def flaky(job):
+            if job.pk == broken.pk:
+                raise OperationalError("соединение потеряно")
+            return execute_job(job)
+
+        err = StringIO()
+        with patch.object(queue, "execute", side_effect=flaky):
+            call_command(
+                "run_worker",
+                burst=True,
+                concurrency=1,
+                stdout=StringIO(),
+                stderr=err,
+            )
+
+        self.assertEqual(calls, [2])
+        self.assertIn(
+            f"tests.record #{broken.pk}: сбой обработчика", err.getvalue(),
+        )
+        self.assertEqual(Job.objects.get(pk=broken.pk).state, Job.RUNNING)
+
+
+@override_settings(
+    LOGIN_THROTTLE_IP=(3, 1),
+    LOGIN_THROTTLE_USERNAME=(2, 1),
+)
+class LoginThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="victim",
+            password="StrongPass123",
+        )
+
+    def _attempt(self, username, ip="10.0.0.1", password="wrong"):
+        return self.client.post(
+            reverse("login"),
+            {"username": username, "password": password},
+            REMOTE_ADDR=ip,
+        )
+
+    def test_username_bucket_blocks_distributed_attempts(self):
+        self.assertEqual(self._attempt("victim", "10.0.0.1").status_code, 200)
+        self.assertEqual(self._attempt("victim", "10.0.0.2").status_code, 200)
+
+        response = self._attempt("victim", "10.0.0.3", "StrongPass123")
+        self.assertEqual(response.status_code, 429)
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+    def test_flood_beyond_bucket_does_not_hash(self):
+        with patch.object(
+            PBKDF2PasswordHasher,
+            "encode",
+            autospec=True,
+            side_effect=PBKDF2PasswordHasher.encode,
+        ) as encode:
+            statuses = [
+                self._attempt(f"nobody{i}").status_code for i in range(10)
+            ]
+
+        self.assertEqual(statuses[:3], [200] * 3)
+        self.assertEqual(statuses[3:], [429] * 7)
+        self.assertEqual(encode.call_count, 3)
+        self.assertEqual(self.client.get(reverse("index")).status_code, 200)
+
+    @override_settings(PASSWORD_HASH_WAIT=0)
+    def test_saturated_hash_slots_reject_login(self):
+        slots = hash_slots()
+        acquired = []
+        while slots.acquire(blocking=False):
+            acquired.append(True)
+        try:
+            response = self._attempt("victim", password="StrongPass123")
+        finally:
+            for _ in acquired:
+                slots.release()
+
+        self.assertEqual(response.status_code, 503)
+
+    @override_settings(PASSWORD_HASH_WAIT=0)
+    def test_saturated_hash_slots_reject_password_change(self):
+        self.client.force_login(self.user)
+        slots = hash_slots()
+        acquired = []
+        while slots.acquire(blocking=False):
+            acquired.append(True)
+        try:
+            response = self.client.post(
+                reverse("user_update", args=[self.user.pk]),
+                {
+                    "first_name": "",
+                    "last_name": "",
+                    "username": "victim",
+                    "password1": "NewStrongPass123",
+                    "password2": "NewStrongPass123",
+                },
+            )
+        finally:
+            for _ in acquired:
+                slots.release()
+
+        self.assertEqual(response.status_code, 503)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("StrongPass123"))
+
+    # incr атомарен в Redis/Memcached и внутри процесса в LocMemCache
+    @override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }})
+    def test_parallel_attempts_are_all_counted(self):
+        limit = RateLimit("parallel", capacity=10, refill_per_second=1 / 60)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: limit.consume(), range(30)))
+
+        self.assertEqual(results.count(True), 10)
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_login_rehashes_password_with_current_policy(self):
+        self.assertIn("$1000000$", self.user.password)
+
+        self._attempt("victim", password="StrongPass123")
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+
+
+class UsersListTests(TestCase):
+    def setUp(self):
+        self.ivan = User.objects.create(
+            username="ivanov",
+            first_name="Иван",
+            last_name="Петров",
+        )
+        self.anna = User.objects.create(
+            username="anna",
+            first_name="Анна",
+            last_name="Иванова",
+        )
+        status = Status.objects.create(name="S_u")
+        Task.objects.create(name="T1", status=status, author=self.ivan)
+        Task.objects.create(
+            name="T2", status=status, author=self.ivan, executor=self.anna,
+        )
+
+    def test_counts_are_annotated_in_one_query(self):
+        User.objects.bulk_create(
+            User(username=f"bulk{i}") for i in range(20)
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("users_list"))
+            users = {u.username: u for u in response.context["users"]}
+
+        self.assertEqual(users["ivanov"].authored_count, 2)
+        self.assertEqual(users["ivanov"].assigned_count, 0)
+        self.assertEqual(users["anna"].assigned_count, 1)
+
+    def test_prefix_search_by_username_and_full_name(self):
+        def found(query):
+            response = self.client.get(reverse("users_list"), {"q": query})
+            return {u.username for u in response.context["users"]}
+
+        self.assertEqual(found("iva"), {"ivanov"})
+        self.assertEqual(found("Иван"), {"ivanov", "anna"})
+        self.assertEqual(found("Анна Ив"), {"anna"})
+        self.assertEqual(found("етров"), set())
+
+    def test_cursor_pagination(self):
+        User.objects.bulk_create(
+            User(username=f"page{i:03}") for i in range(USERS_PAGE_SIZE + 10)
+        )
+
+        first = self.client.get(reverse("users_list"))
+        self.assertEqual(len(first.context["users"]), USERS_PAGE_SIZE)
+        self.assertIsNone(first.context["prev_cursor"])
+
+        second = self.client.get(
+            reverse("users_list"),
+            {"after": first.context["next_cursor"]},
+        )
+        self.assertEqual(len(second.context["users"]), 12)
+        self.assertIsNone(second.context["next_cursor"])
+
+        back = self.client.get(
+            reverse("users_list"),
+            {"before": second.context["prev_cursor"]},
+        )
+        self.assertEqual(
+            [u.id for u in back.context["users"]],
+            [u.id for u in first.context["users"]],
+        )
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="picker",
+            password="StrongPass123",
+            first_name="Пётр",
+        )
+        self.users = User.objects.bulk_create(
+            User(username=f"worker{i:03}") for i in range(100)
+        )
+        self.labels = Label.objects.bulk_create(
+            Label(name=f"label{i:03}") for i in range(100)
+        )
+        self.status = Status.objects.create(name="S_ac")
+        self.client.login(username="picker", password="StrongPass123")
+
+    def test_form_renders_only_selected_options(self):
+        task = Task.objects.create(
+            name="T_ac",
+            status=self.status,
+            author=self.user,
+            executor=self.users[5],
+        )
+        task.labels.add(self.labels[7])
+
+        response = self.client.get(reverse("task_update", args=[task.id]))
+
+        self.assertContains(response, "worker005")
+        self.assertContains(response, "label007")
+        self.assertNotContains(response, "worker006")
+        self.assertNotContains(response, "label008")
+        self.assertContains(response, reverse("users_autocomplete"))
+
+        response = self.client.get(reverse("tasks_list"))
+        self.assertNotContains(response, "worker006")
+
+    def test_autocomplete_is_prefix_search_and_cached(self):
+        url = reverse("users_autocomplete")
+        response = self.client.get(url, {"q": "worker01"})
+        self.assertEqual(
+            [item["text"] for item in response.json()["results"]],
+            [f"worker{i:03}" for i in range(10, 20)],
+        )
+
+        with self.assertNumQueries(2):  # сессия и пользователь
+            self.client.get(url, {"q": "worker01"})
+
+        User.objects.create(username="worker019x")
+        response = self.client.get(url, {"q": "worker01"})
+        self.assertEqual(len(response.json()["results"]), 11)
+
+    def test_label_autocomplete(self):
+        response = self.client.get(
+            reverse("labels_autocomplete"),
+            {"q": "label09"},
+        )
+        self.assertEqual(len(response.json()["results"]), 10)
+
+    def test_selected_values_are_validated_strictly(self):
+        response = self.client.post(reverse("task_create"), {
+            "name": "T_invalid",
+            "status": self.status.id,
+            "labels": [self.labels[0].id, 999999],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.filter(name="T_invalid").exists())
+
+
+class TaskSaveDiffTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="diff",
+            password="StrongPass123",
+        )
+        self.status = Status.objects.create(name="S_d")
+        self.labels = [Label.objects.create(name=f"L{i}_d") for i in range(3)]
+        self.task = Task.objects.create(
+            name="T_d",
+            description="D",
+            status=self.status,
+            author=self.user,
+        )
+        self.task.labels.add(self.labels[0], self.labels[1])
+        self.client.login(username="diff", password="StrongPass123")
+
+    def _update(self, **data):
+        payload = {
+            "name": "T_d",
+            "description": "D",
+            "status": self.status.id,
+            "labels": [self.labels[0].id, self.labels[1].id],
+        }
+        payload.update(data)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse("task_update", args=[self.task.id]),
+                payload,
+            )
+        self.assertEqual(response.status_code, 302)
+        return [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith(("UPDATE", "INSERT", "DELETE"))
+            and "django_session" not in q["sql"]
+        ]
+
+    def test_edit_name_only_issues_single_narrow_update(self):
+        writes = self._update(name="Новое имя")
+
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('UPDATE "tasks_task" SET "name"'))
+        self.assertNotIn("description", writes[0])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.name, "Новое имя")
+
+    def test_unchanged_form_writes_nothing(self):
+        self.assertEqual(self._update(), [])
+
+    def test_label_diff_is_one_delete_and_one_insert(self):
+        writes = self._update(labels=[self.labels[1].id, self.labels[2].id])
+
+        label_writes = [sql for sql in writes if "tasks_task_labels" in sql]
+        self.assertEqual(len(label_writes), 2)
+        self.assertTrue(label_writes[0].startswith("DELETE"))
+        self.assertTrue(label_writes[1].startswith("INSERT"))
+        self.assertEqual(
+            set(self.task.labels.values_list("id", flat=True)),
+            {self.labels[1].id, self.labels[2].id},
+        )
+        self.assertEqual(
+            LabelTaskCount.objects.get(label=self.labels[0]).count,
+            0,
+        )
+        self.assertEqual(
+            LabelTaskCount.objects.get(label=self.labels[2]).count,
+            1,
+        )
+
+
+class ListProjectionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="proj",
+            password="StrongPass123",
+        )
+        status = Status.objects.create(name="S_p")
+        Task.objects.create(
+            name="T_p",
+            description="очень длинное описание",
+            status=status,
+            author=self.user,
+            executor=self.user,
+        )
+        self.client.login(username="proj", password="StrongPass123")
+
+    def _select_sql(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and "django_session" not in q["sql"]
+        ]
+
+    def test_task_list_skips_description_and_user_secrets(self):
+        queries = self._select_sql(reverse("tasks_list"))
+        task_query = next(sql for sql in queries if '"tasks_task"' in sql)
+
+        self.assertNotIn('"description"', task_query)
+        self.assertNotIn('"password"', task_query)
+        self.assertIn('"username"', task_query)
+
+    def test_users_list_skips_password(self):
+        queries = self._select_sql(reverse("users_list"))
+        list_query = next(sql for sql in queries if "authored_count" in sql)
+
+        self.assertNotIn('"password"', list_query)
+
+    def test_detail_still_shows_description(self):
+        task = Task.objects.get()
+        response = self.client.get(reverse("task_show", args=[task.id]))
+        self.assertContains(response, "очень длинное описание")
+
+
+class TaskPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="page",
+            password="StrongPass123",
+        )
+        self.status = Status.objects.create(name="S_c")
+        self.label = Label.objects.create(name="L_c")
+        self.task = Task.objects.create(
+            name="T_c",
+            status=self.status,
+            author=self.user,
+        )
+        self.task.labels.add(self.label)
+        self.url = reverse("task_show", args=[self.task.id])
+        self.client.login(username="page", password="StrongPass123")
+
+    def _get(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, [
+            q["sql"] for q in ctx.captured_queries
+            if "django_session" not in q["sql"]
+            and '"auth_user"."id" = ' not in q["sql"]
+        ]
+
+    def test_miss_loads_task_in_two_queries(self):
+        response, queries = self._get()
+        # Дерево подзадач грузится отдельным рекурсивным запросом
+        task_queries = [
+            sql for sql in queries
+            if ('"tasks_task"' in sql or '"labels_label"' in sql)
+            and not sql.lstrip().startswith("WITH RECURSIVE")
+        ]
+
+        self.assertEqual(len(task_queries), 2)
+        self.assertContains(response, "L_c")
+
+    def test_hit_skips_orm(self):
+        self._get()
+        response, queries = self._get()
+
+        self.assertEqual(queries, [])
+        self.assertContains(response, "T_c")
+
+    def test_related_renames_invalidate(self):
+        self._get()
+        self.status.name = "S_c2"
+        self.status.save()
+        self.label.name = "L_c2"
+        self.label.save()
+        self.user.username = "page_c2"
+        self.user.save()
+
+        response, _ = self._get()
+        self.assertContains(response, "S_c2")
+        self.assertContains(response, "L_c2")
+        self.assertContains(response, "page_c2")
+
+    def test_renames_do_not_touch_tasks(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.status.name = "S_c2"
+            self.status.save()
+            self.user.first_name = "Page"
+            self.user.save()
+
+        self.assertFalse(
+            [q for q in ctx.captured_queries if "tasks_" in q["sql"]]
+        )
+
+    def test_login_does_not_invalidate(self):
+        self._get()
+        self.client.logout()
+        self.client.login(username="page", password="StrongPass123")
+
+        _, queries = self._get()
+        self.assertEqual(queries, [])
+
+    def test_card_cached_before_commit_is_replaced_after(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.task.name = "T_c3"
+                self.task.save()
+                # Параллельный запрос до фиксации видит старую строку и
+                # кладет старую карточку под уже новую версию
+                cache.set(
+                    page_key(self.task.id),
+                    (None, "<p>T_c</p>"),
+                )
+
+        response, _ = self._get()
+        self.assertContains(response, "T_c3")
+
+    def test_task_edit_invalidates(self):
+        self._get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("task_update", args=[self.task.id]), {
+                "name": "T_c2",
+                "status": self.status.id,
+                "labels": [],
+            })
+
+        response, _ = self._get()
+        self.assertContains(response, "T_c2")
+        self.assertNotContains(response, "<li>L_c</li>", html=True)
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="anon_c",
+            password="StrongPass123",
+        )
+
+    def _get(self, client, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_users_list_hit_skips_orm(self):
+        first, _ = self._get(self.client, reverse("users_list"))
+        second, queries = self._get(self.client, reverse("users_list"))
+
+        self.assertEqual(queries, 0)
+        self.assertEqual(first.content, second.content)
+
+    def test_user_changes_invalidate_users_list(self):
+        self._get(self.client, reverse("users_list"))
+        User.objects.create_user(username="anon_new", password="x")
+
+        response, _ = self._get(self.client, reverse("users_list"))
+        self.assertContains(response, "anon_new")
+
+    def test_task_assignment_invalidates_users_list(self):
+        self._get(self.client, reverse("users_list"))
+        Task.objects.create(
+            name="T_a",
+            status=Status.objects.create(name="S_a"),
+            author=self.user,
+        )
+
+        response, _ = self._get(self.client, reverse("users_list"))
+        self.assertContains(response, "<td>1</td>", html=True)
+
+    def test_authenticated_users_bypass_cache(self):
+        self._get(self.client, reverse("index"))
+        self.client.login(username="anon_c", password="StrongPass123")
+
+        response, _ = self._get(self.client, reverse("index"))
+        self.assertContains(response, "Выход")
+
+    def test_login_form_gets_fresh_csrf_token(self):
+        self._get(Client(), reverse("login"))
+        client = Client(enforce_csrf_checks=True)
+        response, queries = self._get(client, reverse("login"))
+        self.assertEqual(queries, 0)
+        token = response.content.decode().split(
+            'name="csrfmiddlewaretoken" value="'
+        )[1].split('"')[0]
+        self.assertNotEqual(token, "__csrf_token__")
+
+        response = client.post(reverse("login"), {
+            "csrfmiddlewaretoken": token,
+            "username": "anon_c",
+            "password": "StrongPass123",
+        })
+        self.assertRedirects(response, "/", fetch_redirect_response=False)
+
+
+class WarmUpTests(TestCase):
+    def test_compiles_every_project_template(self):
+        stats = warm_up()
+        templates = list((settings.BASE_DIR / "templates").rglob("*.html"))
+        loader = engines["django"].engine.template_loaders[0]
+
+        self.assertEqual(stats["templates"], len(templates))
+        self.assertGreater(stats["url_patterns"], 0)
+        self.assertIn("tasks/card.html", {
+            template.origin.template_name
+            for template in loader.get_template_cache.values()
+            if hasattr(template, "origin")
+        })
+
+    def test_gunicorn_refuses_process_local_cache_for_many_workers(self):
+        config = runpy.run_path(str(settings.BASE_DIR / "gunicorn.conf.py"))
+        server = SimpleNamespace(cfg=SimpleNamespace(workers=2))
+        locmem = {"default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }}
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with override_settings(CACHES=locmem, METRICS_DIR=directory):
+            with self.assertRaises(RuntimeError):
+                config["on_starting"](server)
+            server.cfg.workers = 1
+            config["on_starting"](server)
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        compression._costs.clear()
+
+    def _process(self, response, accept="gzip", csrf_used=False):
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING=accept)
+        if csrf_used:
+            request.META["CSRF_COOKIE_NEEDS_UPDATE"] = True
+        return CompressionMiddleware(lambda r: response)(request)
+
+    def test_large_html_is_gzipped(self):
+        body = "<p>задача</p>" * 500
+        response = self._process(HttpResponse(body))
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content).decode(), body)
+        self.assertLess(len(response.content), len(body.encode()) / 10)
+
+    def test_small_and_binary_responses_are_skipped(self):
+        small = self._process(HttpResponse("<p>мало</p>"))
+        binary = self._process(
+            HttpResponse(b"\x00" * 5000, content_type="image/png")
+        )
+
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertFalse(binary.has_header("Content-Encoding"))
+
+    def test_refused_encoding_is_not_used(self):
+        response = self._process(
+            HttpResponse("<p>задача</p>" * 500),
+            accept="gzip;q=0, identity",
+        )
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_streaming_response_is_compressed_per_chunk(self):
+        chunks = [f"<tr><td>{i}</td></tr>".encode() * 50 for i in range(20)]
+        response = self._process(StreamingHttpResponse(iter(chunks)))
+
+        parts = list(response.streaming_content)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertGreater(len(parts), len(chunks) // 2)
+        self.assertEqual(gzip.decompress(b"".join(parts)), b"".join(chunks))
+
+    @patch.object(compression, "brotli", None)
+    def test_without_brotli_package_gzip_is_used(self):
+        body = "<p>задача</p>" * 500
+        br_only = self._process(HttpResponse(body), "br")
+        both = self._process(HttpResponse(body), "br, gzip")
+
+        self.assertFalse(br_only.has_header("Content-Encoding"))
+        self.assertEqual(both["Content-Encoding"], "gzip")
+
+    def test_brotli_is_not_used_where_length_could_leak_a_token(self):
+        fake = SimpleNamespace(
+            compress=lambda content, quality: zlib.compress(content),
+        )
+        body = "<p>задача</p>" * 500
+        chunks = [b"<tr><td>1</td></tr>" * 50] * 3
+        with patch.object(compression, "brotli", fake):
+            plain = self._process(HttpResponse(body), "br, gzip")
+            with_token = self._process(
+                HttpResponse(body), "br, gzip", csrf_used=True,
+            )
+            streamed = self._process(
+                StreamingHttpResponse(iter(chunks)), "br, gzip",
+            )
+
+        self.assertEqual(plain["Content-Encoding"], "br")
+        self.assertEqual(zlib.decompress(plain.content).decode(), body)
+        self.assertEqual(with_token["Content-Encoding"], "gzip")
+        self.assertEqual(streamed["Content-Encoding"], "gzip")
+
+    def test_compressed_length_is_randomized(self):
+        body = "<p>задача</p>" * 500
+        lengths = {
+            len(self._process(HttpResponse(body)).content) for _ in range(20)
+        }
+        chunks = [b"<tr><td>1</td></tr>" * 50] * 3
+        streamed = b"".join(
+            self._process(StreamingHttpResponse(iter(chunks))).streaming_content
+        )
+
+        self.assertGreater(len(lengths), 1)
+        self.assertEqual(gzip.decompress(streamed), b"".join(chunks))
+        with override_settings(COMPRESSION_MAX_RANDOM_BYTES=0):
+            self.assertEqual(
+                len(self._process(HttpResponse(body)).content),
+                len(gzip.compress(body.encode(), compresslevel=6, mtime=0)),
+            )
+
+    @override_settings(COMPRESSION_CPU_BUDGET_MS=1)
+    def test_over_budget_response_is_sent_uncompressed(self):
+        compression._costs[("gzip", 6)] = 10_000
+        compression._costs[("gzip", 1)] = 10_000
+        response = self._process(HttpResponse("<p>задача</p>" * 500))
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.enterContext(override_settings(METRICS_DIR=directory))
+        metrics_store.reset()
+        self.addCleanup(metrics_store.reset)
+
+    def _scrape(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_counts_requests_per_view(self):
+        self.client.get(reverse("index"))
+        self.client.get(reverse("index"))
+
+        text = self._scrape()
+        self.assertIn(
+            'http_requests_total{method="GET",status="200",view="index"} 2',
+            text,
+        )
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{le="+Inf",view="index"} 2',
+            text,
+        )
+        # Сам запрос к /metrics еще выполняется
+        self.assertIn("http_requests_in_flight 1", text)
+
+    def test_counts_db_queries(self):
+        self.client.get(reverse("users_list"))
+
+        self.assertRegex(
+            self._scrape(),
+            r'db_queries_total\{view="users_list"\} [1-9]',
+        )
+
+    def test_aggregates_worker_files(self):
+        self.client.get(reverse("index"))
+        other = metrics_store.MmapedDict(metrics_store.metrics_path(999999))
+        other.inc(metrics_store.key(
+            "http_requests_total", view="index", method="GET", status="200",
+        ), 3)
+        other.inc(metrics_store.key("http_requests_in_flight"), 2)
+        other.close()
+        metrics_store.mark_process_dead(999999)
+
+        text = self._scrape()
+        self.assertIn(
+            'http_requests_total{method="GET",status="200",view="index"} 4',
+            text,
+        )
+        self.assertIn("http_requests_in_flight 1", text)
+
+    def test_remote_scrape_is_forbidden(self):
+        response = self.client.get("/metrics", REMOTE_ADDR="10.0.0.1")
+
+        self.assertEqual(response.status_code, 403)
+
+
+class AccessLogTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "access.log")
+        self.enterContext(override_settings(
+            ACCESS_LOG_DIR=directory,
+            ACCESS_LOG_SAMPLE_RATE=1,
+            METRICS_DIR=directory,
+        ))
+        access_log.reset()
+        self.addCleanup(access_log.reset)
+        self.addCleanup(metrics_store.reset)
+
+    def _records(self):
+        access_log.writer().flush()
+        path = access_log.log_path(os.getpid())
+        with open(path, encoding="utf-8") as file:
+            return [json.loads(line) for line in file]
+
+    def test_logs_view_user_and_timings(self):
+        user = User.objects.create_user(username="logged", password="Pass123")
+        self.client.force_login(user)
+        response = self.client.get(reverse("users_list"))
+
+        record, = self._records()
+        self.assertEqual(record["view"], "users_list")
+        self.assertEqual(record["user"], user.pk)
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["size"], len(response.content))
+        self.assertGreater(record["db_queries"], 0)
+        self.assertGreaterEqual(record["duration_ms"], record["db_ms"])
+
+    @override_settings(ACCESS_LOG_SAMPLE_RATE=0, ACCESS_LOG_SLOW_MS=10_000)
+    def test_sampling_keeps_errors(self):
+        self.client.get(reverse("index"))
+        self.client.get("/missing/")
+
+        record, = self._records()
+        self.assertEqual(record["status"], 404)
+        self.assertEqual(record["sample_rate"], 1)
+
+    @override_settings(ACCESS_LOG_SAMPLE_RATE=0, ACCESS_LOG_SLOW_MS=0)
+    def test_slow_requests_are_always_logged(self):
+        self.client.get(reverse("index"))
+
+        record, = self._records()
+        self.assertEqual(record["view"], "index")
+
+    def test_disabled_without_directory(self):
+        with override_settings(ACCESS_LOG_DIR=""):
+            self.assertIsNone(access_log.writer())
+
+    def test_rotates_by_size(self):
+        writer = access_log.AccessLogWriter(self.path, 200, 2, 100)
+        for number in range(100):
+            writer.submit({"n": number})
+        writer.close()
+
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertTrue(os.path.exists(self.path + ".2"))
+        self.assertFalse(os.path.exists(self.path + ".3"))
+        for path in (self.path, self.path + ".1"):
+            self.assertLess(os.path.getsize(path), 250)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        writer = access_log.AccessLogWriter(self.path, 0, 0, 1)
+        release = threading.Event()
+        write = writer._write
+        writer._write = lambda records: release.wait() and write(records)
+
+        writer.submit({"n": 1})
+        while writer.queue.qsize():
+            pass
+        self.assertTrue(writer.submit({"n": 2}))
+        self.assertFalse(writer.submit({"n": 3}))
+        release.set()
+        writer.close()
+
+        with open(self.path, encoding="utf-8") as file:
+            self.assertEqual(
+                [json.loads(line)["n"] for line in file], [1, 2],
+            )
+        self.assertIn("access_log_dropped_total 1", "\n".join(
+            f"{json.loads(key)[0]} {value:g}"
+            for key, value in metrics_store.collect().items()
+        ))
+
+
+class ProjectScopeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.member = User.objects.create_user(
+            username="member",
+            password="StrongPass123",
+        )
+        self.outsider = User.objects.create_user(
+            username="outsider",
+            password="StrongPass123",
+        )
+        self.status = Status.objects.create(name="S_pr")
+        self.project = Project.objects.create(name="Альфа", slug="alpha")
+        self.project.members.add(self.member)
+        self.project_task = Task.objects.create(
+            name="T_alpha",
+            status=self.status,
+            author=self.member,
+            project=self.project,
+        )
+        self.shared_task = Task.objects.create(
+            name="T_shared",
+            status=self.status,
+            author=self.member,
+        )
+
+    def test_membership_is_cached_and_invalidated(self):
+        self.assertEqual(member_project_ids(self.member), {self.project.pk})
+        with self.assertNumQueries(0):
+            member_project_ids(self.member)
+
+        self.project.members.remove(self.member)
+        self.assertEqual(member_project_ids(self.member), set())
+
+    def test_project_list_shows_only_project_tasks(self):
+        self.client.login(username="member", password="StrongPass123")
+        response = self.client.get(
+            reverse("project_tasks_list", args=["alpha"])
+        )
+
+        self.assertContains(response, "T_alpha")
+        self.assertNotContains(response, "T_shared")
+        self.assertContains(self.client.get(reverse("projects_list")), "Альфа")
+
+    def test_outsider_cannot_see_project_tasks(self):
+        # Страница задачи попадает в кэш при просмотре участником
+        self.client.force_login(self.member)
+        self.client.get(reverse("task_show", args=[self.project_task.id]))
+        self.client.force_login(self.outsider)
+
+        listing = self.client.get(reverse("tasks_list"))
+        self.assertContains(listing, "T_shared")
+        self.assertNotContains(listing, "T_alpha")
+        self.assertEqual(self.client.get(
+            reverse("project_tasks_list", args=["alpha"])
+        ).status_code, 404)
+        self.assertEqual(self.client.get(
+            reverse("task_show", args=[self.project_task.id])
+        ).status_code, 404)
+
+    def test_create_in_project(self):
+        self.client.login(username="member", password="StrongPass123")
+        response = self.client.post(
+            reverse("project_task_create", args=["alpha"]),
+            {"name": "T_new", "status": self.status.id},
+        )
+
+        self.assertRedirects(
+            response,
+            reverse("project_tasks_list", args=["alpha"]),
+        )
+        self.assertEqual(Task.objects.get(name="T_new").project, self.project)
+
+
+class SubtaskTreeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="tree",
+            password="StrongPass123",
+        )
+        self.new = Status.objects.create(name="Новый_t")
+        self.done = Status.objects.create(name="Готово_t")
+        self.root = Task.objects.create(
+            name="Корень", status=self.new, author=self.user,
+        )
+        self.child = Task.objects.create(
+            name="Ветка", status=self.new, author=self.user, parent=self.root,
+        )
+        self.leaf = Task.objects.create(
+            name="Лист", status=self.done, author=self.user, parent=self.child,
+        )
+        self.client.login(username="tree", password="StrongPass123")
+
+    def _update(self, task, parent):
+        return self.client.post(reverse("task_update", args=[task.id]), {
+            "name": task.name,
+            "status": task.status_id,
+            "parent": parent.id,
+        })
+
+    def test_tree_and_rollup_load_in_one_query(self):
+        with self.assertNumQueries(1):
+            ancestors, subtasks, root = load_tree(self.root.id)
+
+        self.assertEqual(ancestors, [])
+        self.assertEqual(
+            [(node.name, node.depth) for node in subtasks],
+            [("Ветка", 1), ("Лист", 2)],
+        )
+        self.assertEqual(
+            root.rollup_items,
+            [("Готово_t", 1), ("Новый_t", 1)],
+        )
+
+        ancestors, subtasks, _ = load_tree(self.leaf.id)
+        self.assertEqual([node.name for node in ancestors], ["Корень", "Ветка"])
+        self.assertEqual(subtasks, [])
+
+    def test_detail_shows_path_and_subtree(self):
+        response = self.client.get(reverse("task_show", args=[self.child.id]))
+
+        self.assertContains(response, "Корень")
+        self.assertContains(response, "Лист")
+        self.assertContains(response, "Готово_t: 1")
+
+    def test_child_change_refreshes_cached_ancestors(self):
+        self.client.get(reverse("task_show", args=[self.root.id]))
+        self.leaf.status = self.new
+        self.leaf.save()
+
+        response = self.client.get(reverse("task_show", args=[self.root.id]))
+        self.assertContains(response, "Новый_t: 2")
+
+    def test_cycles_are_rejected(self):
+        response = self._update(self.root, self.leaf)
+        self._update(self.child, self.child)
+
+        self.assertContains(response, "своих подзадач")
+        self.root.refresh_from_db()
+        self.child.refresh_from_db()
+        self.assertIsNone(self.root.parent_id)
+        self.assertEqual(self.child.parent_id, self.root.id)
+
+    def test_chain_deeper_than_limit_cannot_close_a_cycle(self):
+        chain = [self.leaf]
+        for depth in range(MAX_TREE_DEPTH + 5):
+            chain.append(Task.objects.create(
+                name=f"Звено {depth}", status=self.new, author=self.user,
+                parent=chain[-1],
+            ))
+
+        response = self._update(self.root, chain[-1])
+
+        self.assertContains(response, "Вложенность подзадач")
+        self.root.refresh_from_db()
+        self.assertIsNone(self.root.parent_id)
+
+    def test_reparenting_is_saved(self):
+        other = Task.objects.create(
+            name="Другая", status=self.new, author=self.user,
+        )
+        self._update(self.leaf, other)
+
+        self.leaf.refresh_from_db()
+        self.assertEqual(self.leaf.parent_id, other.id)
+
+    def test_archiving_waits_for_subtasks(self):
+        Task.objects.update(created_at=timezone.now() - timedelta(days=200))
+        self.root.status = self.done
+        self.root.save()
+
+        archive_tasks([self.done.id], days=90)
+        self.assertTrue(Task.objects.filter(pk=self.root.pk).exists())
+        self.assertTrue(ArchivedTask.objects.filter(pk=self.leaf.pk).exists())
+
+
+@override_settings(TASK_ARCHIVE_STATUSES=["Готово_d"])
+class DueDateTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.user = User.objects.create_user(
+            username="due",
+            password="StrongPass123",
+            email="due@example.com",
+        )
+        self.open = Status.objects.create(name="Новый_d")
+        self.done = Status.objects.create(name="Готово_d")
+
+    def _task(self, name, days, status=None, executor=True):
+        return Task.objects.create(
+            name=name,
+            status=status or self.open,
+            author=self.user,
+            executor=self.user if executor else None,
+            due_date=self.today + timedelta(days=days),
+        )
+
+    def test_filter_overdue_and_this_week(self):
+        self._task("Просрочена", -1)
+        self._task("Закрыта", -1, status=self.done)
+        self._task("Сегодня", 0)
+        self._task("Через месяц", 30)
+        Task.objects.create(name="Без срока", status=self.open, author=self.user)
+        self.client.login(username="due", password="StrongPass123")
+
+        response = self.client.get(reverse("tasks_list"), {"due": "overdue"})
+        self.assertEqual(
+            [task.name for task in response.context["tasks"]], ["Просрочена"],
+        )
+        response = self.client.get(reverse("tasks_list"), {"due": "week"})
+        self.assertEqual(
+            [task.name for task in response.context["tasks"]], ["Сегодня"],
+        )
+
+    def test_reminders_grouped_per_executor_and_sent_once(self):
+        other = User.objects.create_user(
+            username="due_other", email="other@example.com",
+        )
+        self._task("Первая", -2)
+        self._task("Вторая", 1)
+        self._task("Позже", 5)
+        self._task("Закрыта", 0, status=self.done)
+        self._task("Без исполнителя", 0, executor=False)
+        Task.objects.create(
+            name="Чужая", status=self.open, author=self.user,
+            executor=other, due_date=self.today,
+        )
+
+        tasks, messages = send_reminders(lead_days=1)
+
+        self.assertEqual((tasks, messages), (3, 2))
+        bodies = {
+            message.to[0]: message.body for message in mail.outbox
+        }
+        self.assertIn("Первая", bodies["due@example.com"])
+        self.assertIn("Вторая", bodies["due@example.com"])
+        self.assertIn("(просрочена)", bodies["due@example.com"])
+        self.assertIn("Чужая", bodies["other@example.com"])
+        self.assertFalse(Task.objects.filter(
+            due_date__lte=self.today + timedelta(days=1),
+            reminded_at__isnull=True,
+        ).exists())
+
+        mail.outbox.clear()
+        self.assertEqual(send_reminders(lead_days=1), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_batch_takes_all_due_tasks_of_its_executors(self):
+        for i in range(5):
+            self._task(f"Пачка {i}", 0)
+        self._task("Без исполнителя", 0, executor=False)
+
+        # Первая пачка из двух задач забирает все задачи исполнителя:
+        # id, отметка, задачи и адреса; затем пачка из задачи без
+        # исполнителя (id и отметка) и пустой проход
+        with self.assertNumQueries(4 + 2 + 1):
+            self.assertEqual(send_reminders(batch_size=2), (5, 1))
+        self.assertEqual(mail.outbox[0].body.count("Пачка"), 5)
+
+    def test_failed_send_returns_unsent_tasks_to_queue(self):
+        self._task("Не ушла", 0)
+        with patch.object(
+            mail.get_connection().__class__,
+            "send_messages",
+            side_effect=OSError("SMTP недоступен"),
+        ):
+            with self.assertRaises(OSError):
+                send_reminders(lead_days=0)
+        self.assertFalse(
+            Task.objects.filter(reminded_at__isnull=False).exists()
+        )
+
+        self.assertEqual(send_reminders(lead_days=0), (1, 1))
+
+    def test_changing_due_date_rearms_reminder(self):
+        task = self._task("Перенесена", 0)
+        send_reminders(lead_days=0)
+        task.refresh_from_db()
+        self.assertIsNotNone(task.reminded_at)
+
+        task.due_date = self.today - timedelta(days=1)
+        task.save_changes()
+        task.refresh_from_db()
+        self.assertIsNone(task.reminded_at)
+
+        mail.outbox.clear()
+        self.assertEqual(send_reminders(lead_days=0), (1, 1))
+
+    def test_assigned_and_reopened_tasks_are_reminded(self):
+        unassigned = self._task("Без исполнителя", 0, executor=False)
+        closed = self._task("Закрыта", 0, status=self.done)
+        self.assertEqual(send_reminders(lead_days=0), (0, 0))
+
+        unassigned.refresh_from_db()
+        unassigned.executor = self.user
+        unassigned.save_changes()
+        closed.refresh_from_db()
+        closed.status = self.open
+        closed.save_changes()
+
+        self.assertEqual(send_reminders(lead_days=0), (2, 1))
+        self.assertIn("Без исполнителя", mail.outbox[0].body)
+        self.assertIn("Закрыта", mail.outbox[0].body)
+
+    def test_moving_between_open_statuses_keeps_reminder(self):
+        task = self._task("В работе", 0)
+        send_reminders(lead_days=0)
+        task.refresh_from_db()
+
+        task.status = Status.objects.create(name="В работе_d")
+        task.save_changes()
+        task.refresh_from_db()
+        self.assertIsNotNone(task.reminded_at)
+
+    def test_long_group_is_cut_to_message_limit(self):
+        for i in range(5):
+            self._task(f"Длинная {i}", 0)
+
+        with patch.object(reminders, "TASKS_PER_MESSAGE", 2):
+            self.assertEqual(send_reminders(lead_days=0), (5, 1))
+
+        body = mail.outbox[0].body
+        self.assertEqual(body.count("Длинная"), 2)
+        self.assertIn("и еще задач: 3", body)
+
+    def test_run_reminders_command(self):
+        self._task("Команда", 0)
+        out = StringIO()
+        call_command("run_reminders", stdout=out)
+        self.assertIn("Напоминаний отправлено: 1", out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    # Минимальный SMTP-сервер: принимает письма и складывает их в память
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 localhost")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 localhost")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                if address in server.refused:
+                    self.reply("550 No such user")
+                    continue
+                recipients.append(address)
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = b""
+                while (chunk := self.rfile.readline()) not in (b".\r\n", b""):
+                    data += chunk
+                server.messages.append((
+                    recipients,
+                    email.message_from_bytes(data, policy=policy.default),
+                ))
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.refused = set()
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.smtp = SMTPStandIn()
+        threading.Thread(target=self.smtp.serve_forever, daemon=True).start()
+        self.addCleanup(self.smtp.server_close)
+        self.addCleanup(self.smtp.shutdown)
+        self.enterContext(override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.smtp.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="",
+            EMAIL_TIMEOUT=5,
+        ))
+
+        self.author = User.objects.create_user(
+            username="outbox",
+            password="StrongPass123",
+            email="outbox@example.com",
+        )
+        self.first = User.objects.create_user(
+            username="outbox_first", email="first@example.com",
+        )
+        self.second = User.objects.create_user(
+            username="outbox_second", email="second@example.com",
+        )
+        self.status = Status.objects.create(name="Новый_o")
+
+    def _task(self, name, executor):
+        return Task.objects.create(
+            name=name, status=self.status, author=self.author,
+            executor=executor,
+        )
+
+    def test_assignment_is_queued_without_sending(self):
+        self.client.login(username="outbox", password="StrongPass123")
+        self.client.post(reverse("task_create"), {
+            "name": "Из формы",
+            "status": self.status.id,
+            "executor": self.first.id,
+        })
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.recipient, self.first)
+        self.assertIsNone(message.sent_at)
+        self.assertEqual(self.smtp.connections, 0)
+
+    def test_rolled_back_change_leaves_no_message(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self._task("Откат", self.first)
+                raise RuntimeError
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_changes_coalesced_and_sent_over_one_connection(self):
+        task = self._task("Первая", self.first)
+        for executor in (self.second, self.first):
+            task.executor = executor
+            task.save_changes()
+        task.name = "Первая, уточненная"
+        task.save_changes()
+        self._task("Вторая", self.second)
+        self._task("Без исполнителя", None)
+        self.assertEqual(OutboxMessage.objects.count(), 4)
+
+        self.assertEqual(deliver(), 3)
+
+        self.assertEqual(self.smtp.connections, 1)
+        received = [
+            (recipients, message["Subject"].strip())
+            for recipients, message in self.smtp.messages
+        ]
+        self.assertEqual(received, [
+            (["first@example.com"], f"Вам назначена задача #{task.id}: Первая"),
+            (["second@example.com"], f"Вам назначена задача #{task.id}: Первая"),
+            (["second@example.com"], f"Вам назначена задача #{task.id + 1}: Вторая"),
+        ])
+        body = self.smtp.messages[0][1].get_content()
+        self.assertIn("Назначений с прошлого письма: 2", body)
+        self.assertFalse(OutboxMessage.objects.filter(sent_at=None).exists())
+
+        self.assertEqual(deliver(), 0)
+        self.assertEqual(len(self.smtp.messages), 3)
+
+    def test_refused_message_is_retried_later(self):
+        self._task("Отклонена", self.first)
+        self._task("Следом", self.second)
+        self.smtp.refused.add("first@example.com")
+
+        self.assertEqual(deliver(), 0)
+        failed = OutboxMessage.objects.get(recipient=self.first)
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn("first@example.com", failed.last_error)
+        self.assertEqual(OutboxMessage.objects.filter(sent_at=None).count(), 2)
+
+        self.smtp.refused.clear()
+        self.assertEqual(deliver(), 2)
+
+        OutboxMessage.objects.update(sent_at=None, attempts=MAX_ATTEMPTS)
+        self.assertEqual(deliver(), 0)
+
+    def test_batches_share_connection(self):
+        for i in range(5):
+            self._task(f"Пачка {i}", self.first)
+
+        self.assertEqual(deliver(batch_size=2), 5)
+        self.assertEqual(self.smtp.connections, 1)
+
+    def test_empty_outbox_opens_no_connection(self):
+        self.assertEqual(deliver(), 0)
+        self.assertEqual(self.smtp.connections, 0)
+
+    def test_messages_are_claimed_before_sending(self):
+        self._task("Захват", self.first)
+        message = OutboxMessage.objects.get()
+        claimed = []
+        backend = mail.get_connection()
+        send = backend.send_messages
+
+        def send_messages(messages):
+            message.refresh_from_db()
+            claimed.append(message.claimed_at)
+            return send(messages)
+
+        backend.send_messages = send_messages
+        self.assertEqual(deliver(connection=backend), 1)
+        self.assertIsNotNone(claimed[0])
+
+    def test_unreachable_server_keeps_command_running(self):
+        self._task("Недоступен", self.first)
+        self.smtp.shutdown()
+        self.smtp.server_close()
+        err = StringIO()
+
+        call_command(
+            "deliver_notifications", "--burst", stdout=StringIO(), stderr=err,
+        )
+
+        self.assertIn("Доставка не удалась", err.getvalue())
+        message = OutboxMessage.objects.get()
+        self.assertIsNone(message.claimed_at)
+        self.assertIsNone(message.sent_at)
+
+    def test_deliver_notifications_command(self):
+        self._task("Команда", self.first)
+        out = StringIO()
+        call_command("deliver_notifications", "--burst", stdout=out)
+        self.assertIn("Отправлено писем: 1", out.getvalue())
+        self.assertEqual(len(self.smtp.messages), 1)
+
+
+class TaskCommentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="commenter",
+            password="StrongPass123",
+        )
+        self.status = Status.objects.create(name="Новый_k")
+        self.task = Task.objects.create(
+            name="Обсуждение", status=self.status, author=self.user,
+        )
+        self.url = reverse("task_show", args=[self.task.id])
+        self.client.login(username="commenter", password="StrongPass123")
+
+    def test_comment_increments_counter_only(self):
+        response = self.client.post(
+            reverse("task_comment_create", args=[self.task.id]),
+            {"text": "Первый"},
+        )
+        self.assertRedirects(response, self.url)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 1)
+        self.assertContains(self.client.get(self.url), "Первый")
+
+        with CaptureQueriesContext(connection) as ctx:
+            add_comment(self.task.id, self.user, "Второй")
+        updates = [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith('UPDATE "tasks_task" ')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "comment_count" = ', updates[0])
+        self.assertNotIn('"name"', updates[0])
+
+    def test_comment_keeps_task_card_cached(self):
+        card = page_key(self.task.id)
+        comments = comments_key(self.task.id)
+
+        add_comment(self.task.id, self.user, "Третий")
+
+        self.assertEqual(page_key(self.task.id), card)
+        self.assertNotEqual(comments_key(self.task.id), comments)
+
+    def test_save_refuses_to_drop_managed_field(self):
+        self.task.comment_count = 5
+        with self.assertRaises(ValueError):
+            self.task.save()
+
+        self.task.save(update_fields=["comment_count"])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 5)
+        self.task.name = "Переименовано"
+        self.task.save()
+
+    def test_empty_comment_rejected(self):
+        self.client.post(
+            reverse("task_comment_create", args=[self.task.id]),
+            {"text": ""},
+        )
+        self.assertFalse(TaskComment.objects.exists())
+
+    def test_comments_paginated_newest_first(self):
+        TaskComment.objects.bulk_create(
+            TaskComment(task=self.task, author=self.user, text=f"Комм {i}")
+            for i in range(COMMENTS_PAGE_SIZE + 5)
+        )
+
+        response = self.client.get(self.url)
+        self.assertContains(response, f"Комм {COMMENTS_PAGE_SIZE + 4}")
+        self.assertNotContains(response, "Комм 4<")
+        cursor = TaskComment.objects.order_by("id")[5].id
+        self.assertContains(response, f"?comments_before={cursor}")
+
+        response = self.client.get(self.url, {"comments_before": cursor})
+        self.assertContains(response, "Комм 4<")
+        self.assertContains(response, "Комм 0<")
+        self.assertNotContains(response, "comments_before=")
+
+    def test_stale_save_keeps_counter(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        self.client.post(
+            reverse("task_comment_create", args=[self.task.id]),
+            {"text": "Пока задача открыта в форме"},
+        )
+        stale.description = "Изменено"
+        stale.save()
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comment_count, 1)
+        self.assertEqual(self.task.description, "Изменено")
+
+    def test_list_shows_counter_without_count_query(self):
+        self.client.post(
+            reverse("task_comment_create", args=[self.task.id]),
+            {"text": "Для счетчика"},
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("tasks_list"))
+        self.assertContains(response, 'title="Комментарии">1</span>')
+        self.assertFalse(any(
+            "tasks_taskcomment" in q["sql"] for q in ctx.captured_queries
+        ))
+
+
+class AttachmentTests(TestCase):
+    content = bytes(range(256)) * 3000
+
+    def setUp(self):
+        cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.enterContext(override_settings(ATTACHMENTS_ROOT=root))
+        self.root = root
+
+        self.user = User.objects.create_user(
+            username="uploader",
+            password="StrongPass123",
+        )
+        self.status = Status.objects.create(name="Новый_a")
+        self.task = Task.objects.create(
+            name="С файлом", status=self.status, author=self.user,
+        )
+        self.client.login(username="uploader", password="StrongPass123")
+
+    def _upload(self, task, content=None, name="data.bin"):
+        return self.client.post(
+            reverse("attachment_upload", args=[task.id]),
+            {"file": SimpleUploadedFile(name, content or self.content)},
+        )
+
+    def _download(self, attachment, **headers):
+        response = self.client.get(
+            reverse("attachment_download", args=[attachment.id]), **headers,
+        )
+        if response.streaming:
+            return response, b"".join(response.streaming_content)
+        return response, response.content
+
+    def _temp_files(self):
+        tmp = os.path.join(self.root, "tmp")
+        return os.listdir(tmp) if os.path.isdir(tmp) else []
+
+    def test_identical_uploads_share_one_blob(self):
+        other = Task.objects.create(
+            name="Копия", status=self.status, author=self.user,
+        )
+        self._upload(self.task)
+        self._upload(other, name="copy.bin")
+
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(list(Blob.objects.values_list("pk", flat=True)), [sha256])
+        self.assertEqual(Attachment.objects.count(), 2)
+        with open(blob_path(sha256), "rb") as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertEqual(self._temp_files(), [])
+
+        size = len(self.content)
+        self.assertEqual(
+            TaskStorage.objects.get(task_id=self.task.id).bytes, size,
+        )
+        self.assertEqual(UserStorage.objects.get(user=self.user).bytes, 2 * size)
+        self.assertContains(
+            self.client.get(reverse("task_show", args=[other.id])), "copy.bin",
+        )
+
+    def test_full_download_with_strong_etag(self):
+        self._upload(self.task)
+        attachment = Attachment.objects.get()
+
+        response, body = self._download(attachment, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response["ETag"], f'"{attachment.blob_id}"')
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+        response, _ = self._download(
+            attachment, HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        self._upload(self.task)
+        attachment = Attachment.objects.get()
+        size = len(self.content)
+        etag = f'"{attachment.blob_id}"'
+
+        response, body = self._download(attachment, HTTP_RANGE="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[100:200])
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{size}")
+        self.assertEqual(response["Content-Length"], "100")
+
+        response, body = self._download(attachment, HTTP_RANGE="bytes=-10")
+        self.assertEqual(body, self.content[-10:])
+
+        response, body = self._download(
+            attachment, HTTP_RANGE="bytes=10-", HTTP_IF_RANGE=etag,
+        )
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[10:])
+
+        response, body = self._download(
+            attachment, HTTP_RANGE="bytes=10-", HTTP_IF_RANGE='"stale"',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+
+        response, _ = self._download(attachment, HTTP_RANGE=f"bytes={size}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{size}")
+
+    def test_too_large_upload_is_discarded(self):
+        with override_settings(ATTACHMENTS_MAX_SIZE=1000):
+            self._upload(self.task)
+        self.assertFalse(Attachment.objects.exists())
+        self.assertEqual(self._temp_files(), [])
+
+    @override_settings(ATTACHMENTS_USER_QUOTA=1000)
+    def test_quota_uses_counter(self):
+        self._upload(self.task, content=b"x" * 600)
+        self._upload(self.task, content=b"y" * 600)
+        self.assertEqual(Attachment.objects.count(), 1)
+        self.assertEqual(self._temp_files(), [])
+
+    @override_settings(ATTACHMENTS_USER_QUOTA=10 ** 6)
+    def test_quota_check_locks_usage_row(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._upload(self.task)
+        self.assertEqual(Attachment.objects.count(), 1)
+        if connection.features.has_select_for_update:
+            self.assertTrue(any(
+                "FOR UPDATE" in q["sql"] and "attachments_userstorage" in q["sql"]
+                for q in ctx.captured_queries
+            ))
+
+    def test_failed_attach_removes_moved_file(self):
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        with patch.object(
+            Attachment.objects, "create", side_effect=IntegrityError("сбой"),
+        ):
+            with self.assertRaises(IntegrityError):
+                self._upload(self.task)
+
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(blob_path(sha256)))
+
+    def test_delete_releases_counters_and_blob(self):
+        self._upload(self.task)
+        attachment = Attachment.objects.get()
+        path = blob_path(attachment.blob_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("attachment_delete", args=[attachment.id]),
+            )
+
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(
+            TaskStorage.objects.get(task_id=self.task.id).bytes, 0,
+        )
+        self.assertEqual(UserStorage.objects.get(user=self.user).bytes, 0)
+
+    def test_hidden_task_attachment_not_served(self):
+        self._upload(self.task)
+        attachment = Attachment.objects.get()
+        project = Project.objects.create(name="Чужой_a", slug="alien-a")
+        Task.objects.filter(pk=self.task.pk).update(project=project)
+
+        response, _ = self._download(attachment)
+        self.assertEqual(response.status_code, 404)
+
+
+class SavedFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="filterer",
+            password="StrongPass123",
+        )
+        self.other = User.objects.create_user(username="stranger_f")
+        self.new = Status.objects.create(name="Новый_f")
+        self.done = Status.objects.create(name="Готово_f")
+        for i in range(3):
+            Task.objects.create(
+                name=f"Задача {i}", status=self.new, author=self.user,
+            )
+        Task.objects.create(
+            name="Готовая", status=self.done, author=self.user,
+        )
+        self.request = RequestFactory().get("/tasks/")
+        self.request.user = self.user
+        self.client.login(username="filterer", password="StrongPass123")
+
+    def _counts(self, filters):
+        with CaptureQueriesContext(connection) as ctx:
+            counts = filter_counts(filters, self.request)
+        counted = [
+            q for q in ctx.captured_queries if "COUNT(" in q["sql"]
+        ]
+        return counts, len(counted)
+
+    def test_counts_are_cached_until_tasks_change(self):
+        filters = [
+            SavedFilter.objects.create(
+                owner=self.user,
+                name=f"Фильтр {i}",
+                query=f"status={self.new.pk if i % 2 else self.done.pk}",
+            )
+            for i in range(10)
+        ]
+        counts, queries = self._counts(filters)
+        self.assertEqual(queries, 10)
+        self.assertEqual(counts[filters[1].pk], 3)
+        self.assertEqual(counts[filters[0].pk], 1)
+
+        _, queries = self._counts(filters)
+        self.assertEqual(queries, 0)
+
+        task = Task.objects.filter(status=self.new).first()
+        task.status = self.done
+        task.save()
+        counts, queries = self._counts(filters)
+        self.assertEqual(queries, 10)
+        self.assertEqual(counts[filters[1].pk], 2)
+        self.assertEqual(counts[filters[0].pk], 2)
+
+    def test_list_shows_tabs_with_counts(self):
+        SavedFilter.objects.create(
+            owner=self.user,
+            name="Новые",
+            query=f"status={self.new.pk}",
+        )
+        SavedFilter.objects.create(
+            owner=self.other,
+            name="Чужой фильтр",
+            query="",
+        )
+        response = self.client.get(reverse("tasks_list"))
+        self.assertContains(response, "Новые")
+        self.assertContains(response, '<span class="badge bg-secondary">3</span>')
+        self.assertNotContains(response, "Чужой фильтр")
+
+        response = self.client.get(
+            reverse("tasks_list"), {"status": self.new.pk},
+        )
+        self.assertEqual(len(response.context["tasks"]), 3)
+        self.assertTrue(response.context["saved_filters"][0].active)
+
+    def test_create_keeps_only_filter_params(self):
+        response = self.client.post(reverse("saved_filter_create"), {
+            "name": "Мои",
+            "query": f"status={self.new.pk}&self_tasks=on&page=2&label=",
+        })
+        saved = SavedFilter.objects.get()
+        self.assertEqual(saved.owner, self.user)
+        self.assertIsNone(saved.project)
+        self.assertEqual(saved.query, f"status={self.new.pk}&self_tasks=on")
+        self.assertRedirects(
+            response, reverse("tasks_list") + "?" + saved.query,
+        )
+
+    def test_project_filter_counts_project_tasks(self):
+        project = Project.objects.create(name="Проект_f", slug="project-f")
+        project.members.add(self.user)
+        Task.objects.create(
+            name="В проекте", status=self.new, author=self.user,
+            project=project,
+        )
+        self.client.post(
+            reverse("project_saved_filter_create", args=[project.slug]),
+            {"name": "Новые", "query": f"status={self.new.pk}"},
+        )
+        saved = SavedFilter.objects.get()
+        self.assertEqual(saved.project, project)
+
+        response = self.client.get(
+            reverse("project_tasks_list", args=[project.slug]),
+        )
+        self.assertEqual(response.context["saved_filters"][0].count, 1)
+        response = self.client.get(reverse("tasks_list"))
+        self.assertEqual(response.context["saved_filters"], [])
+
+    def test_only_owner_deletes(self):
+        saved = SavedFilter.objects.create(
+            owner=self.other, name="Чужой", query="",
+        )
+        response = self.client.post(
+            reverse("saved_filter_delete", args=[saved.pk]),
+        )
+        self.assertEqual(response.status_code, 404)
+
+        own = SavedFilter.objects.create(owner=self.user, name="Свой", query="")
+        response = self.client.post(
+            reverse("saved_filter_delete", args=[own.pk]),
+        )
+        self.assertRedirects(response, reverse("tasks_list"))
+        self.assertEqual(list(SavedFilter.objects.all()), [saved])
+
+
+class SnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, "snapshot.jsonl.gz")
+
+        user = User.objects.create_user(username="snap", password="Pass123")
+        status = Status.objects.create(name="Новый_s")
+        label = Label.objects.create(name="метка_s")
+        project = Project.objects.create(name="Проект_s", slug="project-s")
+        project.members.add(user)
+        parent = Task.objects.create(
+            name="Родитель", status=status, author=user, project=project,
+        )
+        child = Task.objects.create(
+            name="Подзадача", status=status, author=user, executor=user,
+            project=project, parent=parent,
+            due_date=timezone.localdate(),
+        )
+        child.labels.add(label)
+        Task.objects.filter(pk=parent.pk).update(
+            created_at=timezone.now() - timedelta(days=30),
+        )
+
+    def _state(self):
+        return {
+            model._meta.label_lower: list(
+                model._base_manager.order_by("pk").values_list()
+            )
+            for model in snapshot_models()
+        }
+
+    def _clear(self):
+        # Таблицы вне снимка, ссылающиеся на задачи и пользователей
+        derived = [
+            StatusTaskCount, ExecutorTaskCount, LabelTaskCount, DailyTaskCount,
+            TaskChange, TaskComment, OutboxMessage,
+        ]
+        with connection.cursor() as cursor:
+            for model in derived + list(reversed(snapshot_models())):
+                cursor.execute(f'DELETE FROM "{model._meta.db_table}"')
+
+    def test_round_trip_preserves_rows(self):
+        add_comment(Task.objects.get(name="Подзадача").pk, None, "Текст")
+        call_command("snapshot_dump", self.path, stdout=StringIO())
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            self.assertEqual(
+                json.loads(file.readline())["format"], "task_manager.snapshot",
+            )
+        before = self._state()
+        self._clear()
+
+        out = StringIO()
+        call_command("snapshot_restore", self.path, batch_size=1, stdout=out)
+
+        after = self._state()
+        self.assertEqual(after.keys(), before.keys())
+        for label in before:
+            if label != "tasks.task":
+                self.assertEqual(after[label], before[label], label)
+        # Комментариев в снимке нет, поэтому и счетчик не переносится
+        self.assertEqual(
+            set(Task.objects.values_list("comment_count", flat=True)), {0},
+        )
+        self.assertEqual(
+            sorted(Task.objects.values_list("name", "created_at")),
+            sorted((row[1], row[-1]) for row in before["tasks.task"]),
+        )
+        self.assertIn("tasks.task: 2", out.getvalue())
+        self.assertEqual(StatusTaskCount.objects.get().count, 2)
+
+        status = Status.objects.get()
+        task = Task.objects.create(
+            name="Новая", status=status, author=User.objects.get(),
+        )
+        self.assertGreater(task.pk, max(row[0] for row in before["tasks.task"]))
+
+    def test_restore_requires_empty_tables(self):
+        call_command("snapshot_dump", self.path, stdout=StringIO())
+
+        with self.assertRaisesMessage(CommandError, "auth.user"):
+            call_command("snapshot_restore", self.path, stdout=StringIO())
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_row_before_header_is_rejected(self):
+        with gzip.open(self.path, "wt", encoding="utf-8") as file:
+            file.write(json.dumps(
+                {"format": "task_manager.snapshot", "version": 1},
+            ) + "\n")
+            file.write("[1, \"x\"]\n")
+        self._clear()
+
+        with self.assertRaisesMessage(CommandError, "до заголовка"):
+            call_command("snapshot_restore", self.path, stdout=StringIO())
+
+    def test_bench_refuses_database_with_data(self):
+        with self.assertRaisesMessage(CommandError, "auth.user"):
+            call_command("bench_snapshot", tasks=1, users=1, stdout=StringIO())
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_broken_references_roll_back(self):
+        call_command("snapshot_dump", self.path, stdout=StringIO())
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            lines = [
+                line for line in file
+                if not line.startswith('[') or '"Новый_s"' not in line
+            ]
+        with gzip.open(self.path, "wt", encoding="utf-8") as file:
+            file.writelines(lines)
+        self._clear()
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                call_command("snapshot_restore", self.path, stdout=StringIO())
+        self.assertFalse(Task.objects.exists())
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class ImportUsersTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.directory = directory
+        User.objects.create_user(username="existing")
+
+    def _write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def test_imports_csv_and_skips_duplicates(self):
+        path = self._write("users.csv", (
+            "username,password,email,first_name,last_name\n"
+            "ivan,Secret123,ivan@EXAMPLE.com,Иван,Петров\n"
+            "existing,Secret123,,,\n"
+            "ivan,Other123,,,\n"
+            "bad name!,Secret123,,,\n"
+            "anna,,,Анна,\n"
+        ))
+        out, err = StringIO(), StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            call_command(
+                "import_users", path, workers=2, batch_size=1,
+                stdout=out, stderr=err,
+            )
+
+        ivan = User.objects.get(username="ivan")
+        self.assertTrue(ivan.check_password("Secret123"))
+        self.assertTrue(ivan.password.startswith("pbkdf2_sha256$1000$"))
+        self.assertEqual(ivan.email, "ivan@example.com")
+        self.assertEqual(ivan.first_name, "Иван")
+        self.assertFalse(User.objects.get(username="anna").has_usable_password())
+        self.assertEqual(User.objects.count(), 3)
+        self.assertIn("повторов: 2, ошибок: 1", out.getvalue())
+        self.assertIn("2/2:", out.getvalue())
+        self.assertIn("строка 4", err.getvalue())
+        # Существующие имена проверяются одним запросом
+        lookups = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and '"username" IN' in q["sql"]
+        ]
+        self.assertEqual(len(lookups), 1)
+
+    def test_rejects_too_long_fields_and_bad_email(self):
+        path = self._write("users.jsonl", "\n".join(json.dumps(row) for row in (
+            {"username": "long_email", "email": "a" * 250 + "@example.com"},
+            {"username": "long_name", "first_name": "И" * 151},
+            {"username": "bad_email", "email": "не адрес"},
+            {"username": "fine", "last_name": "Ф" * 150},
+        )))
+        err = StringIO()
+        call_command(
+            "import_users", path, workers=1, stdout=StringIO(), stderr=err,
+        )
+
+        self.assertEqual(
+            list(User.objects.exclude(username="existing").values_list(
+                "username", flat=True,
+            )),
+            ["fine"],
+        )
+        for number, field in ((1, "email"), (2, "first_name"), (3, "email")):
+            self.assertIn(f"строка {number}: {field}:", err.getvalue())
+
+    def test_bad_jsonl_lines_are_reported_with_their_numbers(self):
+        path = self._write("users.jsonl", "\n".join((
+            json.dumps({"username": "before"}),
+            "",
+            "{не json",
+            json.dumps(["list_user"]),
+            json.dumps("string_user"),
+            json.dumps({"username": "after"}),
+        )))
+        out, err = StringIO(), StringIO()
+        call_command("import_users", path, workers=1, stdout=out, stderr=err)
+
+        self.assertTrue(User.objects.filter(username="before").exists())
+        self.assertTrue(User.objects.filter(username="after").exists())
+        self.assertIn("строка 3: некорректный JSON", err.getvalue())
+        for number in (4, 5):
+            self.assertIn(
+                f"строка {number}: строка должна быть объектом JSON",
+                err.getvalue(),
+            )
+        self.assertIn("ошибок: 3", out.getvalue())
+
+    def test_rejects_non_positive_workers(self):
+        path = self._write("users.csv", "username,password\nzero,Secret123\n")
+        with self.assertRaisesMessage(CommandError, "--workers"):
+            call_command("import_users", path, workers=0, stdout=StringIO())
+        self.assertFalse(User.objects.filter(username="zero").exists())
+
+    def test_taken_name_in_batch_does_not_block_the_rest(self):
+        result = ImportResult(duplicates=[], errors=[])
+        objs = [User(username="existing"), User(username="newcomer")]
+
+        self.assertEqual(_insert(objs, result), 1)
+        self.assertEqual(result.duplicates, ["existing"])
+        self.assertTrue(User.objects.filter(username="newcomer").exists())
+
+    def test_imports_jsonl(self):
+        path = self._write("users.jsonl", "\n".join(
+            json.dumps({"username": f"user{i}", "password": f"Pass{i}word"})
+            for i in range(5)
+        ))
+        call_command("import_users", path, workers=2, stdout=StringIO())
+
+        self.assertEqual(
+            User.objects.filter(username__startswith="user").count(), 5,
+        )
+        self.assertTrue(
+            User.objects.get(username="user3").check_password("Pass3word"),
+        )
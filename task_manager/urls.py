@@ -18,7 +18,12 @@ urlpatterns = [
     path("users/", include("task_manager.users.urls")),
     path("statuses/", include("task_manager.statuses.urls")),
     path("tasks/", include("task_manager.tasks.urls")),
+    path("projects/", include("task_manager.projects.urls")),
+    path("attachments/", include("task_manager.attachments.urls")),
     path("labels/", include("task_manager.labels.urls")),
+    path("stats/", include("task_manager.stats.urls")),
+    path("jobs/", include("task_manager.jobs.urls")),
+    path("metrics", include("task_manager.metrics.urls")),
 
     path("login/", UserLoginView.as_view(), name="login"),
     path("logout/", UserLogoutView.as_view(), name="logout"),
@@ -0,0 +1,43 @@
+from threading import BoundedSemaphore
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_slots = None
+
+
+class HashCapacityExceeded(Exception):
+    pass
+
+
+def hash_slots():
+    global _slots
+    if _slots is None:
+        _slots = BoundedSemaphore(settings.PASSWORD_HASH_CONCURRENCY)
+    return _slots
+
+
+class LimitedHasherMixin:
+    # Ограничивает число одновременных вычислений хеша в процессе, чтобы
+    # поток попыток входа не занимал все ядра воркера. verify() вызывает
+    # encode(), поэтому слот берется только здесь.
+    def encode(self, *args, **kwargs):
+        slots = hash_slots()
+        if not slots.acquire(timeout=settings.PASSWORD_HASH_WAIT):
+            raise HashCapacityExceeded
+        try:
+            return super().encode(*args, **kwargs)
+        finally:
+            slots.release()
+
+
+class PBKDF2PasswordHasher(LimitedHasherMixin, hashers.PBKDF2PasswordHasher):
+    # Имя алгоритма прежнее, поэтому старые хеши проверяются, а при смене
+    # числа итераций must_update() перехеширует пароль при входе
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(LimitedHasherMixin, hashers.ScryptPasswordHasher):
+    pass
@@ -0,0 +1,213 @@
+"""Массовая загрузка пользователей из CSV или JSON Lines.
+
+Файл сначала читается и проверяется целиком: повторы внутри файла
+отсекаются множеством, а уже существующие имена — одним запросом
+``username__in``. Затем пароли хешируются пачками в пуле процессов (по
+процессу на ядро: PBKDF2 держит GIL, потоки бы не помогли), и каждая
+пачка вставляется одним bulk_create. Сигналы post_save при этом не
+отправляются, поэтому кэши списка пользователей сбрасываются в конце.
+"""
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from task_manager.views.autocomplete import invalidate
+from task_manager.views.page_cache import invalidate_pages
+
+IMPORT_BATCH_SIZE = 500
+
+FIELDS = ("username", "password", "email", "first_name", "last_name")
+
+# Настройки, с которыми хеширует процесс-воркер: те же, что у родителя,
+# при любом способе запуска процессов
+HASHER_SETTINGS = ("PASSWORD_HASHERS", "PASSWORD_PBKDF2_ITERATIONS")
+
+
+class ImportResult:
+    def __init__(self, duplicates, errors):
+        self.created = 0
+        self.duplicates = duplicates
+        # [(номер строки, описание ошибки)]
+        self.errors = errors
+
+
+class UnreadableRow:
+    """Строка JSON Lines, которую не удалось разобрать.
+
+    Ошибка разбора не прерывает чтение файла: validate отклоняет такую
+    строку, и она попадает в ошибки со своим номером, как и остальные.
+    """
+
+    def __init__(self, message):
+        self.message = message
+
+
+def read_rows(path, file_format=None):
+    if file_format is None:
+        is_jsonl = path.endswith((".jsonl", ".ndjson"))
+        file_format = "jsonl" if is_jsonl else "csv"
+    with open(path, encoding="utf-8", newline="") as source:
+        if file_format == "csv":
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if not line.strip():
+                # Пустая строка не данные, но номера ошибок должны
+                # совпадать с номерами строк файла
+                yield None
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as error:
+                yield UnreadableRow(
+                    f"некорректный JSON: {error.msg} (позиция {error.pos})"
+                )
+
+
+def validate(row):
+    if isinstance(row, UnreadableRow):
+        raise ValidationError(row.message)
+    if not isinstance(row, dict):
+        raise ValidationError("строка должна быть объектом JSON")
+    values = {name: str(row.get(name) or "").strip() for name in FIELDS}
+    # Пароль не обрезается: пробелы в нем значимы
+    values["password"] = str(row.get("password") or "")
+    # Нормализация та же, что у User.objects.create_user
+    username = User.normalize_username(values["username"])
+    values["username"] = username
+    values["email"] = User.objects.normalize_email(values["email"])
+    if not username:
+        raise ValidationError("не указано имя пользователя")
+    # Проверки полей модели: длина (bulk_create ее не проверяет, а
+    # PostgreSQL отклонит всю пачку), формат имени и адреса
+    for name in FIELDS:
+        if name == "password":
+            continue
+        try:
+            User._meta.get_field(name).clean(values[name], None)
+        except ValidationError as error:
+            raise ValidationError(
+                [f"{name}: {message}" for message in error.messages]
+            )
+    return values
+
+
+def prepare(rows):
+    """Проверяет строки, возвращает (новые, повторы, ошибки)."""
+    valid, duplicates, errors, seen = [], [], [], set()
+    for number, row in enumerate(rows, start=1):
+        if row is None:
+            continue
+        try:
+            values = validate(row)
+        except ValidationError as error:
+            errors.append((number, " ".join(error.messages)))
+            continue
+        if values["username"] in seen:
+            duplicates.append(values["username"])
+            continue
+        seen.add(values["username"])
+        valid.append(values)
+    existing = set(
+        User.objects.filter(username__in=seen).values_list(
+            "username", flat=True,
+        )
+    )
+    duplicates.extend(sorted(existing))
+    return (
+        [values for values in valid if values["username"] not in existing],
+        duplicates,
+        errors,
+    )
+
+
+def _init_worker(overrides):
+    # При spawn/forkserver процесс стартует без настроенного Django
+    if not apps.ready:
+        django.setup()
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+
+def hash_password(password):
+    # Пустой пароль — вход по паролю невозможен, как у set_unusable_password
+    return hashers.make_password(password or None)
+
+
+def import_users(rows, workers=None, batch_size=IMPORT_BATCH_SIZE,
+                 progress=None):
+    users, duplicates, errors = prepare(rows)
+    result = ImportResult(duplicates=duplicates, errors=errors)
+    if not users:
+        return result
+
+    workers = workers or os.cpu_count() or 1
+    overrides = {name: getattr(settings, name) for name in HASHER_SETTINGS}
+    started = time.perf_counter()
+    batches = [
+        users[start:start + batch_size]
+        for start in range(0, len(users), batch_size)
+    ]
+    done = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(overrides,),
+    ) as pool:
+        def submit(batch):
+            return pool.map(
+                hash_password,
+                [values["password"] for values in batch],
+                chunksize=max(1, len(batch) // (workers * 4)),
+            )
+
+        hashing = submit(batches[0])
+        for index, batch in enumerate(batches):
+            passwords = list(hashing)
+            # Следующая пачка хешируется, пока текущая вставляется
+            if index + 1 < len(batches):
+                hashing = submit(batches[index + 1])
+            objs = [
+                User(**{**values, "password": encoded})
+                for values, encoded in zip(batch, passwords)
+            ]
+            result.created += _insert(objs, result)
+            done += len(batch)
+            if progress is not None:
+                progress(done, len(users), time.perf_counter() - started)
+
+    invalidate("users")
+    invalidate_pages("users")
+    return result
+
+
+def _insert(objs, result):
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(objs)
+        return len(objs)
+    except IntegrityError:
+        # Имена успели занять после проверки: пачка вставляется по одной
+        # строке, и занятое имя — в том числе занятое уже сейчас — идет
+        # в повторы, не ломая остальные строки
+        created = 0
+        for user in objs:
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create([user])
+            except IntegrityError:
+                result.duplicates.append(user.username)
+            else:
+                created += 1
+        return created
@@ -0,0 +1,68 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task_manager.users.importing import (
+    IMPORT_BATCH_SIZE,
+    import_users,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает пользователей из CSV или JSON Lines (поля username, "
+        "password, email, first_name, last_name); пароли хешируются "
+        "параллельно на всех ядрах"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл .csv или .jsonl")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Формат файла, если его не видно по расширению",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Число процессов для хеширования паролей",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers должен быть не меньше 1")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть не меньше 1")
+        try:
+            rows = list(read_rows(options["path"], options["format"]))
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Не удалось прочитать файл: {error}")
+
+        result = import_users(
+            rows,
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            progress=self.progress,
+        )
+        for number, message in result.errors:
+            self.stderr.write(f"строка {number}: {message}")
+        if result.duplicates:
+            self.stdout.write(
+                "Пропущены существующие имена: "
+                + ", ".join(result.duplicates)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано пользователей: {result.created}, "
+            f"повторов: {len(result.duplicates)}, "
+            f"ошибок: {len(result.errors)}"
+        ))
+
+    def progress(self, done, total, elapsed):
+        self.stdout.write(
+            f"{done}/{total}: {done / max(elapsed, 1e-9):.0f} польз./с"
+        )
@@ -0,0 +1,101 @@
+import logging
+import random
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест: задержка обычной страницы во время потока "
+        "неудачных попыток входа"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=5.0,
+            help="Длительность каждого сценария, секунд",
+        )
+        parser.add_argument(
+            "--ips",
+            type=int,
+            default=4,
+            help="Число адресов, с которых идут попытки входа",
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        # Ответы 429/503 ожидаемы, не засоряем вывод предупреждениями
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+        rows = [("без нагрузки", self.measure())]
+        rows.append(("поток входов", self.measure_with_flood()))
+        with override_settings(
+            LOGIN_THROTTLE_IP=(10 ** 9, 10 ** 9),
+            LOGIN_THROTTLE_USERNAME=(10 ** 9, 10 ** 9),
+            PASSWORD_HASH_WAIT=60,
+        ):
+            rows.append(("поток входов без лимитов", self.measure_with_flood()))
+
+        self.stdout.write(f"{'сценарий':<28}{'p50, мс':>10}{'p95, мс':>10}")
+        for name, latencies in rows:
+            self.stdout.write(
+                f"{name:<28}"
+                f"{statistics.median(latencies) * 1000:>10.1f}"
+                f"{percentile(latencies, 0.95) * 1000:>10.1f}"
+            )
+
+    def measure(self):
+        client = Client(HTTP_HOST="localhost")
+        url = reverse("index")
+        latencies = []
+        deadline = time.perf_counter() + self.options["duration"]
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+        return latencies
+
+    def measure_with_flood(self):
+        stop = threading.Event()
+        attempts = []
+
+        def flood():
+            client = Client(HTTP_HOST="localhost")
+            url = reverse("login")
+            count = 0
+            while not stop.is_set():
+                ip = f"10.0.0.{random.randrange(self.options['ips'])}"
+                client.post(
+                    url,
+                    {"username": f"victim{count % 50}", "password": "x"},
+                    REMOTE_ADDR=ip,
+                )
+                count += 1
+            attempts.append(count)
+
+        threads = [
+            threading.Thread(target=flood, daemon=True)
+            for _ in range(self.options["threads"])
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            return self.measure()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.stdout.write(f"попыток входа: {sum(attempts)}")
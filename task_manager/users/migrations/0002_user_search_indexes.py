@@ -0,0 +1,41 @@
+from django.db import migrations
+
+COLUMNS = ("username", "first_name", "last_name")
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for column in COLUMNS:
+        if vendor == "postgresql":
+            # istartswith в PostgreSQL превращается в UPPER(col) LIKE 'X%'
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS auth_user_{column}_prefix_idx "
+                f"ON auth_user (UPPER({column}::text) text_pattern_ops)"
+            )
+        elif vendor == "sqlite":
+            # LIKE в SQLite регистронезависим и использует NOCASE-индекс
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS auth_user_{column}_prefix_idx "
+                f"ON auth_user ({column} COLLATE NOCASE)"
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ("postgresql", "sqlite"):
+        return
+    for column in COLUMNS:
+        schema_editor.execute(
+            f"DROP INDEX IF EXISTS auth_user_{column}_prefix_idx"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from task_manager.tasks.models import Task
+from task_manager.tasks.signals import task_restored, tasks_archived
+from task_manager.views.autocomplete import invalidate
+from task_manager.views.page_cache import invalidate_pages
+
+# Поля, которые не влияют на выдачу автодополнения (вход, смена пароля)
+IGNORED_FIELDS = {"last_login", "password"}
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= IGNORED_FIELDS:
+        return
+    invalidate("users")
+    invalidate_pages("users")
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, **kwargs):
+    invalidate("users")
+    invalidate_pages("users")
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    # Список пользователей показывает число задач автора и исполнителя
+    if created or "executor_id" in instance.tracked_changes():
+        invalidate_pages("users")
+
+
+@receiver(post_delete, sender=Task)
+@receiver(tasks_archived, sender=Task)
+@receiver(task_restored, sender=Task)
+def tasks_moved(sender, **kwargs):
+    invalidate_pages("users")
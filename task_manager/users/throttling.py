@@ -0,0 +1,75 @@
+"""Ограничение частоты входа.
+
+Лимит — скользящее окно из двух счетчиков в кэше: текущего окна и
+предыдущего, вклад которого убывает по мере того, как окно сдвигается.
+Окно равно времени полного пополнения (емкость / скорость), так что
+лимит ведет себя как корзина токенов с теми же настройками.
+
+Счетчик меняется только через cache.add и cache.incr/decr, без чтения и
+записи всего состояния, поэтому параллельные запросы не затирают друг
+друга. Атомарны эти операции в Redis и Memcached (и внутри одного
+процесса в LocMemCache); у файлового кэша и кэша в базе incr — это
+чтение и запись, и под нагрузкой часть попыток может не учесться. Для
+нескольких воркеров gunicorn нужен общий кэш, см. CACHES в настройках.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class RateLimit:
+    def __init__(self, key, capacity, refill_per_second):
+        self.key = f"throttle:{key}"
+        self.capacity = capacity
+        self.period = capacity / refill_per_second
+
+    def consume(self):
+        window, offset = divmod(time.time(), self.period)
+        key = f"{self.key}:{int(window)}"
+        # Ключ живет два окна: следующее окно читает его как предыдущее
+        cache.add(key, 0, int(self.period * 2) + 1)
+        try:
+            current = cache.incr(key)
+        except ValueError:
+            # Ключ истек между add и incr
+            cache.add(key, 1, int(self.period * 2) + 1)
+            current = 1
+        previous = cache.get(f"{self.key}:{int(window) - 1}", 0)
+        used = previous * (1 - offset / self.period) + current
+        if used <= self.capacity:
+            return True
+        # Отклоненная попытка лимит не расходует
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+        return False
+
+
+def client_ip(request):
+    if settings.LOGIN_THROTTLE_TRUST_FORWARDED:
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def login_allowed(request, username):
+    capacity, per_minute = settings.LOGIN_THROTTLE_IP
+    limits = [
+        RateLimit(f"login:ip:{client_ip(request)}", capacity, per_minute / 60),
+    ]
+    if username:
+        capacity, per_minute = settings.LOGIN_THROTTLE_USERNAME
+        digest = hashlib.sha256(username.lower().encode()).hexdigest()
+        limits.append(RateLimit(
+            f"login:user:{digest}",
+            capacity,
+            per_minute / 60,
+        ))
+    # Попытка учитывается во всех лимитах, чтобы перебор по одному имени
+    # с разных адресов тоже упирался в лимит
+    return all([limit.consume() for limit in limits])
@@ -5,11 +5,17 @@ from task_manager.users.views import (
     UserCreateView,
     UserUpdateView,
     UserDeleteView,
+    UserAutocompleteView,
 )
 
 urlpatterns = [
     path("", UsersListView.as_view(), name="users_list"),
     path("create/", UserCreateView.as_view(), name="user_create"),
+    path(
+        "autocomplete/",
+        UserAutocompleteView.as_view(),
+        name="users_autocomplete",
+    ),
     path(
         "<int:pk>/update/",
         UserUpdateView.as_view(),
@@ -5,19 +5,103 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.views import LoginView, LogoutView
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 
+from task_manager.projections import USER_LIST_FIELDS
+from task_manager.tasks.models import Task
+from task_manager.users.hashers import HashCapacityExceeded
+from task_manager.users.throttling import login_allowed
+from task_manager.views.autocomplete import AutocompleteView
 from task_manager.views.mixins import SafeDeleteWithProtectedErrorMixin
+from task_manager.views.page_cache import anonymous_page_cache
+from task_manager.views.pagination import cursor_page
 
+OVERLOADED_MESSAGE = "Сервис перегружен, попробуйте позже"
 
+
+USERS_PAGE_SIZE = 50
+
+
+def _task_count(field):
+    return Coalesce(
+        Subquery(
+            Task.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def search_users(queryset, query):
+    query = query.strip()
+    if not query:
+        return queryset
+    # Поиск по префиксу, чтобы работали индексы (см. миграцию users)
+    first, _, rest = query.partition(" ")
+    condition = (
+        Q(username__istartswith=query)
+        | Q(first_name__istartswith=query)
+        | Q(last_name__istartswith=query)
+    )
+    if rest.strip():
+        condition |= Q(
+            first_name__istartswith=first,
+            last_name__istartswith=rest.strip(),
+        )
+    return queryset.filter(condition)
+
+
+@method_decorator(anonymous_page_cache("users"), name="get")
 class UsersListView(ListView):
     model = User
     template_name = "users/user_list.html"
     context_object_name = "users"
 
     def get_queryset(self):
-        return User.objects.order_by("id")
+        return search_users(
+            User.objects.only(*USER_LIST_FIELDS),
+            self.request.GET.get("q", ""),
+        ).annotate(
+            authored_count=_task_count("author"),
+            assigned_count=_task_count("executor"),
+        )
+
+    def get_context_data(self, **kwargs):
+        users, prev_cursor, next_cursor = cursor_page(
+            self.object_list,
+            self.request.GET,
+            USERS_PAGE_SIZE,
+        )
+        kwargs.update({
+            "object_list": users,
+            "query": self.request.GET.get("q", ""),
+            "prev_cursor": prev_cursor,
+            "next_cursor": next_cursor,
+        })
+        return super().get_context_data(**kwargs)
+
+
+def user_label(user):
+    full_name = f"{user.first_name} {user.last_name}".strip()
+    return full_name or user.get_username()
+
+
+class UserAutocompleteView(AutocompleteView):
+    namespace = "users"
+
+    def get_results(self, query, limit):
+        users = search_users(
+            User.objects.only(*USER_LIST_FIELDS),
+            query,
+        ).order_by("username")[:limit]
+        return [(user.pk, user_label(user)) for user in users]
 
 
 class UserRegisterForm(UserCreationForm):
@@ -114,8 +198,15 @@ class UserCreateView(CreateView):
     success_url = reverse_lazy("login")
 
     def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except HashCapacityExceeded:
+            form.add_error(None, OVERLOADED_MESSAGE)
+            response = self.form_invalid(form)
+            response.status_code = 503
+            return response
         messages.success(self.request, "Пользователь успешно зарегистрирован")
-        return super().form_valid(form)
+        return response
 
 
 class UserUpdateView(LoginRequiredMixin, OnlySelfMixin, UpdateView):
@@ -125,8 +216,15 @@ class UserUpdateView(LoginRequiredMixin, OnlySelfMixin, UpdateView):
     success_url = reverse_lazy("users_list")
 
     def form_valid(self, form):
+        try:
+            response = super().form_valid(form)
+        except HashCapacityExceeded:
+            form.add_error(None, OVERLOADED_MESSAGE)
+            response = self.form_invalid(form)
+            response.status_code = 503
+            return response
         messages.success(self.request, "Пользователь успешно изменен")
-        return super().form_valid(form)
+        return response
 
 
 class UserDeleteView(
@@ -153,11 +251,36 @@ class UserLoginForm(AuthenticationForm):
             field.widget.attrs.update({"class": "form-control"})
 
 
+@method_decorator(anonymous_page_cache("pages"), name="get")
 class UserLoginView(LoginView):
     authentication_form = UserLoginForm
     template_name = "users/login.html"
     redirect_authenticated_user = True
 
+    def post(self, request, *args, **kwargs):
+        username = request.POST.get("username", "")
+        if not login_allowed(request, username):
+            return self.rejected(
+                username,
+                "Слишком много попыток входа. Попробуйте позже",
+                429,
+            )
+        try:
+            return super().post(request, *args, **kwargs)
+        except HashCapacityExceeded:
+            return self.rejected(username, OVERLOADED_MESSAGE, 503)
+
+    def rejected(self, username, message, status):
+        # Пароль не проверяется: форма рендерится без валидации
+        form = self.get_form_class()(
+            request=self.request,
+            initial={"username": username},
+        )
+        return self.render_to_response(
+            self.get_context_data(form=form, rejected_message=message),
+            status=status,
+        )
+
     def form_valid(self, form):
         messages.success(self.request, "Вы залогинены")
         return super().form_valid(form)
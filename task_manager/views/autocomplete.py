@@ -0,0 +1,39 @@
+import hashlib
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.views import View
+
+from task_manager import cache_versions
+
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_TIMEOUT = 300
+
+
+def invalidate(namespace):
+    cache_versions.bump(f"autocomplete:{namespace}")
+
+
+class AutocompleteView(LoginRequiredMixin, View):
+    namespace = ""
+    limit = AUTOCOMPLETE_LIMIT
+
+    def get_results(self, query, limit):
+        # Возвращает список пар (id, текст)
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get("q", "").strip()[:100]
+        version = cache_versions.version(f"autocomplete:{self.namespace}")
+        digest = hashlib.sha256(query.encode()).hexdigest()
+        key = f"autocomplete:{self.namespace}:{version}:{digest}"
+
+        results = cache.get(key)
+        if results is None:
+            results = [
+                {"id": pk, "text": text}
+                for pk, text in self.get_results(query, self.limit)
+            ]
+            cache.set(key, results, AUTOCOMPLETE_TIMEOUT)
+        return JsonResponse({"results": results})
@@ -0,0 +1,106 @@
+"""Кэш готовых страниц для анонимных посетителей.
+
+Кэшируются только GET/HEAD-ответы 200 без ожидающих сообщений. Ключ
+включает версию пространства имен (см. cache_versions), поэтому
+``invalidate_pages`` сразу отключает все закэшированные страницы этого
+пространства.
+
+CSRF-токен в кэш не попадает: при сохранении значение поля
+``csrfmiddlewaretoken`` заменяется заглушкой, а при выдаче из кэша
+подставляется токен текущего посетителя.
+"""
+
+import hashlib
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from task_manager import cache_versions
+
+CSRF_PLACEHOLDER = "__csrf_token__"
+
+_CSRF_INPUT = re.compile(
+    rb'(name="csrfmiddlewaretoken" value=")[^"]*(")'
+)
+
+# Заголовки, которые относятся к конкретному посетителю
+_SKIPPED_HEADERS = {"set-cookie", "vary"}
+
+
+def invalidate_pages(namespace):
+    cache_versions.bump(f"pages:{namespace}")
+
+
+def _page_key(namespace, request):
+    version = cache_versions.version(f"pages:{namespace}")
+    digest = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+    return f"pages:{namespace}:{version}:{digest}"
+
+
+def _cacheable(request):
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not len(get_messages(request))
+    )
+
+
+def _replay(request, entry):
+    content, status, headers = entry
+    if CSRF_PLACEHOLDER.encode() in content:
+        content = content.replace(
+            CSRF_PLACEHOLDER.encode(),
+            get_token(request).encode(),
+        )
+    response = HttpResponse(content, status=status)
+    for name, value in headers:
+        response[name] = value
+    response["Content-Length"] = str(len(content))
+    return response
+
+
+def anonymous_page_cache(namespace, timeout=None):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable(request):
+                return view(request, *args, **kwargs)
+
+            key = _page_key(namespace, request)
+            entry = cache.get(key)
+            if entry is not None:
+                return _replay(request, entry)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+
+            def store(response):
+                content = _CSRF_INPUT.sub(
+                    rb"\g<1>" + CSRF_PLACEHOLDER.encode() + rb"\g<2>",
+                    response.content,
+                )
+                headers = [
+                    (name, value) for name, value in response.items()
+                    if name.lower() not in _SKIPPED_HEADERS
+                    and name.lower() != "content-length"
+                ]
+                cache.set(
+                    key,
+                    (content, response.status_code, headers),
+                    settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout,
+                )
+                return response
+
+            if hasattr(response, "render") and not response.is_rendered:
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,38 @@
+def _cursor(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def cursor_page(queryset, params, page_size, field="id"):
+    """Страница по курсору ``after``/``before`` вместо OFFSET.
+
+    Возвращает (объекты, курсор предыдущей страницы, курсор следующей).
+    """
+    after = _cursor(params.get("after"))
+    before = _cursor(params.get("before"))
+
+    if before is not None:
+        items = list(
+            queryset.filter(**{f"{field}__lt": before})
+            .order_by(f"-{field}")[:page_size + 1]
+        )
+        has_prev = len(items) > page_size
+        items = items[:page_size][::-1]
+        has_next = True
+    else:
+        if after is not None:
+            queryset = queryset.filter(**{f"{field}__gt": after})
+        items = list(queryset.order_by(field)[:page_size + 1])
+        has_next = len(items) > page_size
+        items = items[:page_size]
+        has_prev = after is not None
+
+    if not items:
+        return items, None, None
+    return (
+        items,
+        getattr(items[0], field) if has_prev else None,
+        getattr(items[-1], field) if has_next else None,
+    )
@@ -0,0 +1,48 @@
+"""Прогрев приложения перед запуском воркеров.
+
+Вызывается из gunicorn.conf.py в мастер-процессе после ``preload_app``,
+поэтому скомпилированные шаблоны и заполненный URL-резолвер достаются
+воркерам при fork и первые запросы не платят за их построение.
+"""
+
+import time
+from pathlib import Path
+
+from django.template import engines
+from django.urls import get_resolver
+
+
+def template_names(engine):
+    for directory in engine.dirs:
+        root = Path(directory)
+        for path in sorted(root.rglob("*.html")):
+            yield path.relative_to(root).as_posix()
+
+
+def compile_templates():
+    # Кэширующий загрузчик хранит скомпилированные шаблоны в памяти
+    # процесса, get_template достаточно вызвать один раз
+    engine = engines["django"].engine
+    count = 0
+    for name in template_names(engine):
+        engine.get_template(name)
+        count += 1
+    return count
+
+
+def populate_urls():
+    resolver = get_resolver()
+    # reverse_dict заполняет таблицы и для resolve(), и для reverse()
+    resolver.reverse_dict
+    return len(resolver.url_patterns)
+
+
+def warm_up():
+    started = time.perf_counter()
+    templates = compile_templates()
+    patterns = populate_urls()
+    return {
+        "templates": templates,
+        "url_patterns": patterns,
+        "duration_ms": (time.perf_counter() - started) * 1000,
+    }
@@ -0,0 +1,45 @@
+from django import forms
+
+
+class AutocompleteMixin:
+    """Рендерит только выбранные варианты, остальные подгружаются по
+    ``data-autocomplete-url`` (см. templates/partials/autocomplete.html)."""
+
+    def __init__(self, url, attrs=None):
+        self.url = url
+        super().__init__(attrs)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["attrs"]["data-autocomplete-url"] = str(self.url)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        iterator = self.choices
+        choices = []
+        if (
+            not self.allow_multiple_selected
+            and iterator.field.empty_label is not None
+        ):
+            choices.append(("", iterator.field.empty_label))
+
+        selected = [pk for pk in value if pk and str(pk).isdigit()]
+        if selected:
+            choices += [
+                iterator.choice(obj)
+                for obj in iterator.queryset.filter(pk__in=selected)
+            ]
+
+        self.choices = choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = iterator
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass